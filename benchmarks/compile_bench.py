@@ -0,0 +1,112 @@
+"""
+Compares running a numeric LSS program with a straightforward
+tree-walking evaluator over the parser's nested lists, against the
+compiled Python backend with and without type specialization.
+
+Usage: python -m benchmarks.compile_bench [calls] [repeats]
+"""
+import sys
+import time
+from io import StringIO
+from lss_lexer.lss_token import Token
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_analyzer.lss_analyzer import analyze, special_form
+from lss_compiler.lss_compiler import compile_program, make_env, run
+from lss_env.comp_obj import globalEnv
+
+PRELUDE = ("(defun poly (x) (require (> x 0))"
+           " (+ (* 3.0 (* x x)) (- (* 2.0 x) 1.0))"
+           " (ensure (> result 0)))\n"
+           "(defun mix (a b) (require true)"
+           " (+ (poly a) (/ (poly b) (+ a b)))"
+           " (ensure true))\n")
+
+def make_program(calls):
+    lines = [PRELUDE]
+    for i in range(calls):
+        lines.append("(+ (mix {0} {1}) (* 9 (+ 2.56 {0})))\n".format(
+                         i % 50 + 1, i % 7 + 1))
+    return "".join(lines)
+
+class _Scope():
+    def __init__(self, names, parent):
+        self.names = names
+        self.parent = parent
+
+    def lookup(self, sym):
+        scope = self
+        while scope is not None:
+            if sym in scope.names:
+                return scope.names[sym]
+            scope = scope.parent
+        raise NameError(sym)
+
+def tree_walk(ast):
+    """
+    The baseline: evaluates the nested list AST directly.
+    """
+    scope = _Scope({sym: compObj.value
+                    for sym, compObj in globalEnv.items()}, None)
+    results = []
+    for expr in ast:
+        keyword = special_form(expr)
+        if keyword == "def":
+            scope.names[expr[1][1]] = _eval(expr[2], scope)
+        elif keyword == "defun":
+            scope.names[expr[1][1]] = _make_func(expr, scope)
+        else:
+            results.append(_eval(expr, scope))
+    return results
+
+def _make_func(expr, scope):
+    params = [param[1] for param in expr[2]]
+    def func(*args):
+        local = _Scope(dict(zip(params, args)), scope)
+        if not _eval(expr[3][1], local):
+            raise AssertionError("precondition")
+        for bodyExpr in expr[4:-1]:
+            result = _eval(bodyExpr, local)
+        if not _eval(expr[-1][1], _Scope({"result": result}, local)):
+            raise AssertionError("postcondition")
+        return result
+    return func
+
+def _eval(expr, scope):
+    if isinstance(expr, Token):
+        return scope.lookup(expr[1]) if expr.isSym() else expr[1]
+    func = _eval(expr[0], scope)
+    return func(*[_eval(arg, scope) for arg in expr[1:]])
+
+def timed(name, func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    elapsed = time.perf_counter() - start
+    print("{:>22}: {:.3f}s".format(name, elapsed))
+    return result
+
+def main(calls, repeats):
+    source = make_program(calls)
+    tokens = lex(StringIO(source))[0]
+    ast = parse(tokens)[0]
+    types = {}
+    errors = analyze(ast, types)[1]
+    assert not errors, errors
+
+    start = time.perf_counter()
+    typed = compile_program(ast, types)
+    untyped = compile_program(ast)
+    print("compiled both variants in {:.3f}s".format(
+              time.perf_counter() - start))
+    print("{} calls, {} repeats".format(calls, repeats))
+
+    expected = timed("tree-walking", lambda: tree_walk(ast), repeats)
+    generic = timed("compiled", lambda: run(untyped, make_env()), repeats)
+    special = timed("compiled+specialized", lambda: run(typed, make_env()),
+                    repeats)
+    assert expected == generic == special
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 20)
@@ -0,0 +1,61 @@
+"""
+Measures hash-consing, memoized analysis and common subexpression
+elimination on a program full of repeated pure subexpressions: peak
+memory of parsing and time to analyze, with and without sharing, and
+the run time of the compiled program with and without cse.
+
+Usage: python -m benchmarks.cse_bench [forms]
+"""
+import sys
+import time
+import tracemalloc
+from io import StringIO
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_analyzer.lss_analyzer import analyze
+from lss_compiler.lss_compiler import compile_program, run
+
+PRELUDE = ("(defun sq (x) (require true) (* x x) (ensure (> result -1)))\n"
+           "(defun step (acc i) (require (> (sq (+ i 1)) 0))"
+           " (+ acc (- (* (sq (+ i 1)) (sq (+ i 1))) (sq (+ i 1))))"
+           " (ensure (> result -1)))\n"
+           "(reduce step 0 (range 0 200000))\n")
+
+def make_program(forms):
+    return PRELUDE + "".join(
+        "(+ (* 9 (+ 2.56 {0})) (/ (* 9 (+ 2.56 {0})) (sq (+ 2.56 {0}))))\n"
+        .format(i % 10) for i in range(forms))
+
+def measure(name, tokens, hashCons):
+    tracemalloc.start()
+    ast = parse(list(tokens), hashCons)[0]
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    types = {}
+    namespace, errors = analyze(ast, types, memoize=hashCons)
+    analyzed = time.perf_counter() - start
+    assert not errors, errors
+    print("{:>11}: parse peak {:6.1f} MiB, analyze {:.3f}s".format(
+              name, peak / 2**20, analyzed))
+    return (ast, types, namespace)
+
+def time_run(name, ast, types, namespace, cse):
+    code = compile_program(ast, types, cse=cse, namespace=namespace)
+    start = time.perf_counter()
+    results = run(code)
+    print("{:>11}: run {:.3f}s".format(name, time.perf_counter() - start))
+    return results
+
+def main(forms):
+    tokens = lex(StringIO(make_program(forms)))[0]
+    print("{} forms, {} tokens".format(forms, len(tokens)))
+    measure("plain", tokens, False)
+    ast, types, namespace = measure("hash-consed", tokens, True)
+    plain = time_run("no cse", ast, types, namespace, False)
+    shared = time_run("cse", ast, types, namespace, True)
+    assert plain == shared
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
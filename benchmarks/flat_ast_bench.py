@@ -0,0 +1,52 @@
+"""
+Compares the nested list AST output by parse against the FlatAst
+output by parse_flat: peak memory of parsing, time to analyze, and
+the size and time of serializing the tree for another process. The
+nested lists pickle with their tokens, while FlatAst.to_bytes leaves
+out the token buffer, which a receiving process may already hold.
+
+Usage: python -m benchmarks.flat_ast_bench [forms]
+"""
+import pickle
+import sys
+import time
+import tracemalloc
+from io import StringIO
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_parser.flat_ast import parse_flat
+from lss_analyzer.lss_analyzer import analyze
+
+def make_program(forms):
+    return "".join("(+ (* {0} 2) (- {0} (/ 1.5 {1})))\n".format(i, i % 7 + 1)
+                   for i in range(forms))
+
+def measure(name, tokens, parser):
+    tracemalloc.start()
+    ast = parser(list(tokens))[0]
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    errors = analyze(ast, {})[1]
+    analyzed = time.perf_counter() - start
+    assert not errors, errors
+
+    start = time.perf_counter()
+    if hasattr(ast, "to_bytes"):
+        data = ast.to_bytes()
+    else:
+        data = pickle.dumps(ast, pickle.HIGHEST_PROTOCOL)
+    serialized = time.perf_counter() - start
+    print("{:>7}: parse peak {:7.1f} MiB, analyze {:.3f}s, "
+          "serialize {:.3f}s to {:6.1f} MiB".format(
+              name, peak / 2**20, analyzed, serialized, len(data) / 2**20))
+
+def main(forms):
+    tokens = lex(StringIO(make_program(forms)))[0]
+    print("{} forms, {} tokens".format(forms, len(tokens)))
+    measure("nested", tokens, parse)
+    measure("flat", tokens, parse_flat)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
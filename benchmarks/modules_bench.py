@@ -0,0 +1,86 @@
+"""
+Measures loading a program split into modules: a shared prelude
+imported by several independent libraries, which the main file
+imports. Times a cold load, a cold load compiling the libraries in
+parallel, and a warm load from the on-disk cache, against lexing,
+parsing and analyzing the same program with the prelude pasted into
+every library.
+
+Usage: python -m benchmarks.modules_bench [libraries] [forms]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from io import StringIO
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_analyzer.lss_analyzer import analyze
+from lss_compiler.lss_compiler import compile_program
+from lss_compiler.modules import ModuleLoader
+
+def make_prelude(forms):
+    return "".join("(defun p{0} (x) (require true) (+ (* x {0}) 1)"
+                   " (ensure true))\n".format(i) for i in range(forms))
+
+def make_library(index, forms):
+    return "".join("(defun l{0}_{1} (x) (require true) (p{1} (- x {0}))"
+                   " (ensure true))\n".format(index, i)
+                   for i in range(forms))
+
+def timed(name, func):
+    start = time.perf_counter()
+    results, errors = func()
+    assert not errors, errors[:3]
+    print("{:>14}: {:.3f}s".format(name, time.perf_counter() - start))
+    return results
+
+def main(libraries, forms):
+    directory = tempfile.mkdtemp()
+    cacheDir = os.path.join(directory, "cache")
+    try:
+        prelude = make_prelude(forms)
+        with open(os.path.join(directory, "prelude.lss"), "w") as source:
+            source.write(prelude)
+        pasted = []
+        for index in range(libraries):
+            library = make_library(index, forms)
+            pasted.append(prelude + library)
+            with open(os.path.join(directory, "lib{}.lss".format(index)),
+                      "w") as source:
+                source.write("(import \"prelude.lss\")\n" + library)
+        calls = "".join("(l{}_0 1)\n".format(index)
+                        for index in range(libraries))
+        mainPath = os.path.join(directory, "main.lss")
+        with open(mainPath, "w") as source:
+            source.write("".join("(import \"lib{}.lss\")\n".format(index)
+                                 for index in range(libraries)) + calls)
+        print("{} libraries of {} forms".format(libraries, forms))
+
+        def pasted_prelude():
+            errors = []
+            for source in pasted:
+                tokens, lexErrors = lex(StringIO(source))
+                ast, parseErrors = parse(tokens)
+                types = {}
+                namespace, semantErrors = analyze(ast, types)
+                errors.extend(lexErrors + parseErrors + semantErrors)
+                compile_program(ast, types, namespace=namespace)
+            return (None, errors)
+
+        timed("pasted", pasted_prelude)
+        expected = timed("cold", lambda: ModuleLoader().run_file(mainPath))
+        results = timed("cold parallel", lambda: ModuleLoader(
+                            processes=os.cpu_count() or 1).run_file(mainPath))
+        assert results == expected
+        ModuleLoader(cacheDir).run_file(mainPath)
+        results = timed("warm", lambda: ModuleLoader(cacheDir)
+                                            .run_file(mainPath))
+        assert results == expected
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 2000)
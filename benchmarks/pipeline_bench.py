@@ -0,0 +1,66 @@
+"""
+Compares analyzing a program file in phases, with lex, parse and
+analyze each run over the whole file, against analyze_stream, which
+lexes, parses and analyzes one form at a time: peak memory, total
+time, and the time until the first error is reported.
+
+Usage: python -m benchmarks.pipeline_bench [forms]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_analyzer.lss_analyzer import analyze
+from lss_analyzer.pipeline import analyze_stream
+
+def make_program(forms):
+    # The only error is near the start
+    return "(undefined 1)\n" + "".join(
+        "(+ (* {0} 2) (- {0} (/ 1.5 {1})))\n".format(i, i % 7 + 1)
+        for i in range(forms))
+
+def phased(path):
+    with open(path) as stream:
+        tokens, errors = lex(stream)
+    ast, parseErrors = parse(tokens)
+    errors = errors + parseErrors + analyze(ast)[1]
+    yield from errors
+
+def streamed(path):
+    with open(path) as stream:
+        for _, errors in analyze_stream(stream):
+            yield from errors
+
+def measure(name, path, analyzer):
+    tracemalloc.start()
+    start = time.perf_counter()
+    firstError = None
+    numErrors = 0
+    for _ in analyzer(path):
+        if firstError is None:
+            firstError = time.perf_counter() - start
+        numErrors += 1
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert numErrors == 1, numErrors
+    print("{:>8}: peak {:7.2f} MiB, total {:.3f}s, first error {:.4f}s"
+          .format(name, peak / 2**20, total, firstError))
+
+def main(forms):
+    with tempfile.NamedTemporaryFile("w", suffix=".lss",
+                                     delete=False) as source:
+        source.write(make_program(forms))
+    try:
+        print("{} forms, {:.1f} MiB of source".format(
+                  forms, os.path.getsize(source.name) / 2**20))
+        measure("phased", source.name, phased)
+        measure("streamed", source.name, streamed)
+    finally:
+        os.remove(source.name)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,72 @@
+"""
+Measures peak memory of recursive list workloads when lists are
+Python lists that are copied on every cons/rest, against the
+persistent Cons and PVector types. Recursion is unrolled into an
+explicit stack of live versions, which is what a recursive LSS
+function keeps alive in its frames.
+
+Usage: python -m benchmarks.plist_bench [length]
+"""
+import sys
+import time
+import tracemalloc
+from lss_env.plist import NIL, Cons, PVector
+
+def build_copying(n):
+    versions = [[]]
+    for i in range(n):
+        versions.append([i] + versions[-1])
+    return versions
+
+def build_cons(n):
+    versions = [NIL]
+    for i in range(n):
+        versions.append(Cons(i, versions[-1]))
+    return versions
+
+def walk_copying(xs):
+    versions = [xs]
+    while versions[-1]:
+        versions.append(versions[-1][1:])
+    return versions
+
+def walk_cons(xs):
+    versions = [xs]
+    while len(versions[-1]):
+        versions.append(versions[-1].rest())
+    return versions
+
+def push_copying(n):
+    versions = [[]]
+    for i in range(n):
+        versions.append(versions[-1] + [i])
+    return versions
+
+def push_vector(n):
+    versions = [PVector()]
+    for i in range(n):
+        versions.append(versions[-1].push(i))
+    return versions
+
+def measure(name, func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print("{:>14}: peak {:>10.1f} KiB in {:.3f}s".format(
+              name, peak / 1024, elapsed))
+    return result
+
+def main(n):
+    print("recursive workloads over {} elements".format(n))
+    measure("build/copying", build_copying, n)
+    measure("build/cons", build_cons, n)
+    measure("walk/copying", walk_copying, list(range(n)))
+    measure("walk/cons", walk_cons, Cons.fromIter(range(n)))
+    measure("push/copying", push_copying, n)
+    measure("push/vector", push_vector, n)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
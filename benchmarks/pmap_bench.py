@@ -0,0 +1,52 @@
+"""
+Compares map against pmap, and reduce against preduce, for a pure
+numeric defun applied to a large range.
+
+Usage: python -m benchmarks.pmap_bench [items] [workers]
+"""
+import sys
+import time
+from io import StringIO
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_analyzer.lss_analyzer import analyze
+from lss_compiler.lss_compiler import compile_program, make_env, run
+from lss_env import parallel
+
+PRELUDE = ("(defun poly (x) (require (> x -1))"
+           " (+ (* 3.0 (* x x)) (- (* 2.0 x) (/ x 7.0)))"
+           " (ensure (> result -1)))\n"
+           "(defun heavy (x) (require true)"
+           " (+ (poly x) (+ (poly (+ x 1)) (+ (poly (+ x 2)) (poly (+ x 3)))))"
+           " (ensure true))\n"
+           "(defun add (x y) (require true) (+ x y) (ensure true))\n")
+
+def timed(name, source):
+    ast = parse(lex(StringIO(source))[0])[0]
+    types = {}
+    namespace, errors = analyze(ast, types)
+    assert not errors, errors
+    code = compile_program(ast, types)
+    start = time.perf_counter()
+    results = run(code, make_env(), namespace)
+    print("{:>8}: {:.3f}s".format(name, time.perf_counter() - start))
+    return results[-1]
+
+def main(items, workers):
+    parallel.PARALLEL_WORKERS = workers
+    print("{} items, {} workers".format(items, workers))
+    data = "(range 0 {})".format(items)
+    serial = timed("map", PRELUDE + "(vec (map heavy {}))".format(data))
+    # Start the pool outside of the measurement
+    parallel._executor_for()
+    assert timed("pmap", PRELUDE + "(pmap heavy {})".format(data)) == serial
+    total = timed("reduce", PRELUDE + "(reduce add 0 (map heavy {}))".format(
+                                          data))
+    # Chunks are summed separately, so floats may round differently
+    ptotal = timed("preduce", PRELUDE + "(preduce add 0 (pmap heavy {}))"
+                                        .format(data))
+    assert abs(ptotal - total) <= 1e-9 * abs(total)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else parallel.PARALLEL_WORKERS)
@@ -0,0 +1,62 @@
+"""
+Measures the overhead of profiling a compiled LSS program: the same
+program run plainly and under the sampling profiler at the default
+interval, each with and without compiled in call counting. The time to
+build the profile after the run is reported separately, since it does
+not slow the program down.
+
+Usage: python -m benchmarks.profile_bench [calls] [repeats]
+"""
+import sys
+import time
+from io import StringIO
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_analyzer.lss_analyzer import analyze
+from lss_compiler.lss_compiler import (CALLS_NAME, compile_program,
+                                       make_env, run)
+from lss_compiler.profiler import PROFILE_FILENAME, Profiler
+from benchmarks.compile_bench import make_program
+
+def plain_run(code):
+    start = time.perf_counter()
+    run(code, make_env())
+    return (time.perf_counter() - start, 0.0, None)
+
+def sampled_run(code, namespace=None):
+    env = make_env()
+    profiler = Profiler(filename=PROFILE_FILENAME)
+    start = time.perf_counter()
+    profiler.start(env[CALLS_NAME])
+    run(code, env, namespace)
+    elapsed = time.perf_counter() - start
+    profile = profiler.stop(namespace)
+    return (elapsed, time.perf_counter() - start - elapsed, profile)
+
+def best_of(func, repeats):
+    return min((func() for _ in range(repeats)), key=lambda r: r[0])
+
+def main(calls, repeats):
+    ast = parse(lex(StringIO(make_program(calls)))[0])[0]
+    types = {}
+    namespace, errors = analyze(ast, types)
+    assert not errors, errors
+
+    plain = compile_program(ast, types, PROFILE_FILENAME)
+    counted = compile_program(ast, types, PROFILE_FILENAME, True)
+    timings = [("plain", best_of(lambda: plain_run(plain), repeats)),
+               ("sampled", best_of(lambda: sampled_run(plain), repeats)),
+               ("counted", best_of(lambda: plain_run(counted), repeats)),
+               ("sampled+counted",
+                best_of(lambda: sampled_run(counted), repeats))]
+    base = timings[0][1][0]
+    print("{} calls, best of {}".format(calls, repeats))
+    for name, (elapsed, report, _) in timings:
+        print("{:>16}: {:.4f}s ({:+.1f}%), report built in {:.4f}s".format(
+                  name, elapsed, 100 * (elapsed - base) / base, report))
+    print()
+    print(sampled_run(counted, namespace)[2].summary())
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 20)
@@ -0,0 +1,43 @@
+"""
+Compares building a string out of many small pieces with repeated
+Python str concatenation against repeated Rope concatenation, the
+way an LSS accumulation loop over append does.
+
+Usage: python -m benchmarks.rope_bench [pieces]
+"""
+import sys
+import time
+from lss_env.rope import Rope
+
+# The str baseline is quadratic, past this it takes minutes
+STR_LIMIT = 200000
+
+def build_str(pieces):
+    acc = ""
+    for piece in pieces:
+        # Bind through a second name so CPython cannot resize in place,
+        # mirroring a value that is also held by the LSS environment.
+        prev = acc
+        acc = prev + piece
+    return acc
+
+def build_rope(pieces):
+    acc = Rope()
+    for piece in pieces:
+        acc = acc.concat(piece)
+    return str(acc)
+
+def main(numPieces):
+    pieces = ["piece{};".format(i % 97) for i in range(numPieces)]
+    for name, builder in (("str", build_str), ("rope", build_rope)):
+        if builder is build_str and numPieces > STR_LIMIT:
+            print("{:>5}: skipped above {} pieces".format(name, STR_LIMIT))
+            continue
+        start = time.perf_counter()
+        result = builder(pieces)
+        elapsed = time.perf_counter() - start
+        print("{:>5}: {:>9} pieces, {:>10} chars in {:.3f}s".format(
+                  name, numPieces, len(result), elapsed))
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,147 @@
+"""
+Asymptotic complexity regression tests for the front end.
+
+Each test generates a pathological input shape at increasing sizes,
+measures the runtime and peak memory of one phase on it, and fits the
+exponent k of the growth n^k on a log-log scale. A test fails if either
+fit grows faster than n log n, which over these sizes has an exponent of
+about 1.1, with some slack for timing noise. Quadratic behavior shows
+up as an exponent close to 2.
+
+The sizes default to 1k, 10k and 100k. Set LSS_COMPLEXITY_FULL=1 in the
+environment to also run 1M, which takes a few minutes.
+"""
+import gc
+import math
+import os
+import time
+import tracemalloc
+import unittest as ut
+from io import StringIO
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_analyzer.lss_analyzer import analyze
+from lss_env.namespace import NameSpace
+
+SIZES = [1000, 10000, 100000]
+if os.environ.get("LSS_COMPLEXITY_FULL"):
+    SIZES.append(1000000)
+
+# n log n has a log-log slope of about 1.1 over these sizes
+MAX_EXPONENT = 1.35
+
+def _fit_exponent(sizes, values):
+    """
+    Returns the slope of the least squares line through the points
+    (log n, log value).
+    """
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(value, 1e-9)) for value in values]
+    meanX = sum(xs) / len(xs)
+    meanY = sum(ys) / len(ys)
+    num = sum((x - meanX) * (y - meanY) for x, y in zip(xs, ys))
+    den = sum((x - meanX) ** 2 for x in xs)
+    return num / den
+
+def _measure(setup, phase):
+    """
+    Runs phase on the input built by setup at every size, and returns
+    the lists of runtimes and peak memory allocations.
+    """
+    times = []
+    peaks = []
+    for size in SIZES:
+        # Small sizes are repeated so timer resolution does not dominate
+        repeats = max(1, 10000 // size)
+        best = None
+        for _ in range(repeats):
+            data = setup(size)
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                phase(data)
+                elapsed = time.perf_counter() - start
+            finally:
+                gc.enable()
+            best = elapsed if best is None else min(best, elapsed)
+        times.append(best)
+
+        data = setup(size)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            phase(data)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    return (times, peaks)
+
+class _ComplexityTest(ut.TestCase):
+    def assertScales(self, setup, phase):
+        times, peaks = _measure(setup, phase)
+        timeExponent = _fit_exponent(SIZES, times)
+        memoryExponent = _fit_exponent(SIZES, peaks)
+        self.assertLessEqual(
+            timeExponent, MAX_EXPONENT,
+            "runtime grows as n^{:.2f}: {}".format(timeExponent, times))
+        self.assertLessEqual(
+            memoryExponent, MAX_EXPONENT,
+            "memory grows as n^{:.2f}: {}".format(memoryExponent, peaks))
+
+def _lex_text(text):
+    return lex(StringIO(text))
+
+def _tokens(text):
+    return lex(StringIO(text))[0]
+
+class TestLex(_ComplexityTest):
+    def test_long_symbol(self):
+        self.assertScales(lambda n: "a" * n, _lex_text)
+
+    def test_long_string(self):
+        self.assertScales(lambda n: "\"" + "a" * n + "\"", _lex_text)
+
+    def test_many_atoms(self):
+        self.assertScales(lambda n: "(+ 1 2) " * (n // 8), _lex_text)
+
+class TestParse(_ComplexityTest):
+    def test_stray_rparens(self):
+        self.assertScales(lambda n: _tokens(")" * n), parse)
+
+    def test_deep_nesting(self):
+        self.assertScales(lambda n: _tokens("(" * n + ")" * n), parse)
+
+    def test_unclosed_nesting(self):
+        self.assertScales(lambda n: _tokens("(" * n), parse)
+
+class TestNameSpaceQuery(_ComplexityTest):
+    @staticmethod
+    def _chain(n):
+        namespace = NameSpace("global", {"x": 1}, [], None)
+        for i in range(n):
+            namespace = NameSpace(str(i), {}, [], namespace)
+        return namespace
+
+    def test_deep_scope(self):
+        self.assertScales(self._chain,
+                          lambda namespace: namespace.query("x"))
+
+class TestSemant(_ComplexityTest):
+    @staticmethod
+    def _nested(n):
+        depth = n // 4
+        return parse(_tokens("(+ 1 " * depth + "1" + ")" * depth))[0]
+
+    @staticmethod
+    def _wide(n):
+        return parse(_tokens("(+ 1 2) " * (n // 8)))[0]
+
+    def test_deep_nesting(self):
+        self.assertScales(self._nested, lambda ast: analyze(ast, {}))
+
+    def test_many_forms(self):
+        self.assertScales(self._wide, lambda ast: analyze(ast, {}))
+
+if __name__ == "__main__":
+    ut.main()
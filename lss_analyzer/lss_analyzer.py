@@ -1,7 +1,11 @@
+from collections import Counter
 from typing import List, Dict, NewType, TypeVar
 from lss_lexer.lss_token import Token, TokenType
 from lss_env.namespace import NameSpace
-from lss_env.comp_obj import CompObj, DummyCompObj, globalEnv
+from lss_env.comp_obj import CompObj, FuncObj, DummyCompObj, globalEnv
+from lss_env.lss_type import LssType, Signature, type_of_token
+from lss_parser.flat_ast import FlatAst, NESTED
+from lss_parser.shared_ast import SharedAst
 
 # Type Aliases
 Symbol = NewType("Symbol", str)
@@ -12,44 +16,431 @@ Atom = TypeVar("Atom", Symbol, String, Number, Boolean)
 Expr = TypeVar("Expr", Atom, List["Expr"])
 Env = NewType("Env", Dict[str, CompObj])
 
-def analyze(ast):
+def analyze(ast, types=None, memoize=False, modules=None):
     """
     Should produce an namespace object and a list of errors.
     These two return objects are defined as empty here and are
-    mutated in the helper function, which works recursively.
+    mutated in the helper functions.
+
+    The ast is either the nested lists output by lss_parser.parse, a
+    SharedAst or a FlatAst. If a dict is passed as types, it is filled
+    with the inferred LssType of every analyzed node, keyed by the id
+    of the node for nested lists, by the id of the shared node for a
+    SharedAst, or by its index for a FlatAst. A node that is shared
+    between contexts with different types gets type ANY.
+
+    If memoize is true, the analysis of a pure subtree is reused where
+    the same node appears again with its symbols bound the same way.
+    This pays off for ASTs parsed with hashCons, where repeated
+    subexpressions are the same node.
+
+    A call to a global that the program defines more than once is
+    never taken to be pure, and its value or result has type ANY, since
+    which definition it reaches depends on when it runs.
+
+    Import forms are resolved by modules, which is called with the
+    path string of each import and returns a tuple (exports, errors).
+    Exports is a dict of the CompObjs the module defines, which are
+    bound in the global namespace, or None if the module could not be
+    loaded because of errors. Without modules, imports are errors.
     """
-    namespace = NameSpace("global", globalEnv, [], None)
     errors = []
-    for expr in ast:
-        semant(expr, namespace, errors)
+    if isinstance(ast, (FlatAst, SharedAst)):
+        view, roots = ast, list(ast.roots())
+    else:
+        view, roots = NESTED, ast
+    definitions = Counter(_definition_name(view, expr) for expr in roots)
+    namespace = NameSpace("global", dict(globalEnv), [], None,
+                          {sym for sym, count in definitions.items()
+                           if sym is not None and count > 1})
+    memo = {} if memoize else None
+    for expr in roots:
+        _semant_form(view, expr, namespace, errors, types, memo, modules)
     return (namespace, errors)
 
-def semant(expr, namespace, errors):
-    # Handle case when the expression is only an atom
-    if isinstance(expr, Token):
-        if expr.isSym():
-            compObj = namespace.query(expr[1]) 
-            if (not compObj):
-                errors.append(SyntaxError(
-                    "SemanticError: Undefined symbol: \n"
-                    + "\t {} \n".format(expr[1])
-                    + "seen on line {} column {}".format(expr[3], expr[4])))
-                return DummyCompObj()
+def semant_form(expr, namespace, errors, types=None, modules=None):
+    """
+    Analyzes a top level form. Unlike semant, this accepts the def,
+    defun and import forms, which bind symbols in namespace.
+    """
+    return _semant_form(NESTED, expr, namespace, errors, types, None,
+                        modules)
+
+def _semant_form(view, expr, namespace, errors, types, memo=None,
+                 modules=None):
+    keyword = _special_keyword(view, expr)
+    if keyword == "import":
+        compObj = _semant_import(view, expr, namespace, errors, modules)
+    elif keyword == "def":
+        compObj = _semant_def(view, expr, namespace, errors, types, memo)
+    elif keyword == "defun":
+        compObj = _semant_defun(view, expr, namespace, errors, types, memo)
+    else:
+        return _semant(view, expr, namespace, errors, types, memo)
+    _record_type(types, view.key(expr), compObj.lssType)
+    return compObj
+
+def _record_type(types, key, lssType):
+    """
+    Records the type of a node. A node seen again with another type,
+    which can happen when hash consing shares it between contexts, is
+    only known to have type ANY.
+    """
+    if types is not None:
+        known = types.get(key, lssType)
+        types[key] = lssType if known is lssType else LssType.ANY
+
+def special_form(expr):
+    """
+    Returns the keyword of a def, defun, import, require or ensure
+    form, or None if expr is not one of these forms.
+    """
+    return _special_keyword(NESTED, expr)
+
+def _definition_name(view, expr):
+    """
+    Returns the symbol a def or defun form binds, or None.
+    """
+    if _special_keyword(view, expr) not in ("def", "defun"):
+        return None
+    items = view.children(expr)
+    token = view.token(items[1]) if len(items) > 1 else None
+    return token[1] if _is_sym(token) else None
+
+def _special_keyword(view, expr):
+    if view.token(expr) is not None:
+        return None
+    items = view.children(expr)
+    head = view.token(items[0]) if items else None
+    if (head is not None and head.isSym()
+            and head[1] in ("def", "defun", "import", "require", "ensure")):
+        return head[1]
+    return None
+
+def _semant_import(view, expr, namespace, errors, modules):
+    items = view.children(expr)
+    head = view.token(items[0])
+    path = view.token(items[1]) if len(items) == 2 else None
+    if path is None or path[2] != TokenType.STR:
+        errors.append(_malformed_error(head, "(import String)"))
+        return DummyCompObj()
+    exports, moduleErrors = (None, []) if modules is None else modules(path[1])
+    if exports is None:
+        errors.append(SyntaxError(
+            "SemanticError: Could not import \n"
+            + "\t {} \n".format(path[0])
+            + "on line {} column {}".format(head.lineNum, head.colNum)))
+        errors.extend(moduleErrors)
+        return DummyCompObj()
+    namespace.env.update(exports)
+    return CompObj(None, None, LssType.NONE)
+
+def _semant_def(view, expr, namespace, errors, types, memo):
+    items = view.children(expr)
+    if len(items) != 3 or not _is_sym(view.token(items[1])):
+        errors.append(_malformed_error(view.token(items[0]),
+                                       "(def Symbol Atom)"))
+        return DummyCompObj()
+    compObj = _semant(view, items[2], namespace, errors, types, memo)
+    namespace.env[view.token(items[1])[1]] = compObj
+    return compObj
+
+def _semant_defun(view, expr, namespace, errors, types, memo):
+    items = view.children(expr)
+    if (len(items) < 6 or not _is_sym(view.token(items[1]))
+            or view.token(items[2]) is not None
+            or not all(_is_sym(view.token(param))
+                       for param in view.children(items[2]))
+            or _special_keyword(view, items[3]) != "require"
+            or len(view.children(items[3])) != 2
+            or _special_keyword(view, items[-1]) != "ensure"
+            or len(view.children(items[-1])) != 2):
+        errors.append(_malformed_error(
+            view.token(items[0]),
+            "(defun Symbol ([Symbol]*) (require SubExpr) "
+            + "[SubExpr]+ (ensure SubExpr))"))
+        return DummyCompObj()
+    params = [view.token(param)[1] for param in view.children(items[2])]
+    funcObj = FuncObj(None, view.token(items[1])[1], len(params),
+                      (lambda namespace, errors, argsCompObjs:
+                          DummyCompObj()))
+    # Bind before analyzing the body so that the function can recurse
+    namespace.env[funcObj.name] = funcObj
+
+    funcNamespace = NameSpace(funcObj.name,
+                              {param: DummyCompObj() for param in params},
+                              [], None)
+    namespace.add_child(funcNamespace)
+    _semant(view, view.children(items[3])[1], funcNamespace, errors, types,
+            memo)
+    for bodyExpr in items[4:-1]:
+        compObj = _semant(view, bodyExpr, funcNamespace, errors, types,
+                          memo)
+
+    # The postcondition sees the returned value as the symbol result
+    ensureNamespace = NameSpace("ensure", {"result": DummyCompObj()},
+                                [], None)
+    funcNamespace.add_child(ensureNamespace)
+    _semant(view, view.children(items[-1])[1], ensureNamespace, errors,
+            types, memo)
+
+    funcObj.signatures = (Signature((LssType.ANY,) * len(params),
+                                    compObj.lssType),)
+    funcObj.pure = _is_pure(view, [view.children(items[3])[1]]
+                                  + items[4:-1]
+                                  + [view.children(items[-1])[1]],
+                            ensureNamespace)
+    return funcObj
+
+def _is_pure(view, exprs, namespace):
+    """
+    Returns True if evaluating exprs in namespace provably has no side
+    effects. That is the case if every call is to a named pure function,
+    and no impure function is referred to as a value. Calls to anything
+    else, such as a parameter, cannot be verified and count as impure.
+    So do the functions passed to builtins like map and reduce, which
+    call them, unless they are named pure functions, and calls to
+    globals defined more than once.
+    """
+    stack = list(exprs)
+    while stack:
+        node = stack.pop()
+        token = view.token(node)
+        if token is not None:
+            if token.isSym():
+                compObj = namespace.query(token[1])
+                if not compObj or (isinstance(compObj, FuncObj)
+                                   and not compObj.pure):
+                    return False
+            continue
+        items = view.children(node)
+        if not items:
+            continue
+        head = view.token(items[0])
+        if not _is_pure_func(head, namespace):
+            return False
+        callee = namespace.query(head[1])
+        if isinstance(callee, FuncObj):
+            for index in callee.funcArgs():
+                if index + 1 < len(items) and not _is_pure_func(
+                        view.token(items[index + 1]), namespace):
+                    return False
+        stack.extend(items[1:])
+    return True
+
+def _is_pure_func(token, namespace):
+    """
+    Returns True if token is a symbol bound to a pure function. A
+    parameter, whatever it is bound to at runtime, is not, and neither
+    is a global that is defined again elsewhere in the program.
+    """
+    if not _is_sym(token):
+        return False
+    compObj = namespace.query(token[1])
+    return (bool(compObj) and compObj.isPureFunc()
+            and not namespace.is_redefined(token[1]))
+
+def _is_sym(token):
+    return token is not None and token.isSym()
+
+def _malformed_error(head, expected):
+    return SyntaxError(
+        "SemanticError: Malformed {} on line {} column {}, ".format(
+                head[1], head.lineNum, head.colNum)
+        + "expected \n"
+        + "\t {}".format(expected))
+
+def semant(expr, namespace, errors, types=None):
+    """
+    Analyzes an expression and returns the CompObj it evaluates to.
+
+    Sub expressions are visited in post order from an explicit stack
+    rather than by recursion, so that deeply nested expressions do not
+    hit Python's recursion limit.
+    """
+    return _semant(NESTED, expr, namespace, errors, types)
+
+# Subtrees that depend on more global bindings than this are not
+# memoized, which bounds the work of checking and merging bindings
+MEMO_MAX_BINDINGS = 16
+
+def _semant(view, expr, namespace, errors, types, memo=None):
+    """
+    The walk behind semant, over the nodes of either AST encoding. Each
+    stack entry holds a list node, its children, and the CompObjs of
+    the children visited so far.
+
+    With a memo, a parallel stack tracks for each entry the symbols
+    its subtree looked up and what they were bound to, and the number
+    of errors when it was entered. A pure subtree without errors is
+    memoized with its bindings, and reused while they still hold.
+    """
+    stack = [(expr, None, [])]
+    tracked = None if memo is None else [[{}, len(errors)]]
+    while True:
+        node, items, compObjs = stack[-1]
+        if items is None:
+            token = view.token(node)
+            if token is not None:
+                compObj = _semant_atom(token, namespace, errors)
+                if memo is not None and token.isSym():
+                    tracked[-1][0][token[1]] = compObj
+                items = ()
             else:
-                return compObj
+                items = view.children(node)
+                keyword = _special_keyword(view, node)
+                cached = (None if memo is None or keyword
+                          else _recall(memo, view.key(node), namespace))
+                if not items:
+                    compObj = _semant_empty(errors)
+                elif keyword:
+                    compObj = _semant_misplaced(view.token(items[0]),
+                                                errors)
+                    items = ()
+                elif cached is not None:
+                    compObj = cached[1]
+                    tracked[-1][0] = dict(cached[0])
+                    items = ()
+                else:
+                    stack[-1] = (node, items, compObjs)
+                    continue
+        elif len(compObjs) < len(items):
+            stack.append((items[len(compObjs)], None, []))
+            if memo is not None:
+                tracked.append([{}, len(errors)])
+            continue
         else:
-            return CompObj(expr[1], lambda: None)
-    # Handle case when expression is a list of expression
-    else:
-        compObjs = [semant(subExpr, namespace, errors)
-                    for subExpr in expr]
-        calleeCompObj = compObjs[0]
-        if (not calleeCompObj.isFunc()):
+            compObj = _semant_call(view, items, compObjs, namespace,
+                                   errors)
+            if memo is not None:
+                _memoize(memo, view.key(node), tracked[-1], compObjs[0],
+                         compObj, errors)
+        _record_type(types, view.key(node), compObj.lssType)
+        stack.pop()
+        if memo is not None:
+            bindings = tracked.pop()[0]
+            if stack:
+                _merge_bindings(tracked[-1], bindings)
+        if not stack:
+            return compObj
+        stack[-1][2].append(compObj)
+
+def _recall(memo, key, namespace):
+    """
+    Returns the memo entry of a node if its bindings still hold.
+    """
+    cached = memo.get(key)
+    if cached is not None and all(namespace.query(sym) is compObj
+                                  for sym, compObj in cached[0]):
+        return cached
+    return None
+
+def _memoize(memo, key, entry, calleeCompObj, compObj, errors):
+    bindings, numErrors = entry
+    if not calleeCompObj.isPureFunc():
+        entry[0] = None
+    elif bindings is not None and len(errors) == numErrors:
+        memo[key] = (tuple(bindings.items()), compObj)
+
+def _merge_bindings(entry, bindings):
+    if entry[0] is None:
+        return
+    if bindings is None:
+        entry[0] = None
+        return
+    entry[0].update(bindings)
+    if len(entry[0]) > MEMO_MAX_BINDINGS:
+        entry[0] = None
+
+def _first_token(view, expr):
+    token = view.token(expr)
+    while token is None:
+        expr = view.children(expr)[0]
+        token = view.token(expr)
+    return token
+
+def _semant_atom(token, namespace, errors):
+    if token.isSym():
+        compObj = namespace.query(token[1]) 
+        if (not compObj):
             errors.append(SyntaxError(
-                "SemanticError: Symbol: \n"
-                + "\t {} \n".format(expr[0][1])
-                + "on line {} column {} must refer to a function".format(
-                        expr[0][3], expr[0][4])))
+                "SemanticError: Undefined symbol: \n"
+                + "\t {} \n".format(token[1])
+                + "seen on line {} column {}".format(token.lineNum,
+                                                     token.colNum)))
+            return DummyCompObj()
+        elif (not isinstance(compObj, FuncObj)
+                and namespace.is_redefined(token[1])):
+            # Its type depends on which definition a use runs after
             return DummyCompObj()
         else:
-            return calleeCompObj.semant(namespace, errors, compObjs[1:])
\ No newline at end of file
+            return compObj
+    else:
+        return CompObj(token[1], lambda: None, type_of_token(token[2]))
+
+def _semant_empty(errors):
+    # There is nothing to call in ()
+    errors.append(SyntaxError(
+        "SemanticError: Empty expression () must contain a function"))
+    return DummyCompObj()
+
+def _semant_misplaced(head, errors):
+    # Definitions are only allowed as top level forms
+    errors.append(SyntaxError(
+        "SemanticError: {} on line {} column {} ".format(
+                head[1], head.lineNum, head.colNum)
+        + "is not allowed here"))
+    return DummyCompObj()
+
+def _semant_call(view, items, compObjs, namespace, errors):
+    headExpr = items[0]
+    calleeCompObj = compObjs[0]
+    # Errors point at the first token of the callee expression. Found
+    # only when needed, since a callee made of empty lists has none.
+    if (not calleeCompObj.isFunc()):
+        head = _first_token(view, headExpr)
+        errors.append(SyntaxError(
+            "SemanticError: Symbol: \n"
+            + "\t {} \n".format(head[1])
+            + "on line {} column {} must refer to a function".format(
+                    head.lineNum, head.colNum)))
+        return DummyCompObj()
+    if not calleeCompObj.acceptsArity(len(compObjs) - 1):
+        head = _first_token(view, headExpr)
+        errors.append(SyntaxError(
+            "SemanticError: Function: \n"
+            + "\t {} \n".format(calleeCompObj.name)
+            + "on line {} column {} expects {} arguments, got {}".format(
+                    head.lineNum, head.colNum, calleeCompObj.numArgs,
+                    len(compObjs) - 1)))
+        return DummyCompObj()
+    for index in getattr(calleeCompObj, "pureArgs", ()):
+        if not _is_pure_func(view.token(items[index + 1]), namespace):
+            head = _first_token(view, headExpr)
+            errors.append(SyntaxError(
+                "SemanticError: Function: \n"
+                + "\t {} \n".format(calleeCompObj.name)
+                + "on line {} column {} needs argument {} ".format(
+                        head.lineNum, head.colNum, index + 1)
+                + "to be a function without side effects"))
+            return DummyCompObj()
+    argTypes = [compObj.lssType for compObj in compObjs[1:]]
+    resultType = calleeCompObj.resultType(argTypes)
+    if resultType is None:
+        head = _first_token(view, headExpr)
+        errors.append(SyntaxError(
+            "SemanticError: Function: \n"
+            + "\t {} \n".format(calleeCompObj.name)
+            + "on line {} column {} cannot be applied to ".format(
+                    head.lineNum, head.colNum)
+            + "arguments of type ({})".format(
+                    ", ".join(str(t) for t in argTypes))))
+        return DummyCompObj()
+    compObj = calleeCompObj.semant(namespace, errors, compObjs[1:])
+    head = view.token(headExpr)
+    if _is_sym(head) and namespace.is_redefined(head[1]):
+        # Another definition of the callee may return another type
+        return DummyCompObj()
+    if compObj.lssType is LssType.ANY:
+        compObj.lssType = resultType
+    return compObj
@@ -0,0 +1,144 @@
+import unittest as ut
+from io import StringIO
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_analyzer.lss_analyzer import analyze
+from lss_env.comp_obj import globalEnv
+from lss_env.lss_type import LssType
+
+def _analyze(code):
+    tokens = lex(StringIO(code))[0]
+    ast = parse(tokens)[0]
+    types = {}
+    errors = analyze(ast, types)[1]
+    return ([types[id(expr)] for expr in ast], errors)
+
+def _text(expr):
+    if isinstance(expr, list):
+        return [_text(child) for child in expr]
+    return expr.tokenStr
+
+class TestTypeInference(ut.TestCase):
+    def test_constants(self):
+        types, errors = _analyze("(+ 1 2) (+ 1.5 2) (append \"a\" \"b\")")
+        self.assertEqual(errors, [])
+        self.assertListEqual(types, [LssType.INT, LssType.FLOAT,
+                                     LssType.STR])
+
+    def test_nested(self):
+        types, errors = _analyze("(+ (* 9 (+ 2.56 3)) (- 10 5))")
+        self.assertEqual(errors, [])
+        self.assertListEqual(types, [LssType.FLOAT])
+
+    def test_division_is_float(self):
+        types = _analyze("(/ 4 2)")[0]
+        self.assertListEqual(types, [LssType.FLOAT])
+
+    def test_lists(self):
+        types, errors = _analyze("(cons 1 nil) (length (cons 1 nil))"
+                                 + " (first (cons 1 nil))")
+        self.assertEqual(errors, [])
+        self.assertListEqual(types, [LssType.LIST, LssType.INT,
+                                     LssType.ANY])
+
+    def test_unknown_is_compatible(self):
+        types, errors = _analyze("(+ (first (cons 1 nil)) 2)")
+        self.assertEqual(errors, [])
+        self.assertListEqual(types, [LssType.ANY])
+
+    def test_type_error(self):
+        errors = _analyze("(+ 1 \"a\")")[1]
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(str(errors[0]),
+                         "SemanticError: Function: \n"
+                         + "\t + \n"
+                         + "on line 1 column 2 cannot be applied to "
+                         + "arguments of type (int, string)")
+
+    def test_bool_is_not_a_number(self):
+        errors = _analyze("(* true 2)")[1]
+        self.assertEqual(len(errors), 1)
+
+    def test_arity(self):
+        errors = _analyze("(+ 1 2 3) (print)"
+                          + " (defun f (x) (require true) x (ensure true))"
+                          + " (f 1 2)")[1]
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(str(errors[0]),
+                         "SemanticError: Function: \n"
+                         + "\t + \n"
+                         + "on line 1 column 2 expects 2 arguments, got 3")
+
+    def test_sequences(self):
+        types, errors = _analyze(
+            "(take 3 (filter (map (range 0 10) nil)))"
+            + " (reduce + 0 (take 3 (map (range 0 10) (range 1 5))))")
+        self.assertEqual(len(errors), 3)
+        types, errors = _analyze(
+            "(map first (zip (range 0 10) (vec nil)))"
+            + " (reduce + 0 (take 3 (range 0 10)))"
+            + " (vec (filter first (cons nil nil)))")
+        self.assertEqual(errors, [])
+        self.assertListEqual(types, [LssType.SEQ, LssType.ANY,
+                                     LssType.VECTOR])
+
+class TestSpecialize(ut.TestCase):
+    def test_proven_types(self):
+        plus = globalEnv["+"]
+        self.assertIsNotNone(plus.specialize([LssType.INT, LssType.INT]))
+        self.assertIsNone(plus.specialize([LssType.INT, LssType.ANY]))
+
+    def test_runtime_check(self):
+        with self.assertRaises(TypeError):
+            globalEnv["+"].value(True, 1)
+
+class TestHashCons(ut.TestCase):
+    CODE = ("(def x 2.5)\n"
+            "(defun f (x) (require true) (* 9 (+ x 3)) (ensure true))\n"
+            "(+ (* 9 (+ x 3)) (* 9 (+ x 3)))\n"
+            "(f (* 9 (+ x 3)))\n")
+
+    def test_sharing(self):
+        ast = parse(lex(StringIO(self.CODE))[0], hashCons=True)[0]
+        forms = ast.forms
+        self.assertIs(forms[2][1], forms[2][2])
+        self.assertIs(forms[2][1], forms[3][1])
+        self.assertIs(forms[0][1], forms[2][1][2][1])
+        plain = parse(lex(StringIO(self.CODE))[0])[0]
+        self.assertEqual(_text(forms), _text(plain))
+        # Tokens are equal only at the same position
+        self.assertListEqual(ast.unshare(), plain)
+
+    def test_memoize_matches(self):
+        code = self.CODE + "(f 1 2) (undefined (* 9 (+ x 3)))"
+        ast = parse(lex(StringIO(code))[0], hashCons=True)[0]
+        plainTypes = {}
+        plainErrors = analyze(ast, plainTypes)[1]
+        memoTypes = {}
+        memoErrors = analyze(ast, memoTypes, memoize=True)[1]
+        self.assertEqual(len(memoErrors), 2)
+        self.assertListEqual([str(e) for e in memoErrors],
+                             [str(e) for e in plainErrors])
+        self.assertDictEqual(memoTypes, plainTypes)
+
+    def test_positions(self):
+        code = "(foo 1)\n(+ 1 2)\n\n\n(foo 1)\n(f (* 9 (+ x true)))\n"
+        for memoize in (False, True):
+            plain = analyze(parse(lex(StringIO(code))[0])[0])[1]
+            shared = analyze(parse(lex(StringIO(code))[0], hashCons=True)[0],
+                             memoize=memoize)[1]
+            self.assertEqual(len(shared), 5)
+            self.assertListEqual([str(e) for e in shared],
+                                 [str(e) for e in plain])
+        self.assertIn("line 5 column 4", str(shared[1]))
+
+    def test_shared_types_join(self):
+        ast = parse(lex(StringIO(self.CODE))[0], hashCons=True)[0]
+        types = {}
+        analyze(ast, types)
+        # (+ x 3) is a float at the top level but unknown inside f
+        self.assertIs(types[id(ast.forms[2][1][2])], LssType.ANY)
+        types = {}
+        ast = parse(lex(StringIO(self.CODE))[0])[0]
+        analyze(ast, types)
+        self.assertIs(types[id(ast[2][1][2])], LssType.FLOAT)
@@ -0,0 +1,65 @@
+from typing import Callable, Iterator, List, Optional, TextIO, Tuple, TypeVar
+from lss_lexer.lss_token import Token
+from lss_lexer.lss_lexer import lex_stream
+from lss_parser.lss_parser import parse_stream
+from lss_analyzer.lss_analyzer import semant_form
+from lss_analyzer.tree_shake import definition_name
+from lss_env.namespace import NameSpace
+from lss_env.comp_obj import globalEnv
+
+Expr = TypeVar("Expr", Token, List["Expr"])
+
+def analyze_stream(stream: TextIO, namespace: Optional[NameSpace] = None,
+                   modules: Optional[Callable] = None
+                   ) -> Iterator[Tuple[Optional[Expr], List[SyntaxError]]]:
+    """
+    Lexes, parses and analyzes a program one top level expression at a
+    time. Lines are read from the stream only as they are needed, each
+    expression is analyzed as soon as its closing ")" is read, and its
+    errors are yielded before the rest of the program is read.
+
+    Only the lines and the expression in progress are held in memory,
+    besides the global definitions. An expression that is not kept by
+    the caller is freed once the next one is analyzed.
+
+    Args:
+        stream (io.TextIOBase): The text stream to read from.
+        namespace (NameSpace): The global namespace to analyze in, as
+            returned by analyze, which is updated by every definition.
+            A new one is made if none is given.
+        modules (Callable): Resolves import forms, as for analyze.
+            Without it, imports are errors.
+
+    Returns:
+        An iterator of tuples (expr, errors), one for each top level
+        expression, with the lexing, parsing and semantic errors found
+        since the previous one. Expr is None for errors after the last
+        expression. Together these are the errors analyze finds after
+        lex and parse, although not in the same order, with one
+        exception: a symbol is only known to be defined more than once
+        from its second definition on, so calls to it in the forms
+        before that count as pure if the first definition is.
+    """
+    if namespace is None:
+        namespace = NameSpace("global", dict(globalEnv), [], None)
+    lexErrors = []
+    defined = set()
+
+    def tokens():
+        for lineTokens, lineErrors in lex_stream(stream):
+            lexErrors.extend(lineErrors)
+            yield from lineTokens
+
+    for expr, parseErrors in parse_stream(tokens()):
+        errors = lexErrors + parseErrors
+        lexErrors.clear()
+        if expr is not None:
+            sym = definition_name(expr)
+            if sym in defined:
+                namespace.redefined.add(sym)
+            elif sym is not None:
+                defined.add(sym)
+            semant_form(expr, namespace, errors, modules=modules)
+        yield (expr, errors)
+    if lexErrors:
+        yield (None, list(lexErrors))
@@ -0,0 +1,101 @@
+import unittest as ut
+from io import StringIO
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_analyzer.lss_analyzer import analyze
+from lss_analyzer.pipeline import analyze_stream
+from lss_env.comp_obj import CompObj, globalEnv
+from lss_env.lss_type import LssType
+from lss_env.namespace import NameSpace
+
+CODE = ("(def one 1)\n"
+        "(defun inc (x) (require (> x 0))\n"
+        "  (+ x one)\n"
+        "  (ensure (> result x)))\n"
+        "(inc \"two\") ) (undefined 1)\n"
+        "(print \"unclosed\n"
+        "  1)\n"
+        "(inc (inc 1)) (inc 1 2)\n"
+        "(append \"a\"")
+
+class _Lines():
+    """
+    A stream that counts the lines read from it.
+    """
+
+    def __init__(self, text):
+        self.lines = text.splitlines(True)
+        self.read = 0
+
+    def __iter__(self):
+        for line in self.lines:
+            self.read += 1
+            yield line
+
+def _text(expr):
+    if isinstance(expr, list):
+        return [_text(child) for child in expr]
+    return (expr.tokenStr, expr.lineNum, expr.colNum)
+
+def _batch(code):
+    tokens, lexErrors = lex(StringIO(code))
+    ast, parseErrors = parse(tokens)
+    namespace, errors = analyze(ast)
+    return (ast, lexErrors + parseErrors + errors, namespace)
+
+class TestAnalyzeStream(ut.TestCase):
+    def test_matches_batch(self):
+        ast, errors, namespace = _batch(CODE)
+        streamNamespace = NameSpace("global", dict(globalEnv), [], None)
+        results = list(analyze_stream(StringIO(CODE), streamNamespace))
+        exprs = [expr for expr, _ in results if expr is not None]
+        self.assertEqual(_text(exprs), _text(ast))
+        self.assertEqual(len(errors), 6)
+        self.assertCountEqual([str(error) for _, exprErrors in results
+                               for error in exprErrors],
+                              [str(error) for error in errors])
+        self.assertEqual(streamNamespace.env.keys(), namespace.env.keys())
+
+    def test_errors_by_form(self):
+        results = list(analyze_stream(StringIO(CODE)))
+        self.assertListEqual([len(errors) for _, errors in results],
+                             [0, 0, 0, 2, 1, 0, 1, 2])
+        self.assertIn("Unmatched", str(results[3][1][0]))
+        self.assertIn("quotation", str(results[4][1][0]))
+        results = list(analyze_stream(StringIO("(+ 1 2) )")))
+        self.assertEqual(results[0][1], [])
+        self.assertIsNone(results[1][0])
+        self.assertIn("Unmatched", str(results[1][1][0]))
+
+    def test_lazy(self):
+        stream = _Lines("(def one 1)\n(undefined one)\n" + "(+ one 1)\n" * 100)
+        results = analyze_stream(stream)
+        self.assertListEqual(next(results)[1], [])
+        self.assertEqual(len(next(results)[1]), 1)
+        self.assertEqual(stream.read, 2)
+        self.assertEqual(len(list(results)), 100)
+
+    def test_positions(self):
+        code = "(+ 1\n   (undefined 2))"
+        streamErrors = next(analyze_stream(StringIO(code)))[1]
+        self.assertEqual(str(streamErrors[0]), str(_batch(code)[1][0]))
+        self.assertIn("line 2", str(streamErrors[0]))
+
+    def test_imports(self):
+        code = "(import \"lib.lss\") (+ two 1) (import \"missing.lss\")"
+
+        def modules(path):
+            if path == "lib.lss":
+                return ({"two": CompObj(None, None, LssType.INT)}, [])
+            return (None, [])
+
+        results = list(analyze_stream(StringIO(code), modules=modules))
+        self.assertListEqual([len(errors) for _, errors in results],
+                             [0, 0, 1])
+        self.assertIn("Could not import", str(results[2][1][0]))
+        results = list(analyze_stream(StringIO(code)))
+        self.assertListEqual([len(errors) for _, errors in results],
+                             [1, 1, 1])
+
+if __name__ == "__main__":
+    ut.main()
@@ -0,0 +1,311 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Hashable, List, Set
+from lss_env.namespace import NameSpace
+from lss_env.comp_obj import CompObj, FuncObj, globalEnv
+from lss_analyzer.lss_analyzer import semant_form
+
+class _Form():
+    """
+    What the session knows about one top level form: where it is in
+    the program, the result of its last analysis, and the global
+    symbols it defined and read during it.
+    """
+
+    def __init__(self, key, seq, expr):
+        self.key = key
+        self.seq = seq
+        self.expr = expr
+        self.defines: Dict[str, CompObj] = {}
+        self.reads: Set[str] = set()
+        self.errors: List[SyntaxError] = []
+        self.types: Dict = {}
+        self.children: List[NameSpace] = []
+
+class _FormEnv():
+    """
+    The global environment as seen by a form while it is analyzed: the
+    builtins, overridden by the definitions of the forms before it and
+    then by its own. Symbols that are looked up outside the form's own
+    definitions are recorded as its reads.
+    """
+
+    def __init__(self, session, form):
+        self.session = session
+        self.form = form
+
+    def __contains__(self, sym):
+        return self[sym] is not None
+
+    def __getitem__(self, sym):
+        if sym in self.form.defines:
+            return self.form.defines[sym]
+        self.form.reads.add(sym)
+        return self.session._visible(sym, self.form.seq)
+
+    def __setitem__(self, sym, compObj):
+        self.form.defines[sym] = compObj
+
+class _Redefined():
+    """
+    The symbols that the program defines more than once, as seen by a
+    form while it is analyzed. The form counts as a definer of what it
+    has bound so far, which for a defun includes its own name before
+    its body is analyzed.
+    """
+
+    def __init__(self, session, form):
+        self.session = session
+        self.form = form
+
+    def __contains__(self, sym):
+        others = [seq for seq in self.session._definers.get(sym, ())
+                  if seq != self.form.seq]
+        return len(others) + (sym in self.form.defines) > 1
+
+class AnalysisSession():
+    """
+    The AnalysisSession class analyzes a program that is edited one top
+    level form at a time, such as the input of a long lived REPL.
+
+    Forms are identified by a key chosen by the caller and keep the
+    position where they were first added. The result is always the same
+    as analyzing all the forms in order with analyze, but each update
+    only re-analyzes the changed form and the later forms that read a
+    global symbol whose definition changed as a result. Everything else
+    keeps its cached errors and types.
+
+    The global namespace after the last form, as analyze would return
+    it, is available as the namespace property.
+    """
+
+    def __init__(self):
+        self._namespace = NameSpace("global", dict(globalEnv), [], None)
+        self._forms: Dict[Hashable, _Form] = {}
+        self._bySeq: Dict[int, _Form] = {}
+        self._nextSeq = 0
+        # The positions of the forms that define each symbol, sorted
+        self._definers: Dict[str, List[int]] = {}
+        # The keys of the forms that read each symbol
+        self._readers: Dict[str, Set[Hashable]] = {}
+        self._childrenStale = False
+
+    def __contains__(self, key):
+        return key in self._forms
+
+    def keys(self) -> List[Hashable]:
+        """
+        Returns the keys of the forms in program order.
+        """
+        return [self._bySeq[seq].key for seq in sorted(self._bySeq)]
+
+    def set_form(self, key: Hashable, expr) -> List[Hashable]:
+        """
+        Adds a form at the end of the program, or replaces the form
+        with the same key in place, and brings the analysis up to date.
+
+        Args:
+            key (Hashable): Identifies the form in later updates.
+            expr (Expr): The form, as an element of the output of
+                lss_parser.parse.
+
+        Returns:
+            The keys of the forms that were analyzed, in program order.
+        """
+        form = self._forms.get(key)
+        if form is None:
+            form = _Form(key, self._nextSeq, expr)
+            self._nextSeq += 1
+            self._forms[key] = form
+            self._bySeq[form.seq] = form
+            old = {}
+        else:
+            form.expr = expr
+            old = self._forget(form)
+        self._analyze(form)
+        changed = self._changed(old, form.defines)
+        return [key] + self._propagate(form.seq, changed,
+                                       self._recounted(old, form.defines))
+
+    def remove_form(self, key: Hashable) -> List[Hashable]:
+        """
+        Removes a form from the program.
+
+        Returns:
+            The keys of the forms that were analyzed again because they
+            read a symbol the form defined, in program order.
+        """
+        form = self._forms.pop(key)
+        del self._bySeq[form.seq]
+        old = self._forget(form)
+        self._childrenStale = True
+        return self._propagate(form.seq, set(old), self._recounted(old, {}))
+
+    def errors(self, key: Hashable = None) -> List[SyntaxError]:
+        """
+        Returns the errors of one form, or of all forms in program
+        order if no key is given.
+        """
+        if key is not None:
+            return list(self._forms[key].errors)
+        return [error for seq in sorted(self._bySeq)
+                for error in self._bySeq[seq].errors]
+
+    def types(self, key: Hashable) -> Dict:
+        """
+        Returns the types inferred for the nodes of a form, keyed by
+        the id of the node as with analyze.
+        """
+        return self._forms[key].types
+
+    @property
+    def namespace(self) -> NameSpace:
+        """
+        The global namespace, with the function namespaces of the defun
+        forms as its children in program order.
+        """
+        if self._childrenStale:
+            self._namespace.children = []
+            for seq in sorted(self._bySeq):
+                for child in self._bySeq[seq].children:
+                    self._namespace.add_child(child)
+            self._childrenStale = False
+        return self._namespace
+
+    def _analyze(self, form: _Form):
+        form.defines = {}
+        form.reads = set()
+        form.errors = []
+        form.types = {}
+        formNamespace = NameSpace("global", _FormEnv(self, form), [], None,
+                                  _Redefined(self, form))
+        semant_form(form.expr, formNamespace, form.errors, form.types)
+        form.children = formNamespace.children
+        self._childrenStale = True
+
+        for sym in form.reads:
+            self._readers.setdefault(sym, set()).add(form.key)
+        for sym in form.defines:
+            insort(self._definers.setdefault(sym, []), form.seq)
+            self._publish(sym)
+
+    def _forget(self, form: _Form) -> Dict[str, CompObj]:
+        """
+        Removes the reads and definitions of a form from the indexes,
+        and returns what it defined.
+        """
+        for sym in form.reads:
+            readers = self._readers[sym]
+            readers.discard(form.key)
+            if not readers:
+                del self._readers[sym]
+        for sym in form.defines:
+            definers = self._definers[sym]
+            definers.remove(form.seq)
+            if not definers:
+                del self._definers[sym]
+            self._publish(sym)
+        return form.defines
+
+    def _propagate(self, seq: int, changed: Set[str],
+                   recounted: Set[str] = frozenset()) -> List[Hashable]:
+        """
+        Re-analyzes, in program order, the forms after position seq
+        that read a changed symbol, and then the forms that read the
+        symbols whose definitions changed because of that, and so on.
+
+        Whether a symbol is defined more than once decides whether
+        calls to it can be pure, so for the symbols in recounted every
+        other form that reads or defines them is analyzed again,
+        wherever it is.
+        """
+        queue = []
+        queued = set()
+        self._enqueue(queue, queued, seq, changed)
+        for sym in recounted:
+            others = set(self._definers.get(sym, ()))
+            others.update(self._forms[key].seq
+                          for key in self._readers.get(sym, ()))
+            others.discard(seq)
+            for other in others - queued:
+                queued.add(other)
+                heapq.heappush(queue, other)
+        analyzed = []
+        while queue:
+            form = self._bySeq[heapq.heappop(queue)]
+            old = dict(form.defines)
+            self._forget(form)
+            self._analyze(form)
+            analyzed.append(form.key)
+            self._enqueue(queue, queued, form.seq,
+                          self._changed(old, form.defines))
+        return analyzed
+
+    def _recounted(self, old: Dict[str, CompObj],
+                   new: Dict[str, CompObj]) -> Set[str]:
+        """
+        Returns the symbols that a form defined in old and now defines
+        in new whose definition count crossed from one to more than
+        one, or back.
+        """
+        recounted = set()
+        for sym in old.keys() | new.keys():
+            after = len(self._definers.get(sym, ()))
+            before = after - (sym in new) + (sym in old)
+            if (before > 1) != (after > 1):
+                recounted.add(sym)
+        return recounted
+
+    def _enqueue(self, queue, queued, seq, changed):
+        for sym in changed:
+            # Readers after the next definition of sym do not see it
+            definers = self._definers.get(sym, [])
+            index = bisect_right(definers, seq)
+            end = definers[index] if index < len(definers) else self._nextSeq
+            for key in self._readers.get(sym, ()):
+                reader = self._forms[key]
+                if seq < reader.seq <= end and reader.seq not in queued:
+                    queued.add(reader.seq)
+                    heapq.heappush(queue, reader.seq)
+
+    def _visible(self, sym: str, seq: int):
+        """
+        Returns what sym is bound to just before position seq, or None.
+        """
+        definers = self._definers.get(sym)
+        if definers:
+            index = bisect_left(definers, seq)
+            if index:
+                return self._bySeq[definers[index - 1]].defines[sym]
+        return globalEnv.get(sym)
+
+    def _publish(self, sym: str):
+        """
+        Updates the binding of sym in the global namespace to that of
+        its last definition.
+        """
+        compObj = self._visible(sym, self._nextSeq)
+        if compObj is None:
+            self._namespace.env.pop(sym, None)
+        else:
+            self._namespace.env[sym] = compObj
+
+    @staticmethod
+    def _changed(old: Dict[str, CompObj], new: Dict[str, CompObj]):
+        """
+        Returns the symbols whose definition differs between old and
+        new in anything another form could observe during analysis.
+        """
+        return {sym for sym in old.keys() | new.keys()
+                if sym not in old or sym not in new
+                or _interface(old[sym]) != _interface(new[sym])}
+
+def _interface(compObj: CompObj):
+    """
+    Returns everything semant reads from a CompObj bound to a global.
+    Forms that read a symbol only need to be analyzed again when this
+    changes.
+    """
+    if isinstance(compObj, FuncObj):
+        return (FuncObj, compObj.numArgs, compObj.signatures, compObj.pure)
+    return (type(compObj), compObj.isFunc(), compObj.lssType)
@@ -0,0 +1,146 @@
+import random
+import unittest as ut
+from io import StringIO
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_analyzer.lss_analyzer import analyze
+from lss_analyzer.session import AnalysisSession
+from lss_env.lss_type import LssType
+
+def _form(code):
+    return parse(lex(StringIO(code))[0])[0][0]
+
+def _messages(errors):
+    return [str(error) for error in errors]
+
+class TestSession(ut.TestCase):
+    def setUp(self):
+        self.session = AnalysisSession()
+        self.forms = {}
+
+    def set(self, key, code):
+        self.forms[key] = _form(code)
+        analyzed = self.session.set_form(key, self.forms[key])
+        self.assertMatchesAnalyze()
+        return analyzed
+
+    def remove(self, key):
+        del self.forms[key]
+        analyzed = self.session.remove_form(key)
+        self.assertMatchesAnalyze()
+        return analyzed
+
+    def assertMatchesAnalyze(self):
+        ast = [self.forms[key] for key in self.session.keys()]
+        types = {}
+        namespace, errors = analyze(ast, types)
+        sessionTypes = {}
+        for key in self.session.keys():
+            sessionTypes.update(self.session.types(key))
+        self.assertDictEqual(sessionTypes, types)
+        self.assertListEqual(_messages(self.session.errors()),
+                             _messages(errors))
+        self.assertSetEqual(set(self.session.namespace.env),
+                            set(namespace.env))
+        self.assertEqual(len(self.session.namespace.children),
+                         len(namespace.children))
+
+    def test_append(self):
+        self.assertListEqual(self.set(0, "(def x 1)"), [0])
+        self.assertListEqual(self.set(1, "(+ x 1)"), [1])
+        self.assertListEqual(self.session.errors(), [])
+
+    def test_only_dependents(self):
+        self.set("x", "(def x 1)")
+        self.set("y", "(def y 2)")
+        self.set("f", "(defun f (a) (require true) (+ a x) (ensure true))")
+        self.set("fx", "(f 1)")
+        self.set("yy", "(+ y y)")
+        # Changing x's type changes f's signature, so (f 1) is rechecked
+        self.assertListEqual(self.set("x", "(def x 1.5)"),
+                             ["x", "f", "fx"])
+        self.assertEqual(len(self.session.errors()), 0)
+
+    def test_types_after_edit(self):
+        self.set("x", "(def x 1)")
+        self.set("y", "(def y (* x 2))")
+        self.set("use", "(+ (- y 1) 2)")
+        use = self.forms["use"]
+        self.assertIs(self.session.types("use")[id(use)], LssType.INT)
+        # set also checks every type against a fresh analyze
+        self.assertListEqual(self.set("x", "(def x 1.5)"),
+                             ["x", "y", "use"])
+        self.assertIs(self.session.types("use")[id(use)], LssType.FLOAT)
+        self.assertIs(self.session.types("use")[id(use[1])], LssType.FLOAT)
+
+    def test_unchanged_interface_stops(self):
+        self.set("x", "(def x 1)")
+        self.set("f", "(defun f (a) (require true) (+ a x) (ensure true))")
+        self.set("fx", "(f 1)")
+        self.assertListEqual(self.set("x", "(def x 2)"), ["x"])
+
+    def test_diagnostics_update(self):
+        self.set("x", "(def x \"a\")")
+        self.set("sum", "(+ x 1)")
+        self.assertEqual(len(self.session.errors("sum")), 1)
+        self.assertListEqual(self.set("x", "(def x 1)"), ["x", "sum"])
+        self.assertListEqual(self.session.errors("sum"), [])
+
+    def test_order_is_kept(self):
+        self.set("use", "(g 1)")
+        self.set("g", "(defun g (a) (require true) a (ensure true))")
+        # g is defined after its use, so the use stays an error
+        self.assertEqual(len(self.session.errors("use")), 1)
+        self.set("use", "(g 2)")
+        self.assertEqual(len(self.session.errors("use")), 1)
+
+    def test_redefinition(self):
+        self.set("x1", "(def x 1)")
+        self.set("x2", "(def x \"s\")")
+        self.set("use", "(+ x 1)")
+        self.assertListEqual(self.set("x1", "(def x 2.5)"), ["x1"])
+        self.assertListEqual(self.set("x2", "(def x 3)"), ["x2", "use"])
+
+    def test_redefined_callee(self):
+        self.set("h", "(defun h (x) (require true) (+ x 1) (ensure true))")
+        self.set("g", "(defun g (x) (require true) (h x) (ensure true))")
+        self.set("p", "(pmap g (range 0 12))")
+        self.assertListEqual(self.session.errors(), [])
+        # A second h makes the call in g impure, although g is before it
+        self.assertIn("g", self.set("h2", "(defun h (x) (require true)"
+                                          " (print x) (ensure true))"))
+        self.assertEqual(len(self.session.errors("p")), 1)
+        self.remove("h2")
+        self.assertListEqual(self.session.errors(), [])
+
+    def test_remove(self):
+        self.set("x", "(def x 1)")
+        self.set("use", "(+ x 1)")
+        self.set("other", "(+ 1 1)")
+        self.assertListEqual(self.remove("x"), ["use"])
+        self.assertEqual(len(self.session.errors()), 1)
+
+    def test_shadowed_builtin(self):
+        self.set("use", "(+ 1 2)")
+        self.set("plus", "(def + 1)")
+        self.set("after", "(+ 1 2)")
+        self.assertEqual(len(self.session.errors("after")), 1)
+        self.assertListEqual(self.remove("plus"), ["after"])
+
+    def test_random_edits(self):
+        rng = random.Random(0)
+        codes = ["(def a 1)", "(def a \"s\")", "(def b a)", "(def b 2.5)",
+                 "(defun f (x) (require true) (+ x a) (ensure true))",
+                 "(defun f (x) (require true) (append x b) (ensure true))",
+                 "(f 1)", "(f b)", "(+ a b)", "(print a)", "(g 1)",
+                 "(defun g (y) (require true) (f y) (ensure true))",
+                 "(def)", "(+ (def c 1) 2)"]
+        for _ in range(300):
+            key = rng.randrange(8)
+            if key in self.forms and rng.random() < 0.2:
+                self.remove(key)
+            else:
+                self.set(key, rng.choice(codes))
+
+if __name__ == "__main__":
+    ut.main()
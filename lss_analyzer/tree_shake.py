@@ -0,0 +1,119 @@
+from typing import Dict, List, NamedTuple, Set, Tuple, TypeVar
+from lss_lexer.lss_token import Token, TokenType
+
+Expr = TypeVar("Expr", Token, List["Expr"])
+
+class ShakeReport(NamedTuple):
+    """
+    The ShakeReport class summarizes what tree shaking removed.
+
+    Attributes:
+        formsRemoved (int): The number of top level def/defun forms
+            that were dropped.
+        tokensRemoved (int): The number of tokens in the dropped forms,
+            counting both parentheses of every list.
+    """
+    formsRemoved: int
+    tokensRemoved: int
+
+    def __str__(self):
+        return "Tree shaking removed {} forms ({} tokens)".format(
+                   self.formsRemoved, self.tokensRemoved)
+
+def shake(ast: List[Expr]) -> Tuple[List[Expr], ShakeReport]:
+    """
+    Removes the top level def and defun forms that cannot be reached
+    from the entry expressions of a program.
+
+    The entry expressions are all top level forms that are not
+    definitions. A definition is reachable if its symbol is referenced
+    by an entry expression or by the body of another reachable
+    definition. The relative order of the kept forms is unchanged.
+
+    Args:
+        ast (List[Expr]): The program, as output by lss_parser.parse.
+
+    Returns:
+        A tuple (ast, report) where ast is the list of kept top level
+        forms and report is a ShakeReport of what was removed.
+    """
+    definitions: Dict[str, List[int]] = {}
+    pending = []
+    for index, expr in enumerate(ast):
+        name = definition_name(expr)
+        if name is None:
+            pending.extend(references(expr))
+        else:
+            definitions.setdefault(name, []).append(index)
+
+    reachable: Set[str] = set()
+    while pending:
+        sym = pending.pop()
+        if sym in reachable or sym not in definitions:
+            continue
+        reachable.add(sym)
+        for index in definitions[sym]:
+            pending.extend(references(ast[index]))
+
+    kept = []
+    formsRemoved = 0
+    tokensRemoved = 0
+    for expr in ast:
+        name = definition_name(expr)
+        if name is None or name in reachable:
+            kept.append(expr)
+        else:
+            formsRemoved += 1
+            tokensRemoved += _count_tokens(expr)
+    return (kept, ShakeReport(formsRemoved, tokensRemoved))
+
+def definition_name(expr: Expr):
+    """
+    Returns the symbol defined by a well formed top level def or defun
+    form, or None if expr is not one.
+    """
+    if (isinstance(expr, list) and len(expr) >= 3
+            and isinstance(expr[0], Token) and isinstance(expr[1], Token)
+            and expr[0].isSym() and expr[0][1] in ("def", "defun")
+            and expr[1].isSym()):
+        return expr[1][1]
+    return None
+
+def references(expr: Expr) -> Set[str]:
+    """
+    Returns the symbols a form refers to. For definitions only the
+    body is searched, and the parameters of a defun are left out.
+    """
+    name = definition_name(expr)
+    if name is None:
+        body = [expr]
+        bound = set()
+    elif expr[0][1] == "defun" and isinstance(expr[2], list):
+        body = expr[3:]
+        bound = {param[1] for param in expr[2] if isinstance(param, Token)}
+    else:
+        body = expr[2:]
+        bound = set()
+
+    refs = set()
+    stack = list(body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Token):
+            if node[2] == TokenType.SYM and node[1] not in bound:
+                refs.add(node[1])
+        else:
+            stack.extend(node)
+    return refs
+
+def _count_tokens(expr: Expr) -> int:
+    count = 0
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Token):
+            count += 1
+        else:
+            count += 2
+            stack.extend(node)
+    return count
@@ -0,0 +1,46 @@
+import unittest as ut
+from io import StringIO
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_analyzer.tree_shake import shake, definition_name
+
+def _shake(code):
+    tokens = lex(StringIO(code))[0]
+    ast = parse(tokens)[0]
+    kept, report = shake(ast)
+    names = [definition_name(expr) for expr in kept]
+    return (names, report)
+
+PRELUDE = ("(def one 1)\n"
+           "(def two 2)\n"
+           "(defun inc (x) (require true) (+ x one) (ensure true))\n"
+           "(defun twice (x) (require true) (inc (inc x)) (ensure true))\n"
+           "(defun unused (x) (require true) (twice x) (ensure true))\n")
+
+class TestShake(ut.TestCase):
+    def test_no_definitions(self):
+        names, report = _shake("(+ 1 2) (+ 3 4)")
+        self.assertListEqual(names, [None, None])
+        self.assertEqual(report.formsRemoved, 0)
+        self.assertEqual(report.tokensRemoved, 0)
+
+    def test_nothing_used(self):
+        names, report = _shake(PRELUDE + "(+ 1 2)")
+        self.assertListEqual(names, [None])
+        self.assertEqual(report.formsRemoved, 5)
+
+    def test_transitive(self):
+        names = _shake(PRELUDE + "(twice 2)")[0]
+        self.assertListEqual(names, ["one", "inc", "twice", None])
+
+    def test_parameters_shadow(self):
+        code = ("(def x 1)\n"
+                "(defun id (x) (require true) x (ensure true))\n"
+                "(id 2)")
+        names = _shake(code)[0]
+        self.assertListEqual(names, ["id", None])
+
+    def test_token_count(self):
+        report = _shake("(def one 1) (+ 2 3)")[1]
+        self.assertEqual(report.formsRemoved, 1)
+        self.assertEqual(report.tokensRemoved, 5)
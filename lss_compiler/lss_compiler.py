@@ -0,0 +1,546 @@
+import ast
+import hashlib
+import importlib.util
+import logging
+import marshal
+import operator
+import os
+from collections import Counter
+from io import StringIO
+from types import CodeType
+from typing import Dict, List, NewType, Optional, Set, Tuple, TypeVar
+from lss_lexer.lss_token import Token
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_parser.shared_ast import SharedAst
+from lss_analyzer.lss_analyzer import analyze, special_form
+from lss_analyzer.tree_shake import definition_name, references
+from lss_analyzer.tree_shake import shake as shake_ast
+from lss_env.comp_obj import FuncObj, globalEnv
+from lss_env.lss_type import LssType
+
+# Type Aliases
+Symbol = NewType("Symbol", str)
+String = NewType("String", str)
+Number = TypeVar("Number", int, float)
+Boolean = NewType("Boolean", bool)
+Atom = TypeVar("Atom", Symbol, String, Number, Boolean)
+Expr = TypeVar("Expr", Atom, List["Expr"])
+
+# Names used by generated code. Every LSS symbol is mangled with a
+# "v_" prefix, so these can never collide with a user symbol.
+RESULTS_NAME = "_results"
+CONTRACT_ERROR_NAME = "_ContractError"
+CALLS_NAME = "_calls"
+IMPORT_NAME = "_import"
+RESULT_NAME = "_result"
+
+# Reports what tree shaking removed from each compiled program
+logger = logging.getLogger(__name__)
+
+class ContractError(Exception):
+    """
+    Raised by compiled code when a require or ensure condition of a
+    defun does not hold.
+    """
+
+_binOps = {
+    operator.add: ast.Add,
+    operator.sub: ast.Sub,
+    operator.mul: ast.Mult,
+    operator.truediv: ast.Div
+    }
+
+_compareOps = {
+    operator.lt: ast.Lt,
+    operator.gt: ast.Gt,
+    operator.eq: ast.Eq
+    }
+
+def mangle(sym: str) -> str:
+    """
+    Maps an LSS symbol to a valid Python identifier. Letters and digits
+    are kept and every other character is written as its code point, so
+    different symbols never map to the same identifier.
+    """
+    parts = ["v_"]
+    for char in sym:
+        if char.isascii() and char.isalnum():
+            parts.append(char)
+        else:
+            parts.append("_{:x}_".format(ord(char)))
+    return "".join(parts)
+
+def compile_program(ast_: List[Expr], types: Optional[Dict] = None,
+                    filename: str = "<lss>", countCalls: bool = False,
+                    cse: bool = False, namespace=None) -> CodeType:
+    """
+    Translates an analyzed program into a Python code object.
+
+    Args:
+        ast_ (List[Expr]): The program, as output by lss_parser.parse.
+            It should have been analyzed without errors. A SharedAst is
+            first unshared, so that every node is at its position.
+        types (Dict): Optionally, the types filled in by
+            lss_analyzer.analyze. Calls to builtins whose argument
+            types are proven there are emitted as plain Python
+            operators, without the runtime type checks.
+        filename (str): The file name recorded in the code object.
+        countCalls (bool): If true, every call to a defun increments
+            the count of its name in the Counter bound to _calls.
+        cse (bool): If true, a pure subexpression that is repeated
+            within a scope, either a top level form or a whole defun,
+            is evaluated once and its value reused.
+        namespace (NameSpace): Optionally, the global namespace from
+            analyze. With it, calls to pure defuns also count as pure
+            for cse, otherwise only calls to pure builtins do. It
+            should be given for programs with imports, since without
+            it any builtin may have been rebound by a module, and no
+            call to a builtin is specialized or shared.
+
+    Returns:
+        A code object that can be executed with run. Every top level
+        form that is not a definition appends its value to the list of
+        results. An import form calls the function bound to _import in
+        the env with the path string, which must bind the exports of
+        the module in the env.
+    """
+    types = types or {}
+    if isinstance(ast_, SharedAst):
+        # The copies are keyed by ids that only hold while they live
+        types = dict(types)
+        ast_ = ast_.unshare(types)
+    compiler = _Compiler(ast_, types, countCalls, cse, namespace)
+    module = ast.Module(body=[compiler.form(expr) for expr in ast_],
+                        type_ignores=[])
+    ast.fix_missing_locations(module)
+    return compile(module, filename, "exec")
+
+def make_env() -> Dict:
+    """
+    Returns a fresh globals dict for running compiled code, holding the
+    values of the builtins.
+    """
+    env = {mangle(sym): compObj.value for sym, compObj in globalEnv.items()}
+    env[CONTRACT_ERROR_NAME] = ContractError
+    env[CALLS_NAME] = Counter()
+    return env
+
+def run(code: CodeType, env: Optional[Dict] = None,
+        namespace=None) -> List:
+    """
+    Executes a compiled program.
+
+    Args:
+        code (CodeType): The output of compile_program.
+        env (Dict): The globals to run in, by default from make_env.
+            Reusing an env keeps the definitions of earlier programs.
+        namespace (NameSpace): Optionally, the global namespace the
+            program was analyzed in. The FuncObj of every defun in it
+            gets the compiled function as its value.
+
+    Returns:
+        The values of the top level forms that are not definitions.
+    """
+    if env is None:
+        env = make_env()
+    env[RESULTS_NAME] = []
+    exec(code, env)
+    if namespace is not None:
+        for sym, compObj in namespace.env.items():
+            if isinstance(compObj, FuncObj) and compObj.value is None:
+                compObj.value = env.get(mangle(sym))
+    return env[RESULTS_NAME]
+
+class CodeCache():
+    """
+    The CodeCache class caches compiled programs by a hash of their
+    source, in memory and optionally on disk. Code objects are stored
+    on disk with marshal, tagged with the interpreter's bytecode magic
+    number so that a cache written by another Python version is
+    ignored rather than loaded.
+    """
+
+    def __init__(self, cacheDir: Optional[str] = None):
+        self.cacheDir = cacheDir
+        self.codes = {}
+
+    def compile_source(self, source: str, filename: str = "<lss>",
+                       shake: bool = False) -> Tuple[Optional[CodeType],
+                                                     List[SyntaxError]]:
+        """
+        Lexes, parses, analyzes and compiles source, or returns the
+        cached code object if the same source was compiled before.
+
+        Args:
+            source (str): The program.
+            filename (str): The file name recorded in the code object.
+            shake (bool): If true, the def and defun forms that the
+                program cannot reach are dropped before analysis, so
+                they are neither checked nor run. The ShakeReport is
+                logged at INFO level.
+
+        Returns:
+            A tuple (code, errors). If there were errors, code is None
+            and nothing is cached.
+        """
+        key = hashlib.sha256("{}\0{}\0{}".format(
+                  filename, shake, source).encode()).hexdigest()
+        if key in self.codes:
+            return (self.codes[key], [])
+        code = self.load(key)
+        if code is None:
+            tokens, errors = lex(StringIO(source))
+            ast_, parseErrors = parse(tokens)
+            errors.extend(parseErrors)
+            if shake:
+                ast_, report = shake_ast(ast_)
+                logger.info("%s: %s", filename, report)
+            types = {}
+            semantErrors = analyze(ast_, types)[1]
+            errors.extend(semantErrors)
+            if errors:
+                return (None, errors)
+            code = compile_program(ast_, types, filename)
+            self.store(key, code)
+        self.codes[key] = code
+        return (code, [])
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cacheDir, key + ".lssc")
+
+    def load(self, key: str):
+        """
+        Returns the value stored on disk under key, or None if there is
+        none or it was written by another Python version.
+        """
+        if not self.cacheDir:
+            return None
+        try:
+            with open(self._path(key), "rb") as cacheFile:
+                if cacheFile.read(4) != importlib.util.MAGIC_NUMBER:
+                    return None
+                return marshal.load(cacheFile)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+    def store(self, key: str, value):
+        """
+        Stores a value that marshal can serialize, such as a code
+        object, on disk under key. Does nothing without a cacheDir.
+        """
+        if not self.cacheDir:
+            return
+        os.makedirs(self.cacheDir, exist_ok=True)
+        # Write then rename, so readers never see a partial file
+        tmpPath = self._path(key) + ".{}.tmp".format(os.getpid())
+        with open(tmpPath, "wb") as cacheFile:
+            cacheFile.write(importlib.util.MAGIC_NUMBER)
+            marshal.dump(value, cacheFile)
+        os.replace(tmpPath, self._path(key))
+
+class _Compiler():
+    """
+    Holds the state needed while translating one program.
+    """
+
+    def __init__(self, ast_, types, countCalls, cse, namespace):
+        self.types = types
+        self.countCalls = countCalls
+        # Builtins rebound by the program must not be specialized
+        self.userGlobals: Set[str] = set()
+        definitions = Counter()
+        hasImports = False
+        for expr in ast_:
+            keyword = special_form(expr)
+            if (keyword in ("def", "defun") and len(expr) > 1
+                    and isinstance(expr[1], Token)):
+                self.userGlobals.add(expr[1][1])
+                definitions[expr[1][1]] += 1
+            hasImports = hasImports or keyword == "import"
+        if hasImports:
+            # Imported symbols are globals bound outside the program
+            if namespace is None:
+                self.userGlobals.update(globalEnv)
+            else:
+                self.userGlobals.update(
+                    sym for sym, compObj in namespace.env.items()
+                    if globalEnv.get(sym) is not compObj)
+        self.cse = cse
+        # True while compiling a postcondition, where the symbol result
+        # is the return value rather than a global or a parameter
+        self.inEnsure = False
+        # Globals defined once, as a defun the analyzer found pure, or
+        # for pureValues also as a value that is not a function
+        self.pureGlobals: Set[str] = set()
+        self.pureValues: Set[str] = set()
+        if namespace is not None:
+            for sym, count in definitions.items():
+                compObj = namespace.env.get(sym)
+                if count != 1 or compObj is None:
+                    continue
+                if compObj.isPureFunc():
+                    self.pureGlobals.add(sym)
+                    self.pureValues.add(sym)
+                elif not compObj.isFunc():
+                    self.pureValues.add(sym)
+            self._drop_impure_reach(ast_)
+        # Structural keys of subtrees, as small ints
+        self.keys: Dict[tuple, int] = {}
+        # For the current scope: the key of every pure node, the keys
+        # that repeat, and the temporaries holding their values
+        self.nodeKeys: Dict[int, int] = {}
+        self.repeated: Set[int] = set()
+        self.temps: Dict[int, str] = {}
+
+    def _drop_impure_reach(self, ast_):
+        """
+        Removes from pureGlobals the defuns that refer to a global
+        which is not a pure value, directly or through other defuns.
+        The analyzer judged each defun against the definitions before
+        it, which a later definition of a callee may have replaced.
+        """
+        refs = {definition_name(expr): references(expr) for expr in ast_
+                if special_form(expr) == "defun"
+                and definition_name(expr) in self.pureGlobals}
+        changed = True
+        while changed:
+            changed = False
+            for sym in list(self.pureGlobals):
+                if any(ref in self.userGlobals and ref not in self.pureValues
+                       for ref in refs.get(sym, ())):
+                    self.pureGlobals.discard(sym)
+                    self.pureValues.discard(sym)
+                    changed = True
+
+    def form(self, expr) -> ast.stmt:
+        keyword = special_form(expr)
+        if keyword == "def":
+            self._scope([expr[2]], set())
+            stmt = ast.Assign(targets=[self._name(expr[1][1], ast.Store())],
+                              value=self.expr(expr[2], set()))
+        elif keyword == "defun":
+            stmt = self._defun(expr)
+        elif keyword == "import":
+            stmt = ast.Expr(ast.Call(func=ast.Name(IMPORT_NAME, ast.Load()),
+                                     args=[ast.Constant(expr[1][1])],
+                                     keywords=[]))
+        else:
+            self._scope([expr], set())
+            stmt = ast.Expr(ast.Call(
+                func=ast.Attribute(ast.Name(RESULTS_NAME, ast.Load()),
+                                   "append", ast.Load()),
+                args=[self.expr(expr, set())], keywords=[]))
+        return _at(stmt, _first_token(expr))
+
+    def _defun(self, expr) -> ast.FunctionDef:
+        name = expr[1][1]
+        params = {param[1] for param in expr[2]}
+        args = ast.arguments(posonlyargs=[],
+                             args=[ast.arg(mangle(param[1]))
+                                   for param in expr[2]],
+                             kwonlyargs=[], kw_defaults=[], defaults=[])
+        # The function is one scope, in which params are fixed. The
+        # symbol result means something else in the postcondition.
+        self._scope([expr[3][1]] + expr[4:-1] + [expr[-1][1]],
+                    params | {"result"})
+        body = [self._check(expr[3], params, "Precondition", name)]
+        if self.countCalls:
+            body.insert(0, _at(ast.AugAssign(
+                target=ast.Subscript(ast.Name(CALLS_NAME, ast.Load()),
+                                     ast.Constant(name), ast.Store()),
+                op=ast.Add(), value=ast.Constant(1)), expr[1]))
+        for bodyExpr in expr[4:-2]:
+            body.append(_at(ast.Expr(self.expr(bodyExpr, params)),
+                            _first_token(bodyExpr)))
+        # The value of the last body expression is the return value,
+        # visible to the postcondition as the symbol result
+        ensureLocals = params | {"result"}
+        body.append(_at(ast.Assign(
+                            targets=[ast.Name(RESULT_NAME, ast.Store())],
+                            value=self.expr(expr[-2], params)),
+                        _first_token(expr[-2])))
+        self.inEnsure = True
+        body.append(self._check(expr[-1], ensureLocals, "Postcondition",
+                                name))
+        self.inEnsure = False
+        body.append(ast.Return(ast.Name(RESULT_NAME, ast.Load())))
+        return ast.FunctionDef(name=mangle(name), args=args, body=body,
+                               decorator_list=[], returns=None)
+
+    def _check(self, contract, localNames, kind, name) -> ast.If:
+        token = _first_token(contract)
+        message = "{} of {} on line {} column {} failed".format(
+                      kind, name, token.lineNum, token.colNum)
+        fail = ast.Raise(exc=ast.Call(
+                             func=ast.Name(CONTRACT_ERROR_NAME, ast.Load()),
+                             args=[ast.Constant(message)], keywords=[]),
+                         cause=None)
+        test = ast.UnaryOp(ast.Not(), self.expr(contract[1], localNames))
+        return _at(ast.If(test=test, body=[fail], orelse=[]), token)
+
+    def _scope(self, exprs, localNames):
+        """
+        Starts a new cse scope made of exprs, evaluated in order, and
+        finds the pure subexpressions that repeat in it.
+        """
+        self.nodeKeys = {}
+        self.repeated = set()
+        self.temps = {}
+        if not self.cse:
+            return
+        # Key and check purity bottom up, from an explicit stack
+        pureNodes = {}
+        stack = [(expr, False) for expr in exprs
+                 if not isinstance(expr, Token)]
+        while stack:
+            node, visited = stack.pop()
+            if id(node) in pureNodes:
+                continue
+            if not visited:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node
+                             if not isinstance(child, Token))
+                continue
+            pure = bool(node) and self._pure_callee(node[0], localNames)
+            takesFuncs = self._func_params(node[0]) if pure else set()
+            childKeys = []
+            for index, child in enumerate(node):
+                if isinstance(child, Token):
+                    childKeys.append(self._key((child.tokenType,
+                                                child.tokenStr)))
+                    pure = pure and self._pure_atom(child, localNames)
+                else:
+                    childKeys.append(pureNodes[id(child)][0])
+                    pure = pure and pureNodes[id(child)][1]
+                # A function that is called must be a named pure one,
+                # whatever a local or an expression evaluates to
+                if index - 1 in takesFuncs:
+                    pure = pure and self._pure_callee(child, localNames)
+            pureNodes[id(node)] = (self._key(tuple(childKeys)), pure)
+
+        # Count the copies in evaluation order. A copy after the first
+        # is replaced as a whole, so what is inside it does not count.
+        counts = Counter()
+        stack = [expr for expr in reversed(exprs)
+                 if not isinstance(expr, Token)]
+        while stack:
+            node = stack.pop()
+            key, pure = pureNodes[id(node)]
+            if pure:
+                self.nodeKeys[id(node)] = key
+                counts[key] += 1
+                if counts[key] > 1:
+                    continue
+            stack.extend(child for child in reversed(node)
+                         if not isinstance(child, Token))
+        self.repeated = {key for key, count in counts.items() if count > 1}
+
+    def _key(self, key: tuple) -> int:
+        return self.keys.setdefault(key, len(self.keys))
+
+    def _pure_callee(self, head, localNames) -> bool:
+        if not isinstance(head, Token) or not head.isSym():
+            return False
+        sym = head.tokenVal
+        if sym in localNames:
+            return False
+        if sym in self.userGlobals:
+            return sym in self.pureGlobals
+        return sym in globalEnv and globalEnv[sym].isPureFunc()
+
+    def _func_params(self, head) -> Set[int]:
+        """
+        Returns the indexes of the arguments that a pure builtin may
+        call, which must then be pure as well.
+        """
+        if head.tokenVal in self.userGlobals:
+            return set()
+        return globalEnv[head.tokenVal].funcArgs()
+
+    def _pure_atom(self, token, localNames) -> bool:
+        """
+        Returns True if an atom can be part of a pure subexpression.
+        Globals are fixed within a scope and so are locals.
+        """
+        if not token.isSym():
+            return True
+        sym = token.tokenVal
+        if sym == "result":
+            # A global in the body but a local in the postcondition
+            return False
+        if sym in localNames:
+            return True
+        if sym in self.userGlobals:
+            return sym in self.pureValues
+        compObj = globalEnv.get(sym)
+        return compObj is not None and (not compObj.isFunc()
+                                        or compObj.isPureFunc())
+
+    def expr(self, expr, localNames) -> ast.expr:
+        if isinstance(expr, Token):
+            if self.inEnsure and expr[1] == "result" and expr.isSym():
+                node = ast.Name(RESULT_NAME, ast.Load())
+            elif expr.isSym():
+                node = self._name(expr[1], ast.Load())
+            else:
+                node = ast.Constant(expr[1])
+            return _at(node, expr)
+        key = self.nodeKeys.get(id(expr))
+        if key in self.repeated:
+            # The first copy stores its value, the others load it
+            if key in self.temps:
+                return _at(ast.Name(self.temps[key], ast.Load()),
+                           _first_token(expr))
+            self.temps[key] = "_cse{}".format(len(self.temps))
+            return _at(ast.NamedExpr(
+                           target=ast.Name(self.temps[key], ast.Store()),
+                           value=self._call(expr, localNames)),
+                       _first_token(expr))
+        return self._call(expr, localNames)
+
+    def _call(self, expr, localNames) -> ast.expr:
+        args = [self.expr(arg, localNames) for arg in expr[1:]]
+        node = self._specialized(expr, args, localNames)
+        if node is None:
+            node = ast.Call(func=self.expr(expr[0], localNames), args=args,
+                            keywords=[])
+        return _at(node, _first_token(expr))
+
+    def _specialized(self, expr, args, localNames) -> Optional[ast.expr]:
+        """
+        Returns a plain Python operator for a call to a builtin whose
+        argument types are proven, or None.
+        """
+        head = expr[0]
+        if (not isinstance(head, Token) or not head.isSym()
+                or head[1] in localNames or head[1] in self.userGlobals
+                or not isinstance(globalEnv.get(head[1]), FuncObj)):
+            return None
+        argTypes = [self.types.get(id(arg), LssType.ANY)
+                    for arg in expr[1:]]
+        op = globalEnv[head[1]].specialize(argTypes)
+        if op in _binOps:
+            return ast.BinOp(args[0], _binOps[op](), args[1])
+        if op in _compareOps:
+            return ast.Compare(args[0], [_compareOps[op]()], [args[1]])
+        return None
+
+    def _name(self, sym, ctx) -> ast.Name:
+        return ast.Name(mangle(sym), ctx)
+
+def _first_token(expr) -> Token:
+    while not isinstance(expr, Token):
+        expr = expr[0]
+    return expr
+
+def _at(node, token: Token):
+    """
+    Gives a generated node the source position of token, so that
+    tracebacks and profiles point back into the LSS program.
+    """
+    node.lineno = token.lineNum
+    node.end_lineno = token.lineNum
+    node.col_offset = max(0, token.colNum - len(token.tokenStr))
+    node.end_col_offset = token.colNum
+    return node
@@ -0,0 +1,234 @@
+import os
+import tempfile
+import unittest as ut
+from contextlib import redirect_stdout
+from io import StringIO
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_analyzer.lss_analyzer import analyze
+from lss_analyzer.pipeline import analyze_stream
+from lss_env.comp_obj import globalEnv
+from lss_env.namespace import NameSpace
+from lss_compiler.lss_compiler import (compile_program, run, mangle,
+                                       make_env, ContractError, CodeCache,
+                                       CALLS_NAME)
+
+def _run(code, useTypes=True, cse=False):
+    tokens = lex(StringIO(code))[0]
+    ast = parse(tokens)[0]
+    types = {}
+    namespace, errors = analyze(ast, types)
+    assert errors == [], errors
+    compiled = compile_program(ast, types if useTypes else None, cse=cse,
+                               namespace=namespace)
+    return (run(compiled, namespace=namespace), namespace)
+
+INC = ("(def one 1)\n"
+       "(defun inc (x) (require (> x 0)) (+ x one) (ensure (> result x)))\n")
+
+class TestCompile(ut.TestCase):
+    def test_arithmetic(self):
+        results = _run("(+ (* 9 (+ 2.56 3)) (- 10 5)) (/ 1 2)")[0]
+        self.assertAlmostEqual(results[0], 9 * (2.56 + 3) + 5)
+        self.assertEqual(results[1], 0.5)
+
+    def test_untyped_matches_typed(self):
+        code = "(+ (* 9 (+ 2.56 3)) (- 10 5)) (< 1 2) (= 2 2.0)"
+        self.assertListEqual(_run(code)[0], _run(code, False)[0])
+
+    def test_strings_and_lists(self):
+        results = _run("(append \"a\" (append \"b\" \"c\"))"
+                       + " (length (cons 1 (cons 2 nil)))")[0]
+        self.assertEqual(str(results[0]), "abc")
+        self.assertEqual(results[1], 2)
+
+    def test_defun(self):
+        results, namespace = _run(INC + "(inc 2) (inc (inc 2))")
+        self.assertListEqual(results, [3, 4])
+        self.assertEqual(namespace.query("inc").value(10), 11)
+
+    def test_precondition(self):
+        with self.assertRaises(ContractError):
+            _run(INC + "(inc 0)")
+
+    def test_postcondition(self):
+        code = "(defun dec (x) (require true) (- x 1) (ensure (> result x)))"
+        with self.assertRaises(ContractError):
+            _run(code + "(dec 1)")
+
+    def test_result_symbol(self):
+        # Only the postcondition sees the return value as result
+        code = ("(def result 5)\n"
+                + "(defun f (x) (require (> result 0)) (+ x result)"
+                + " (ensure (> result x)))\n"
+                + "(defun g (result) (require true) (* result 2)"
+                + " (ensure (= result 8)))\n"
+                + "(f 1) (g 4) result")
+        self.assertListEqual(_run(code)[0], [6, 8, 5])
+        with self.assertRaises(ContractError):
+            _run(code + " (g 3)")
+
+    def test_redefined_not_specialized(self):
+        with self.assertRaises(TypeError):
+            _run("(def x 1) (defun f () (require true) (* x 2)"
+                 + " (ensure true)) (def x \"ab\") (f)")
+        with self.assertRaises(TypeError):
+            _run("(defun g () (require true) 1 (ensure true))"
+                 + " (defun f () (require true) (* (g) 2) (ensure true))"
+                 + " (defun g () (require true) \"ab\" (ensure true)) (f)")
+
+    def test_odd_symbols(self):
+        code = ("(defun !@+..04 (a-b) (require true) (+ a-b a-b)"
+                + " (ensure true)) (!@+..04 2)")
+        self.assertListEqual(_run(code)[0], [4])
+
+    def test_sequences(self):
+        code = ("(defun sq (x) (require true) (* x x) (ensure true))"
+                + "(defun big (x) (require true) (> x 10) (ensure true))"
+                + "(reduce + 0"
+                + " (take 3 (filter big (map sq (range 0 1000000000)))))"
+                + " (vec (zip (range 0 5) (cons \"a\" nil)))")
+        results = _run(code)[0]
+        self.assertEqual(results[0], 16 + 25 + 36)
+        self.assertEqual(len(results[1]), 1)
+        self.assertListEqual(list(results[1].nth(0)), [0, "a"])
+
+    def test_mangle(self):
+        self.assertEqual(mangle("abc1"), "v_abc1")
+        self.assertNotEqual(mangle("a-b"), mangle("a_b"))
+
+class TestCse(ut.TestCase):
+    SQ = "(defun sq (x) (require true) (* x x) (ensure (> result -1)))\n"
+
+    def _calls(self, code):
+        ast = parse(lex(StringIO(code))[0])[0]
+        namespace, errors = analyze(ast, {})
+        assert errors == [], errors
+        env = make_env()
+        run(compile_program(ast, countCalls=True, cse=True,
+                            namespace=namespace), env)
+        return env[CALLS_NAME]
+
+    def test_same_results(self):
+        code = (self.SQ
+                + "(defun f (x y) (require (> (sq x) 0))"
+                + " (+ (sq x) (* (sq x) y))"
+                + " (ensure (= result (+ (sq x) (* (sq x) y)))))"
+                + "(+ (* 9 (+ 2.56 3)) (* 9 (+ 2.56 3))) (f 2 3)")
+        self.assertListEqual(_run(code, cse=True)[0], _run(code)[0])
+
+    def test_evaluated_once(self):
+        self.assertEqual(self._calls(self.SQ + "(+ (sq 3) (* 2 (sq 3)))")["sq"],
+                         1)
+        code = (self.SQ + "(defun f (x) (require (> (sq x) 0)) (sq x)"
+                + " (ensure (= result (sq x)))) (f 2) (f 3)")
+        self.assertEqual(self._calls(code)["sq"], 2)
+
+    def test_impure_kept(self):
+        code = ("(defun loud (x) (require true) (print x) (+ x 0)"
+                + " (ensure true))"
+                + "(+ (loud 1) (loud 1))")
+        ast = parse(lex(StringIO(code))[0])[0]
+        namespace, errors = analyze(ast, {})
+        env = make_env()
+        with redirect_stdout(StringIO()) as out:
+            run(compile_program(ast, cse=True, namespace=namespace), env)
+        self.assertEqual(out.getvalue(), "1\n1\n")
+        # Without the namespace, calls to defuns are never shared
+        ast = parse(lex(StringIO(self.SQ + "(+ (sq 3) (sq 3))"))[0])[0]
+        analyze(ast, {})
+        env = make_env()
+        run(compile_program(ast, countCalls=True, cse=True), env)
+        self.assertEqual(env[CALLS_NAME]["sq"], 2)
+
+    def test_function_arguments_kept(self):
+        code = ("(defun noisy (acc x) (require true) (print x) (+ acc x)"
+                + " (ensure true))\n"
+                + "(defun twice (fs) (require true)"
+                + " (cons (reduce (first fs) 0 (cons 7 nil))"
+                + " (cons (reduce (first fs) 0 (cons 7 nil)) nil))"
+                + " (ensure true))\n"
+                + "(twice (cons noisy nil))")
+        for cse in (False, True):
+            with redirect_stdout(StringIO()) as out:
+                _run(code, cse=cse)
+            self.assertEqual(out.getvalue(), "7\n7\n")
+
+    def test_redefined_callee_kept(self):
+        code = ("(defun h (x) (require true) (+ x 1) (ensure true))\n"
+                + "(defun g (x) (require true) (h x) (ensure true))\n"
+                + "(defun h (x) (require true) (print x) (+ x 1)"
+                + " (ensure true))\n"
+                + "(+ (g 1) (g 1))")
+        # Read one form at a time, g is analyzed as pure
+        namespace = NameSpace("global", dict(globalEnv), [], None)
+        for _ in analyze_stream(StringIO(code), namespace):
+            pass
+        self.assertTrue(namespace.env["g"].isPureFunc())
+        ast = parse(lex(StringIO(code))[0])[0]
+        with redirect_stdout(StringIO()) as out:
+            results = run(compile_program(ast, cse=True,
+                                          namespace=namespace))
+        self.assertEqual(out.getvalue(), "1\n1\n")
+        self.assertListEqual(results, [4])
+
+    def test_hash_consed_positions(self):
+        code = ("(defun f (x) (require (> x 0)) (* x 2) (ensure true))\n"
+                + "(defun g (x) (require (> x 0)) (* x 3) (ensure true))\n"
+                + "(f 2) (g 2) (g 0)")
+        messages = []
+        for hashCons in (False, True):
+            ast = parse(lex(StringIO(code))[0], hashCons=hashCons)[0]
+            types = {}
+            namespace, errors = analyze(ast, types, memoize=hashCons)
+            env = make_env()
+            with self.assertRaises(ContractError) as context:
+                run(compile_program(ast, types, cse=True,
+                                    namespace=namespace), env)
+            self.assertListEqual(env["_results"], [4, 6])
+            messages.append(str(context.exception))
+        self.assertEqual(messages[1], messages[0])
+        self.assertIn("line 2", messages[1])
+
+    def test_redefined_not_shared(self):
+        code = (self.SQ + "(+ (sq 3) (sq 3))"
+                + "(defun sq (x) (require true) (print x) (ensure true))")
+        self.assertEqual(self._calls(code)["sq"], 2)
+
+class TestCodeCache(ut.TestCase):
+    def test_memory(self):
+        cache = CodeCache()
+        code, errors = cache.compile_source("(+ 1 2)")
+        self.assertEqual(errors, [])
+        self.assertIs(cache.compile_source("(+ 1 2)")[0], code)
+        self.assertListEqual(run(code), [3])
+
+    def test_disk(self):
+        with tempfile.TemporaryDirectory() as cacheDir:
+            CodeCache(cacheDir).compile_source(INC + "(inc 1)")
+            self.assertEqual(len(os.listdir(cacheDir)), 1)
+            code, errors = CodeCache(cacheDir).compile_source(INC + "(inc 1)")
+            self.assertEqual(errors, [])
+            self.assertListEqual(run(code), [2])
+
+    def test_shake(self):
+        code = (INC + "(defun unused (x) (require true) (undefined x)"
+                + " (ensure true)) (inc 1)")
+        cache = CodeCache()
+        self.assertEqual(len(cache.compile_source(code)[1]), 1)
+        with self.assertLogs("lss_compiler.lss_compiler", "INFO") as logs:
+            compiled, errors = cache.compile_source(code, shake=True)
+        # The unreachable defun is neither analyzed nor run
+        self.assertEqual(errors, [])
+        self.assertIn("removed 1 forms (19 tokens)", logs.output[0])
+        env = make_env()
+        self.assertListEqual(run(compiled, env), [2])
+        self.assertIn(mangle("inc"), env)
+        self.assertNotIn(mangle("unused"), env)
+
+    def test_errors_not_cached(self):
+        cache = CodeCache()
+        code, errors = cache.compile_source("(undefined 1)")
+        self.assertIsNone(code)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(cache.codes, {})
@@ -0,0 +1,360 @@
+import hashlib
+import marshal
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from types import CodeType
+from typing import Dict, List, Optional, Tuple
+from lss_lexer.lss_token import Token, TokenType
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse, parse_stream
+from lss_analyzer.lss_analyzer import analyze, special_form
+from lss_analyzer.tree_shake import definition_name
+from lss_compiler.lss_compiler import (IMPORT_NAME, CodeCache,
+                                       compile_program, make_env, mangle, run)
+from lss_env.comp_obj import CompObj, DummyCompObj, FuncObj
+from lss_env.lss_type import LssType, Signature
+
+# What a module exports, in a form that marshal and pickle can store:
+# a sorted tuple of (symbol, description) pairs. A function is
+# described by ("function", name, numArgs, signatures, pure, pureArgs)
+# with the types as their strings, and any other value by
+# ("value", type).
+Interface = Tuple[Tuple[str, tuple], ...]
+
+class Module():
+    """
+    The Module class is an LSS source file loaded by a ModuleLoader.
+
+    Attributes:
+        path (str): The real path of the file.
+        source (str): Its contents, or None if it could not be read.
+        key (str): The hash of the source, which keys its cache entry.
+        imports (Dict[str, str]): The path of every imported module,
+            by the path string written in the import form.
+        interface (Interface): What the module exports, or None if it
+            has errors.
+        code (CodeType): The compiled module, or None if it has errors.
+        errors (List[SyntaxError]): The errors found in this file. Each
+            has the path as its filename.
+        env (Dict): The globals of the module once it has been run.
+        results (List): The values of its top level forms once it has
+            been run.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.source: Optional[str] = None
+        self.key = ""
+        self.imports: Dict[str, str] = {}
+        self.interface: Optional[Interface] = None
+        self.code: Optional[CodeType] = None
+        self.errors: List[SyntaxError] = []
+        self.env: Optional[Dict] = None
+        self.results: Optional[List] = None
+
+class ModuleLoader():
+    """
+    The ModuleLoader class loads LSS programs made of several files. A
+    file imports another with the form (import "path.lss"), where the
+    path is relative to the directory of the importing file. This binds
+    every def and defun of the imported module, as of its end, in the
+    global namespace of the importer.
+
+    Every module is loaded once per loader, so a process should share a
+    single loader. A module imported along several paths, such as both
+    sides of a diamond, is one Module: it is analyzed, compiled and run
+    once, and all importers see the same values.
+
+    With a cacheDir, compiled modules are stored on disk, keyed by the
+    hash of their source. An entry also records the interfaces of the
+    modules it imported, and is only used while those are unchanged.
+    Identical files share an entry, and the code taken from it is
+    given the path of the file it is loaded for.
+
+    Modules are compiled in waves: every module whose imports are done
+    is compiled in the next wave. With more than one process, the
+    modules of a wave are compiled in parallel.
+    """
+
+    def __init__(self, cacheDir: Optional[str] = None, processes: int = 1):
+        self.cache = CodeCache(cacheDir)
+        self.processes = processes
+        self.modules: Dict[str, Module] = {}
+
+    def load(self, path: str) -> Tuple[Optional[Module], List[SyntaxError]]:
+        """
+        Loads a module and everything it imports, without running it.
+
+        Returns:
+            A tuple (module, errors), where errors are those of every
+            module loaded for it. If there are any, module is None.
+        """
+        path = os.path.realpath(path)
+        if path not in self.modules:
+            self._compile(*self._discover(path))
+        module = self.modules[path]
+        errors = [error for dependency in self._closure(module)
+                  for error in dependency.errors]
+        return (None if errors else module, errors)
+
+    def execute(self, module: Module) -> Dict:
+        """
+        Runs a loaded module, after the modules it imports, unless it
+        has run before. Returns the globals of the module.
+        """
+        if module.env is None:
+            env = make_env()
+            env[IMPORT_NAME] = (lambda importPath:
+                                    self._bind(env, module, importPath))
+            module.results = run(module.code, env)
+            module.env = env
+        return module.env
+
+    def run_file(self, path: str) -> Tuple[Optional[List],
+                                           List[SyntaxError]]:
+        """
+        Loads and runs the program in a file.
+
+        Returns:
+            A tuple (results, errors), where results are the values of
+            the top level forms of the file, or None if there were
+            errors.
+        """
+        module, errors = self.load(path)
+        if module is None:
+            return (None, errors)
+        self.execute(module)
+        return (module.results, [])
+
+    def _bind(self, env: Dict, module: Module, importPath: str):
+        dependency = self.modules[module.imports[importPath]]
+        dependencyEnv = self.execute(dependency)
+        for sym, _ in dependency.interface:
+            env[mangle(sym)] = dependencyEnv[mangle(sym)]
+
+    def _closure(self, module: Module) -> List[Module]:
+        """
+        Returns the module and every module it imports, directly or not.
+        """
+        seen = {module.path: module}
+        pending = [module]
+        while pending:
+            for path in pending.pop().imports.values():
+                if path not in seen:
+                    seen[path] = self.modules[path]
+                    pending.append(seen[path])
+        return list(seen.values())
+
+    def _discover(self, root: str) -> Tuple[List[Module], Dict[str, tuple]]:
+        """
+        Reads the root module and every module it imports that is not
+        loaded yet. The imports of a module are taken from its cache
+        entry if there is one, and otherwise by parsing it.
+
+        Returns:
+            A tuple (modules, entries) of the new modules and the cache
+            entries found for them, by path.
+        """
+        new = []
+        entries = {}
+        pending = [root]
+        while pending:
+            path = pending.pop()
+            if path in self.modules:
+                continue
+            module = Module(path)
+            self.modules[path] = module
+            new.append(module)
+            try:
+                with open(path) as sourceFile:
+                    module.source = sourceFile.read()
+            except (OSError, UnicodeDecodeError) as error:
+                module.errors.append(_error(
+                    "SemanticError: Could not read module \n"
+                    + "\t {} \n{}".format(path, error), path))
+                continue
+            module.key = "module-" + hashlib.sha256(
+                             module.source.encode()).hexdigest()
+            entry = self.cache.load(module.key)
+            if entry:
+                entries[path] = entry
+            importPaths = entry[0] if entry else _import_paths(module.source)
+            directory = os.path.dirname(path)
+            for importPath in importPaths:
+                module.imports[importPath] = os.path.realpath(
+                    os.path.join(directory, importPath))
+            pending.extend(module.imports.values())
+        return (new, entries)
+
+    def _compile(self, modules: List[Module], entries: Dict[str, tuple]):
+        """
+        Compiles new modules in waves, each after the modules it
+        imports, unless their cache entries in entries can be used.
+        Modules that are left when no wave can start are part of, or
+        depend on, an import cycle.
+        """
+        waiting = [module for module in modules if module.source is not None]
+        executor = None
+        try:
+            while waiting:
+                wave = [module for module in waiting
+                        if all(self.modules[path].code is not None
+                               or self.modules[path].errors
+                               for path in module.imports.values())]
+                if not wave:
+                    break
+                jobs = [module for module in wave
+                        if not self._load_cached(module,
+                                                 entries.get(module.path))]
+                if len(jobs) > 1 and self.processes > 1:
+                    if executor is None:
+                        executor = ProcessPoolExecutor(
+                            max_workers=self.processes)
+                    outputs = executor.map(_compile_job, map(self._job, jobs))
+                else:
+                    outputs = map(_compile_job, map(self._job, jobs))
+                for module, output in zip(jobs, outputs):
+                    self._finish(module, *output)
+                done = set(wave)
+                waiting = [module for module in waiting
+                           if module not in done]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        for module in waiting:
+            module.errors.append(_error(
+                "SemanticError: Module \n\t {} \n".format(module.path)
+                + "is part of or imports an import cycle", module.path))
+
+    def _job(self, module: Module):
+        interfaces = {importPath: self.modules[path].interface
+                      for importPath, path in module.imports.items()}
+        return (module.path, module.source, interfaces)
+
+    def _load_cached(self, module: Module, entry: Optional[tuple]) -> bool:
+        """
+        Takes a module from its cache entry, as read by _discover, if
+        the interfaces of its imports are those it was compiled
+        against. Returns True if it was.
+        """
+        if not entry:
+            return False
+        _, digests, interface, code = entry
+        if digests != self._digests(module):
+            return False
+        module.interface = interface
+        module.code = _with_filename(code, module.path)
+        return True
+
+    def _finish(self, module: Module, code: Optional[bytes],
+                interface: Optional[Interface], errors: List[SyntaxError]):
+        for error in errors:
+            error.filename = module.path
+        module.errors.extend(errors)
+        if code is None:
+            return
+        module.code = marshal.loads(code)
+        module.interface = interface
+        self.cache.store(module.key, (tuple(module.imports),
+                                      self._digests(module), interface,
+                                      module.code))
+
+    def _digests(self, module: Module) -> Tuple[str, ...]:
+        return tuple(_digest(self.modules[path].interface)
+                     for path in module.imports.values())
+
+def _compile_job(job) -> Tuple[Optional[bytes], Optional[Interface],
+                               List[SyntaxError]]:
+    """
+    Analyzes and compiles one module, given the interfaces of the
+    modules it imports, possibly in a worker process. The code object
+    is returned marshaled.
+    """
+    path, source, interfaces = job
+    tokens, errors = lex(StringIO(source))
+    ast_, parseErrors = parse(tokens)
+    errors.extend(parseErrors)
+    types = {}
+
+    def modules(importPath):
+        interface = interfaces.get(importPath)
+        return (None if interface is None else _exports(interface), [])
+
+    namespace, semantErrors = analyze(ast_, types, modules=modules)
+    errors.extend(semantErrors)
+    if errors:
+        return (None, None, errors)
+    code = compile_program(ast_, types, path, namespace=namespace)
+    return (marshal.dumps(code), _interface(ast_, namespace), [])
+
+def _import_paths(source: str) -> List[str]:
+    """
+    Returns the path strings of the well formed import forms of source.
+    """
+    paths = []
+    for expr, _ in parse_stream(lex(StringIO(source))[0]):
+        if (expr is not None and special_form(expr) == "import"
+                and len(expr) == 2
+                and isinstance(expr[1], Token)
+                and expr[1][2] == TokenType.STR):
+            paths.append(expr[1][1])
+    return paths
+
+def _interface(ast_, namespace) -> Interface:
+    """
+    Describes the symbols defined by the def and defun forms of a
+    module, as they are bound at its end.
+    """
+    interface = []
+    for sym in sorted({definition_name(expr) for expr in ast_} - {None}):
+        compObj = namespace.env[sym]
+        if isinstance(compObj, FuncObj):
+            signatures = tuple((tuple(str(argType)
+                                      for argType in signature.argTypes),
+                                str(signature.resultType))
+                               for signature in compObj.signatures)
+            interface.append((sym, ("function", compObj.name,
+                                    compObj.numArgs, signatures,
+                                    compObj.pure, compObj.pureArgs)))
+        else:
+            interface.append((sym, ("value", str(compObj.lssType))))
+    return tuple(interface)
+
+def _exports(interface: Interface) -> Dict[str, CompObj]:
+    exports = {}
+    for sym, description in interface:
+        if description[0] == "function":
+            _, name, numArgs, signatures, pure, pureArgs = description
+            exports[sym] = FuncObj(
+                None, name, numArgs,
+                (lambda namespace, errors, argsCompObjs: DummyCompObj()),
+                tuple(Signature(tuple(map(LssType, argTypes)),
+                                LssType(resultType))
+                      for argTypes, resultType in signatures),
+                pure, pureArgs)
+        else:
+            exports[sym] = CompObj(None, None, LssType(description[1]))
+    return exports
+
+def _with_filename(code: CodeType, filename: str) -> CodeType:
+    """
+    Returns code as if compiled from filename, including the code of
+    the functions it defines.
+    """
+    if code.co_filename == filename:
+        return code
+    consts = tuple(_with_filename(const, filename)
+                   if isinstance(const, CodeType) else const
+                   for const in code.co_consts)
+    return code.replace(co_filename=filename, co_consts=consts)
+
+def _digest(interface: Optional[Interface]) -> str:
+    # Not marshal, whose output for equal values depends on how they
+    # are shared in memory
+    return hashlib.sha256(repr(interface).encode()).hexdigest()
+
+def _error(message: str, path: str) -> SyntaxError:
+    error = SyntaxError(message)
+    error.filename = path
+    return error
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest as ut
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+from lss_compiler import modules
+from lss_compiler.modules import ModuleLoader
+
+PRELUDE = ("(print \"prelude\")\n"
+           "(def one 1)\n"
+           "(defun sq (x) (require true) (* x x) (ensure (> result -1)))\n")
+
+LEFT = ("(import \"prelude.lss\")\n"
+        "(defun left (x) (require true) (+ (sq x) one) (ensure true))\n")
+
+RIGHT = ("(import \"lib/../prelude.lss\")\n"
+         "(def two (+ one one))\n")
+
+# Imports are not transitive, so main imports sq itself
+MAIN = ("(import \"left.lss\")\n"
+        "(import \"right.lss\")\n"
+        "(import \"prelude.lss\")\n"
+        "(left two) (sq 3)\n")
+
+class TestModules(ut.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        os.mkdir(os.path.join(self.dir, "lib"))
+        self.cacheDir = os.path.join(self.dir, "cache")
+        for name, source in (("prelude.lss", PRELUDE), ("left.lss", LEFT),
+                             ("right.lss", RIGHT), ("main.lss", MAIN)):
+            self.write(name, source)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, source):
+        with open(os.path.join(self.dir, name), "w") as sourceFile:
+            sourceFile.write(source)
+
+    def run_main(self, loader):
+        with redirect_stdout(StringIO()) as out:
+            results, errors = loader.run_file(os.path.join(self.dir,
+                                                           "main.lss"))
+        return (results, errors, out.getvalue())
+
+    def test_diamond(self):
+        loader = ModuleLoader()
+        results, errors, out = self.run_main(loader)
+        self.assertEqual(errors, [])
+        self.assertListEqual(results, [5, 9])
+        # The prelude is imported twice but loaded and run once
+        self.assertEqual(len(loader.modules), 4)
+        self.assertEqual(out, "prelude\n")
+        prelude = loader.modules[os.path.realpath(
+                      os.path.join(self.dir, "prelude.lss"))]
+        self.assertIs(loader.modules[os.path.realpath(
+                          os.path.join(self.dir, "left.lss"))]
+                          .env["v_sq"], prelude.env["v_sq"])
+        self.assertEqual(self.run_main(loader)[2], "")
+
+    def test_disk_cache(self):
+        self.run_main(ModuleLoader(self.cacheDir))
+        self.assertEqual(len(os.listdir(self.cacheDir)), 4)
+        loader = ModuleLoader(self.cacheDir)
+        with mock.patch.object(modules, "_compile_job") as compileJob, \
+             mock.patch.object(loader.cache, "load",
+                               wraps=loader.cache.load) as load:
+            results, errors, out = self.run_main(loader)
+        compileJob.assert_not_called()
+        # Every entry is read once
+        self.assertEqual(load.call_count, 4)
+        self.assertListEqual(results, [5, 9])
+        self.assertEqual(out, "prelude\n")
+
+    def test_identical_files(self):
+        self.write("lib/prelude.lss", PRELUDE)
+        for cacheDir in (None, self.cacheDir):
+            loader = ModuleLoader(cacheDir)
+            for name in ("prelude.lss", "lib/prelude.lss"):
+                path = os.path.realpath(os.path.join(self.dir, name))
+                with redirect_stdout(StringIO()):
+                    loader.run_file(path)
+                module = loader.modules[path]
+                self.assertEqual(module.code.co_filename, path)
+                self.assertEqual(module.env["v_sq"].__code__.co_filename,
+                                 path)
+
+    def test_interface_change(self):
+        self.run_main(ModuleLoader(self.cacheDir))
+        self.write("prelude.lss", PRELUDE.replace("(x)", "(x y)"))
+        results, errors, _ = self.run_main(ModuleLoader(self.cacheDir))
+        self.assertIsNone(results)
+        # left.lss was cached, but is analyzed again against the new sq
+        leftErrors = [error for error in errors
+                      if error.filename.endswith("left.lss")]
+        self.assertEqual(len(leftErrors), 1)
+        self.assertIn("expects 2 arguments", str(leftErrors[0]))
+
+    def test_errors(self):
+        self.write("main.lss", "(import \"missing.lss\") (import 1)")
+        results, errors, _ = self.run_main(ModuleLoader())
+        self.assertIsNone(results)
+        self.assertEqual(len(errors), 3)
+        self.assertIn("Could not import", str(errors[0]))
+        self.assertIn("Malformed import", str(errors[1]))
+        self.assertIn("Could not read", str(errors[2]))
+
+    def test_cycle(self):
+        self.write("prelude.lss", "(import \"main.lss\")" + PRELUDE)
+        results, errors, _ = self.run_main(ModuleLoader())
+        self.assertIsNone(results)
+        self.assertEqual(len(errors), 4)
+        self.assertTrue(all("import cycle" in str(error)
+                            for error in errors))
+
+    def test_parallel(self):
+        results, errors, out = self.run_main(ModuleLoader(processes=2))
+        self.assertEqual(errors, [])
+        self.assertListEqual(results, [5, 9])
+        self.assertEqual(out, "prelude\n")
+
+if __name__ == "__main__":
+    ut.main()
@@ -0,0 +1,296 @@
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from types import CodeType
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from lss_compiler.lss_compiler import (CALLS_NAME, compile_program, make_env,
+                                       mangle, run)
+from lss_env.comp_obj import FuncObj
+
+# The default time between samples, in seconds. Samples are taken by a
+# thread, which also has to wait for the interpreter's switch interval.
+DEFAULT_INTERVAL = 0.001
+
+# The name given to the top level forms of a program
+TOPLEVEL_NAME = "<toplevel>"
+
+# The filename profile_program compiles with, to find the LSS frames
+PROFILE_FILENAME = "<lss-profile>"
+
+class Frame(NamedTuple):
+    """
+    One entry of a sampled LSS call stack.
+
+    Attributes:
+        name (str): The name of the function, or TOPLEVEL_NAME.
+        lineNum (int): The source line that was executing.
+        colNum (int): The source column that was executing.
+    """
+    name: str
+    lineNum: int
+    colNum: int
+
+    def __str__(self):
+        return "{} ({}:{})".format(self.name, self.lineNum, self.colNum)
+
+class FunctionStats(NamedTuple):
+    """
+    The aggregated measurements of one function.
+
+    Attributes:
+        name (str): The name of the function.
+        calls (int): How many times it was called.
+        selfTime (float): Seconds spent in its own code, including the
+            builtins it called.
+        totalTime (float): Seconds spent while it was on the stack.
+    """
+    name: str
+    calls: int
+    selfTime: float
+    totalTime: float
+
+class Profile():
+    """
+    The Profile class holds the samples taken while a program ran.
+
+    Attributes:
+        stacks (Dict[Tuple[Frame], float]): The sampled LSS call stacks,
+            outermost first, with the seconds attributed to each.
+        calls (Dict[str, int]): The number of calls of each function.
+        duration (float): The wall time of the profiled run.
+    """
+
+    def __init__(self, stacks: Dict[Tuple[Frame, ...], float],
+                 calls: Dict[str, int], duration: float):
+        self.stacks = stacks
+        self.calls = calls
+        self.duration = duration
+
+    def functions(self) -> List[FunctionStats]:
+        """
+        Returns the measurements of every function that was sampled or
+        called, by decreasing self time.
+        """
+        selfTimes = defaultdict(float)
+        totalTimes = defaultdict(float)
+        for stack, seconds in self.stacks.items():
+            selfTimes[stack[-1].name] += seconds
+            # Recursive functions count once per sample
+            for name in {frame.name for frame in stack}:
+                totalTimes[name] += seconds
+        names = set(totalTimes) | set(self.calls)
+        stats = [FunctionStats(name, self.calls.get(name, 0),
+                               selfTimes[name], totalTimes[name])
+                 for name in names]
+        stats.sort(key=lambda stat: (-stat.selfTime, stat.name))
+        return stats
+
+    def collapsed(self, positions: bool = False) -> str:
+        """
+        Returns the stacks in the collapsed format read by flamegraph
+        tools: one line per stack, with the frames separated by ";" and
+        followed by the sampled time in microseconds.
+
+        Args:
+            positions (bool): If true, frames include the line and
+                column that was executing, rather than just the name.
+        """
+        weights = Counter()
+        for stack, seconds in self.stacks.items():
+            frames = [str(frame) if positions else frame.name
+                      for frame in stack]
+            weights[";".join(frames)] += seconds
+        return "".join("{} {}\n".format(stack, round(seconds * 1e6))
+                       for stack, seconds in sorted(weights.items()))
+
+    def summary(self, limit: Optional[int] = None) -> str:
+        """
+        Returns a table of the function measurements, by decreasing
+        self time.
+        """
+        lines = ["{:>10} {:>10} {:>7} {:>10} {:>7}  {}".format(
+                     "calls", "self(s)", "self%", "total(s)", "total%",
+                     "function")]
+        duration = self.duration or 1
+        for stat in self.functions()[:limit]:
+            lines.append("{:>10} {:>10.4f} {:>6.1f}% {:>10.4f} {:>6.1f}%"
+                         "  {}".format(stat.calls, stat.selfTime,
+                                       100 * stat.selfTime / duration,
+                                       stat.totalTime,
+                                       100 * stat.totalTime / duration,
+                                       stat.name))
+        return "\n".join(lines)
+
+class Profiler():
+    """
+    The Profiler class samples the LSS call stack of a thread running
+    compiled code. A background thread wakes up every interval, walks
+    the frames of the profiled thread, and keeps those of code compiled
+    from filename. Each sample is weighted by the time since the one
+    before it.
+
+    Sampling only records code objects and instruction offsets. Names
+    and source positions are looked up once, when the profile is built.
+
+    Usage:
+        with Profiler() as profiler:
+            run(code, env)
+        print(profiler.profile.summary())
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL,
+                 filename: str = "<lss>"):
+        self.interval = interval
+        self.filename = filename
+        self.profile: Optional[Profile] = None
+        self._samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._calls = None
+        self._start = 0.0
+
+    def start(self, calls: Optional[Counter] = None):
+        """
+        Starts sampling the calling thread.
+
+        Args:
+            calls (Counter): The call counts of the run, as bound to
+                _calls in the env of code compiled with countCalls.
+        """
+        self._calls = calls
+        self._samples = Counter()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample, args=(threading.get_ident(),),
+            daemon=True)
+        self._start = time.perf_counter()
+        self._thread.start()
+
+    def stop(self, namespace=None) -> Profile:
+        """
+        Stops sampling and builds the profile.
+
+        Args:
+            namespace (NameSpace): Optionally, the global namespace the
+                program was analyzed in, after run has given its FuncObjs
+                their compiled values. Function names are then taken from
+                the FuncObjs rather than from the mangled code names.
+        """
+        self._stop.set()
+        self._thread.join()
+        duration = time.perf_counter() - self._start
+        names = _function_names(namespace)
+        positions = {}
+        frames = {}
+        stacks = Counter()
+        for stack, seconds in self._samples.items():
+            for entry in stack:
+                if entry not in frames:
+                    frames[entry] = _frame(*entry, names, positions)
+            stacks[tuple(frames[entry] for entry in stack)] += seconds
+        self.profile = Profile(dict(stacks), dict(self._calls or {}),
+                               duration)
+        return self.profile
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *excInfo):
+        self.stop()
+
+    def _sample(self, ident: int):
+        samples = self._samples
+        filename = self.filename
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(ident)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                if code.co_filename == filename:
+                    stack.append((code, frame.f_lasti))
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                samples[tuple(stack)] += now - last
+            last = now
+
+def profile_program(ast_, types=None, namespace=None,
+                    interval: float = DEFAULT_INTERVAL,
+                    countCalls: bool = False):
+    """
+    Compiles an analyzed program and runs it under a Profiler.
+
+    Args:
+        ast_ (List[Expr]): The program, as output by lss_parser.parse.
+        types (Dict): Optionally, the types filled in by analyze.
+        namespace (NameSpace): Optionally, the global namespace from
+            analyze, used to name the functions.
+        interval (float): The time between samples, in seconds.
+        countCalls (bool): Whether to compile in call counting, which
+            fills the calls of the profile. Off by default: sampling
+            alone adds about 2% to the run time, while counting costs
+            time on every call and adds about 15% to programs made of
+            very small functions.
+
+    Returns:
+        A tuple (results, profile) of the values of the top level forms
+        and the Profile of the run.
+    """
+    code = compile_program(ast_, types, PROFILE_FILENAME, countCalls)
+    return profile_run(code, None, namespace, interval)
+
+def profile_run(code: CodeType, env: Optional[Dict] = None, namespace=None,
+                interval: float = DEFAULT_INTERVAL):
+    """
+    Runs compiled code under a Profiler. The code must have been
+    compiled with PROFILE_FILENAME as its filename.
+
+    Returns:
+        A tuple (results, profile), as profile_program.
+    """
+    if env is None:
+        env = make_env()
+    profiler = Profiler(interval, PROFILE_FILENAME)
+    profiler.start(env.get(CALLS_NAME))
+    try:
+        results = run(code, env, namespace)
+    finally:
+        profile = profiler.stop(namespace)
+    return (results, profile)
+
+def _function_names(namespace) -> Dict[CodeType, str]:
+    names = {}
+    if namespace is not None:
+        for compObj in namespace.env.values():
+            if (isinstance(compObj, FuncObj)
+                    and hasattr(compObj.value, "__code__")):
+                names[compObj.value.__code__] = compObj.name
+    return names
+
+def _frame(code: CodeType, offset: int, names: Dict[CodeType, str],
+           positions: Dict[CodeType, List]) -> Frame:
+    if code in names:
+        name = names[code]
+    elif code.co_name == "<module>":
+        name = TOPLEVEL_NAME
+    else:
+        name = _demangle(code.co_name)
+    if code not in positions:
+        positions[code] = list(code.co_positions())
+    # Instructions are two bytes, and positions are listed per instruction
+    lineNum, _, colOffset, endColOffset = positions[code][offset // 2]
+    return Frame(name, lineNum or code.co_firstlineno,
+                 endColOffset or colOffset or 0)
+
+def _demangle(pyName: str) -> str:
+    """
+    Inverts mangle, for functions that are not in the namespace.
+    """
+    parts = pyName[len(mangle("")):].split("_")
+    # Escapes are "_{hex}_", so they sit at the odd indexes
+    return "".join(chr(int(part, 16)) if index % 2 else part
+                   for index, part in enumerate(parts))
@@ -0,0 +1,92 @@
+import unittest as ut
+from io import StringIO
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_analyzer.lss_analyzer import analyze
+from lss_compiler.lss_compiler import mangle
+from lss_compiler.profiler import (Frame, Profile, TOPLEVEL_NAME,
+                                   profile_program, _demangle)
+
+def _profile(code, **kwargs):
+    ast = parse(lex(StringIO(code))[0])[0]
+    types = {}
+    namespace, errors = analyze(ast, types)
+    assert errors == [], errors
+    return profile_program(ast, types, namespace, **kwargs)
+
+PROGRAM = ("(defun sq (x) (require true) (* x x) (ensure true))\n"
+           + "(defun f (x) (require true) (+ (sq x) (sq x)) (ensure true))\n"
+           + "(f 2)\n" * 3)
+
+class TestProfileRun(ut.TestCase):
+    def test_results_and_calls(self):
+        results, profile = _profile(PROGRAM, countCalls=True)
+        self.assertListEqual(results, [8, 8, 8])
+        self.assertDictEqual(profile.calls, {"f": 3, "sq": 6})
+
+    def test_no_call_counts(self):
+        results, profile = _profile(PROGRAM)
+        self.assertListEqual(results, [8, 8, 8])
+        self.assertDictEqual(profile.calls, {})
+
+    def test_samples(self):
+        program = PROGRAM + "(f 3)\n" * 20000
+        profile = _profile(program, interval=0.0001, countCalls=True)[1]
+        self.assertGreater(len(profile.stacks), 0)
+        for stack in profile.stacks:
+            self.assertEqual(stack[0].name, TOPLEVEL_NAME)
+            self.assertLessEqual({frame.name for frame in stack},
+                                 {TOPLEVEL_NAME, "f", "sq"})
+            for frame in stack:
+                self.assertGreater(frame.lineNum, 0)
+        stats = {stat.name: stat for stat in profile.functions()}
+        self.assertEqual(stats["sq"].calls, 40006)
+        self.assertAlmostEqual(stats[TOPLEVEL_NAME].totalTime,
+                               sum(profile.stacks.values()))
+
+class TestProfile(ut.TestCase):
+    def setUp(self):
+        main = Frame(TOPLEVEL_NAME, 3, 1)
+        f = Frame("f", 2, 5)
+        g = Frame("g", 1, 7)
+        self.profile = Profile({(main,): 1.0,
+                                (main, f): 2.0,
+                                (main, f, g): 3.0,
+                                (main, f, g, Frame("f", 2, 9)): 4.0},
+                               {"f": 5, "g": 2}, 10.0)
+
+    def test_functions(self):
+        stats = {stat.name: stat for stat in self.profile.functions()}
+        self.assertEqual(stats["f"].selfTime, 6.0)
+        # A recursive function counts once per stack
+        self.assertEqual(stats["f"].totalTime, 9.0)
+        self.assertEqual(stats["g"].selfTime, 3.0)
+        self.assertEqual(stats["g"].totalTime, 7.0)
+        self.assertEqual(stats["f"].calls, 5)
+        self.assertEqual(stats[TOPLEVEL_NAME].calls, 0)
+        self.assertListEqual([stat.name for stat in
+                              self.profile.functions()],
+                             ["f", "g", TOPLEVEL_NAME])
+
+    def test_collapsed(self):
+        self.assertEqual(self.profile.collapsed(),
+                         "<toplevel> 1000000\n"
+                         "<toplevel>;f 2000000\n"
+                         "<toplevel>;f;g 3000000\n"
+                         "<toplevel>;f;g;f 4000000\n")
+        self.assertIn("<toplevel> (3:1);f (2:5);g (1:7) 3000000\n",
+                      self.profile.collapsed(positions=True))
+
+    def test_summary(self):
+        lines = self.profile.summary().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].endswith("f"))
+        self.assertIn("60.0%", lines[1])
+        self.assertEqual(len(self.profile.summary(limit=1).splitlines()), 2)
+
+    def test_demangle(self):
+        for sym in ("abc", "a-b", "!@+..04", "_x_", "a__b"):
+            self.assertEqual(_demangle(mangle(sym)), sym)
+
+if __name__ == "__main__":
+    ut.main()
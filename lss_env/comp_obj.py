@@ -1,5 +1,11 @@
+import operator
 from typing import List, Dict, NewType, TypeVar
 from lss_lexer.lss_token import Token, TokenType
+from lss_env.lss_type import LssType, Signature
+from lss_env.rope import Rope
+from lss_env.plist import NIL, Nil, Cons, PVector
+from lss_env.lazy_seq import LazySeq
+from lss_env import parallel
 
 # Type Aliases
 Symbol = NewType("Symbol", str)
@@ -11,22 +17,90 @@ Expr = TypeVar("Expr", Atom, List["Expr"])
 
 class CompObj():
     
-    def __init__(self, value, semantFunc):
+    def __init__(self, value, semantFunc, lssType=LssType.ANY):
         self.value = value
         self.semant = semantFunc
+        self.lssType = lssType
         
     def isFunc(self):
         return False
 
+    def acceptsArity(self, numArgs):
+        return True
+
+    def isPureFunc(self):
+        return False
+
+    def resultType(self, argTypes):
+        return LssType.ANY
+
 class FuncObj(CompObj):
+    """
+    A function value. Besides its arity and signatures, it records
+    whether calling it is free of side effects, and which of its
+    arguments must themselves be such functions.
+    """
     
-    def __init__(self, value, name, numArgs, semantFunc):
-        super().__init__(value, semantFunc)
+    def __init__(self, value, name, numArgs, semantFunc, signatures=(),
+                 pure=True, pureArgs=()):
+        super().__init__(value, semantFunc, LssType.FUNC)
         self.name = name
         self.numArgs = numArgs
+        self.signatures = signatures
+        self.pure = pure
+        self.pureArgs = pureArgs
 
     def isFunc(self):
         return True
+
+    def isPureFunc(self):
+        return self.pure
+
+    def funcArgs(self):
+        """
+        Returns the indexes of the arguments that a call may call in
+        turn, those of type function in some signature.
+        """
+        return {index for sig in self.signatures
+                for index, argType in enumerate(sig.argTypes)
+                if argType is LssType.FUNC}
+
+    def acceptsArity(self, numArgs):
+        """
+        Returns True if the function may be called with numArgs
+        arguments.
+        """
+        return numArgs == self.numArgs
+
+    def resultType(self, argTypes):
+        """
+        Infers the type of a call to this function with arguments of
+        the given types. Returns None if no signature accepts them, and
+        ANY if the function has no signature of that arity.
+        """
+        candidates = [sig for sig in self.signatures
+                      if len(sig.argTypes) == len(argTypes)]
+        if not candidates:
+            return LssType.ANY
+        resultTypes = {sig.resultType for sig in candidates
+                       if sig.matches(argTypes)}
+        if not resultTypes:
+            return None
+        if len(resultTypes) == 1:
+            return resultTypes.pop()
+        return LssType.ANY
+
+    def specialize(self, argTypes):
+        """
+        Returns the specialized implementation for arguments proven to
+        have exactly the given types, or None if there is none.
+        """
+        if LssType.ANY in argTypes:
+            return None
+        for sig in self.signatures:
+            if sig.op and tuple(argTypes) == sig.argTypes:
+                return sig.op
+        return None
     
 class DummyCompObj(CompObj):
     
@@ -38,12 +112,235 @@ class DummyCompObj(CompObj):
 
 Env = NewType("Env", Dict[str, CompObj])
 
-plusCompObj = FuncObj((lambda x, y: x + y), 
+def _builtin_semant(namespace, errors, argsCompObjs):
+    return DummyCompObj()
+
+def _checked_arith(op):
+    """
+    Wraps a binary arithmetic operator with the runtime type checks
+    needed when the types of its operands are not known statically.
+    """
+    def checked(x, y):
+        for arg in (x, y):
+            if isinstance(arg, bool) or not isinstance(arg, (int, float)):
+                raise TypeError("Expected a number, got {}".format(
+                                    type(arg).__name__))
+        return op(x, y)
+    return checked
+
+def _arith_signatures(op, intResult=LssType.INT):
+    return (Signature((LssType.INT, LssType.INT), intResult, op),
+            Signature((LssType.INT, LssType.FLOAT), LssType.FLOAT, op),
+            Signature((LssType.FLOAT, LssType.INT), LssType.FLOAT, op),
+            Signature((LssType.FLOAT, LssType.FLOAT), LssType.FLOAT, op))
+
+def _compare_signatures(op):
+    numbers = (LssType.INT, LssType.FLOAT)
+    return tuple(Signature((left, right), LssType.BOOL, op)
+                 for left in numbers for right in numbers)
+
+plusCompObj = FuncObj(_checked_arith(operator.add), 
                       "+", 2, 
-                      (lambda namespace, errors, argsCodeObjs: 
-                          DummyCompObj()))
+                      _builtin_semant,
+                      _arith_signatures(operator.add))
+
+minusCompObj = FuncObj(_checked_arith(operator.sub),
+                       "-", 2,
+                       _builtin_semant,
+                       _arith_signatures(operator.sub))
+
+timesCompObj = FuncObj(_checked_arith(operator.mul),
+                       "*", 2,
+                       _builtin_semant,
+                       _arith_signatures(operator.mul))
+
+divideCompObj = FuncObj(_checked_arith(operator.truediv),
+                        "/", 2,
+                        _builtin_semant,
+                        _arith_signatures(operator.truediv, LssType.FLOAT))
+
+def _append(x, y):
+    """
+    Concatenates two lists, two vectors or two strings. The result
+    shares structure with its arguments rather than copying them.
+    """
+    if isinstance(x, (Cons, Nil, PVector)):
+        return x.append(y)
+    return Rope.of(x).concat(y)
+
+lessCompObj = FuncObj(_checked_arith(operator.lt),
+                      "<", 2,
+                      _builtin_semant,
+                      _compare_signatures(operator.lt))
+
+greaterCompObj = FuncObj(_checked_arith(operator.gt),
+                         ">", 2,
+                         _builtin_semant,
+                         _compare_signatures(operator.gt))
+
+equalCompObj = FuncObj(operator.eq,
+                       "=", 2,
+                       _builtin_semant,
+                       _compare_signatures(operator.eq)
+                       + (Signature((LssType.ANY, LssType.ANY),
+                                    LssType.BOOL),))
+
+_ANY = LssType.ANY
+_INT = LssType.INT
+_STR = LssType.STR
+_LIST = LssType.LIST
+_VECTOR = LssType.VECTOR
+_SEQ = LssType.SEQ
+_FUNC = LssType.FUNC
+
+# Lists, vectors and lazy sequences can all be consumed as sequences
+_SEQUENCES = (_LIST, _VECTOR, _SEQ)
+
+appendCompObj = FuncObj(_append,
+                        "append", 2,
+                        _builtin_semant,
+                        (Signature((_STR, _STR), _STR),
+                         Signature((_LIST, _LIST), _LIST),
+                         Signature((_VECTOR, _LIST), _VECTOR),
+                         Signature((_VECTOR, _VECTOR), _VECTOR)))
+
+substringCompObj = FuncObj((lambda s, start, stop:
+                               Rope.of(s).substring(start, stop)),
+                           "substring", 3,
+                           _builtin_semant,
+                           (Signature((_STR, _INT, _INT), _STR),))
+
+# Writing a string out is the point where a rope gets flattened
+printCompObj = FuncObj((lambda x: print(str(x))),
+                       "print", 1,
+                       _builtin_semant,
+                       (Signature((_ANY,), LssType.NONE),),
+                       pure=False)
+
+nilCompObj = CompObj(NIL, lambda: None, _LIST)
+
+consCompObj = FuncObj((lambda x, xs: Cons(x, xs)),
+                      "cons", 2,
+                      _builtin_semant,
+                      (Signature((_ANY, _LIST), _LIST),))
+
+firstCompObj = FuncObj((lambda xs: xs.first()),
+                       "first", 1,
+                       _builtin_semant,
+                       (Signature((_LIST,), _ANY),))
+
+restCompObj = FuncObj((lambda xs: xs.rest()),
+                      "rest", 1,
+                      _builtin_semant,
+                      (Signature((_LIST,), _LIST),))
+
+nthCompObj = FuncObj((lambda xs, index: xs.nth(index)),
+                     "nth", 2,
+                     _builtin_semant,
+                     (Signature((_LIST, _INT), _ANY),
+                      Signature((_VECTOR, _INT), _ANY)))
+
+lengthCompObj = FuncObj((lambda xs: len(xs)),
+                        "length", 1,
+                        _builtin_semant,
+                        (Signature((_LIST,), _INT),
+                         Signature((_VECTOR,), _INT),
+                         Signature((_STR,), _INT)))
+
+vecCompObj = FuncObj((lambda xs: PVector.fromIter(xs)),
+                     "vec", 1,
+                     _builtin_semant,
+                     (Signature((_LIST,), _VECTOR),
+                      Signature((_VECTOR,), _VECTOR),
+                      Signature((_SEQ,), _VECTOR)))
+
+pushCompObj = FuncObj((lambda vec, x: vec.push(x)),
+                      "push", 2,
+                      _builtin_semant,
+                      (Signature((_VECTOR, _ANY), _VECTOR),))
+
+# The sequence builtins build lazy pipelines. Each stage wraps the
+# iterator of its source, so nothing is computed until the result is
+# consumed by reduce or vec, and then all stages run in one pass.
+rangeCompObj = FuncObj(LazySeq.range,
+                       "range", 2,
+                       _builtin_semant,
+                       (Signature((_INT, _INT), _SEQ),))
+
+mapCompObj = FuncObj((lambda func, xs: LazySeq.of(xs).map(func)),
+                     "map", 2,
+                     _builtin_semant,
+                     tuple(Signature((_FUNC, seq), _SEQ)
+                           for seq in _SEQUENCES))
+
+filterCompObj = FuncObj((lambda func, xs: LazySeq.of(xs).filter(func)),
+                        "filter", 2,
+                        _builtin_semant,
+                        tuple(Signature((_FUNC, seq), _SEQ)
+                              for seq in _SEQUENCES))
+
+takeCompObj = FuncObj((lambda count, xs: LazySeq.of(xs).take(count)),
+                      "take", 2,
+                      _builtin_semant,
+                      tuple(Signature((_INT, seq), _SEQ)
+                            for seq in _SEQUENCES))
+
+reduceCompObj = FuncObj((lambda func, initial, xs:
+                            LazySeq.of(xs).reduce(func, initial)),
+                        "reduce", 3,
+                        _builtin_semant,
+                        tuple(Signature((_FUNC, _ANY, seq), _ANY)
+                              for seq in _SEQUENCES))
+
+zipCompObj = FuncObj((lambda xs, ys: LazySeq.of(xs).zip(ys)),
+                     "zip", 2,
+                     _builtin_semant,
+                     tuple(Signature((left, right), _SEQ)
+                           for left in _SEQUENCES for right in _SEQUENCES))
+
+# The parallel builtins send their function to other processes, which
+# only gives the same result if it has no side effects
+pmapCompObj = FuncObj((lambda func, xs:
+                          PVector.fromIter(parallel.pmap(func, xs))),
+                      "pmap", 2,
+                      _builtin_semant,
+                      tuple(Signature((_FUNC, seq), _VECTOR)
+                            for seq in _SEQUENCES),
+                      pureArgs=(0,))
+
+preduceCompObj = FuncObj(parallel.preduce,
+                         "preduce", 3,
+                         _builtin_semant,
+                         tuple(Signature((_FUNC, _ANY, seq), _ANY)
+                               for seq in _SEQUENCES),
+                         pureArgs=(0,))
 
 globalEnv = {
-    "+": plusCompObj    
+    "+": plusCompObj,
+    "-": minusCompObj,
+    "*": timesCompObj,
+    "/": divideCompObj,
+    "<": lessCompObj,
+    ">": greaterCompObj,
+    "=": equalCompObj,
+    "append": appendCompObj,
+    "substring": substringCompObj,
+    "print": printCompObj,
+    "nil": nilCompObj,
+    "cons": consCompObj,
+    "first": firstCompObj,
+    "rest": restCompObj,
+    "nth": nthCompObj,
+    "length": lengthCompObj,
+    "vec": vecCompObj,
+    "push": pushCompObj,
+    "range": rangeCompObj,
+    "map": mapCompObj,
+    "filter": filterCompObj,
+    "take": takeCompObj,
+    "reduce": reduceCompObj,
+    "zip": zipCompObj,
+    "pmap": pmapCompObj,
+    "preduce": preduceCompObj
     }
 
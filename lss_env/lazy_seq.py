@@ -0,0 +1,71 @@
+from functools import reduce
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator
+from lss_env.plist import PVector
+
+class LazySeq():
+    """
+    The LazySeq class is a lazy sequence: a value that produces its
+    elements only when they are iterated over.
+
+    A sequence holds a function that returns a fresh Python iterator
+    over its elements. Operations like map and filter wrap the iterator
+    of their source in another one, so a whole pipeline such as
+    range, map, filter, take runs as a single pass. Each element flows
+    through every stage before the next one is produced, and nothing is
+    evaluated past what the consumer asks for.
+
+    Since iteration always starts from the factory, a sequence can be
+    consumed more than once, and each consumer sees every element. The
+    stages are then evaluated again.
+    """
+
+    __slots__ = ("_factory",)
+
+    def __init__(self, factory: Callable[[], Iterator]):
+        self._factory = factory
+
+    @classmethod
+    def of(cls, items: Iterable) -> "LazySeq":
+        """
+        Returns items as a LazySeq. Items may be a LazySeq, a list, a
+        vector or any other iterable that can be iterated repeatedly.
+        """
+        if isinstance(items, LazySeq):
+            return items
+        return cls(lambda: iter(items))
+
+    @classmethod
+    def range(cls, start: int, stop: int) -> "LazySeq":
+        return cls(lambda: iter(range(start, stop)))
+
+    def map(self, func: Callable) -> "LazySeq":
+        return LazySeq(lambda: map(func, self))
+
+    def filter(self, func: Callable) -> "LazySeq":
+        return LazySeq(lambda: filter(func, self))
+
+    def take(self, count: int) -> "LazySeq":
+        return LazySeq(lambda: islice(self, max(count, 0)))
+
+    def zip(self, other: Iterable) -> "LazySeq":
+        """
+        Pairs the elements of this sequence and other as two element
+        vectors, stopping at the end of the shorter one.
+        """
+        other = LazySeq.of(other)
+        return LazySeq(lambda: (PVector.fromIter(pair)
+                                for pair in zip(self, other)))
+
+    def reduce(self, func: Callable, initial: Any) -> Any:
+        """
+        Folds the elements into a value from the left, starting with
+        initial. This consumes the sequence.
+        """
+        return reduce(func, self, initial)
+
+    def __iter__(self) -> Iterator:
+        return self._factory()
+
+    def __repr__(self):
+        return "<sequence>"
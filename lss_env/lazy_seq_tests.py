@@ -0,0 +1,64 @@
+import unittest as ut
+from lss_env.lazy_seq import LazySeq
+from lss_env.plist import NIL, Cons, PVector
+
+class TestLazySeq(ut.TestCase):
+    def test_range(self):
+        self.assertListEqual(list(LazySeq.range(2, 5)), [2, 3, 4])
+        self.assertListEqual(list(LazySeq.range(5, 2)), [])
+
+    def test_pipeline(self):
+        seq = (LazySeq.range(0, 10).map(lambda x: x * x)
+               .filter(lambda x: x % 2 == 0).take(3))
+        self.assertListEqual(list(seq), [0, 4, 16])
+
+    def test_only_consumed_elements(self):
+        seen = []
+        def square(x):
+            seen.append(x)
+            return x * x
+        seq = (LazySeq.range(0, 10 ** 12).map(square)
+               .filter(lambda x: x > 10).take(2))
+        self.assertListEqual(seen, [])
+        self.assertListEqual(list(seq), [16, 25])
+        self.assertListEqual(seen, [0, 1, 2, 3, 4, 5])
+
+    def test_one_pass(self):
+        order = []
+        def stage(name):
+            def func(x):
+                order.append((name, x))
+                return True
+            return func
+        list(LazySeq.range(0, 2).filter(stage("a")).filter(stage("b")))
+        self.assertListEqual(order, [("a", 0), ("b", 0), ("a", 1), ("b", 1)])
+
+    def test_reiterable(self):
+        seq = LazySeq.range(0, 3).map(lambda x: x + 1)
+        self.assertListEqual(list(seq), [1, 2, 3])
+        self.assertListEqual(list(seq), [1, 2, 3])
+
+    def test_sources(self):
+        xs = Cons.fromIter([1, 2, 3])
+        self.assertListEqual(list(LazySeq.of(xs).take(2)), [1, 2])
+        self.assertListEqual(list(LazySeq.of(PVector.fromIter("ab"))),
+                             ["a", "b"])
+        self.assertListEqual(list(LazySeq.of(NIL)), [])
+        seq = LazySeq.range(0, 1)
+        self.assertIs(LazySeq.of(seq), seq)
+
+    def test_zip(self):
+        pairs = list(LazySeq.range(0, 5).zip(Cons.fromIter("ab")))
+        self.assertListEqual(pairs, [PVector.fromIter((0, "a")),
+                                     PVector.fromIter((1, "b"))])
+
+    def test_reduce(self):
+        self.assertEqual(LazySeq.range(1, 5).reduce(lambda x, y: x * y, 1),
+                         24)
+        self.assertEqual(LazySeq.range(0, 0).reduce(lambda x, y: x, 7), 7)
+
+    def test_negative_take(self):
+        self.assertListEqual(list(LazySeq.range(0, 5).take(-1)), [])
+
+if __name__ == "__main__":
+    ut.main()
@@ -0,0 +1,83 @@
+from enum import Enum
+from typing import Callable, NamedTuple, Optional, Tuple
+from lss_lexer.lss_token import TokenType
+
+class LssType(Enum):
+    """
+    The LssType enum class contains an enumeration of the types that
+    the analyzer infers for expressions. The types themselves are given
+    by strings.
+
+    ANY is used for expressions whose type could not be determined
+    statically. It is compatible with every other type, so it never
+    causes a type error by itself.
+
+    Attributes:
+        INT: "int"
+        FLOAT: "float"
+        BOOL: "bool"
+        STR: "string"
+        LIST: "list"
+        VECTOR: "vector"
+        SEQ: "sequence"
+        FUNC: "function"
+        NONE: "none"
+        ANY: "any"
+    """
+
+    INT = "int"
+    FLOAT = "float"
+    BOOL = "bool"
+    STR = "string"
+    LIST = "list"
+    VECTOR = "vector"
+    SEQ = "sequence"
+    FUNC = "function"
+    NONE = "none"
+    ANY = "any"
+
+    def __str__(self):
+        return self.value
+
+    def accepts(self, other: "LssType") -> bool:
+        """
+        Returns True if a value of type other may be used where this
+        type is expected.
+        """
+        return (self is LssType.ANY or other is LssType.ANY
+                or self is other)
+
+class Signature(NamedTuple):
+    """
+    The Signature class describes one way a builtin function may be
+    called, and is used for type inference of calls.
+
+    Attributes:
+        argTypes (Tuple[LssType]): The types of the arguments.
+        resultType (LssType): The type of the value returned when
+            called with arguments of these types.
+        op (Callable): Optionally, a specialized implementation that
+            may be used without runtime type checks when the argument
+            types are proven to be exactly argTypes.
+    """
+    argTypes: Tuple[LssType, ...]
+    resultType: LssType
+    op: Optional[Callable] = None
+
+    def matches(self, argTypes) -> bool:
+        return (len(argTypes) == len(self.argTypes)
+                and all(expected.accepts(actual) for expected, actual
+                        in zip(self.argTypes, argTypes)))
+
+_tokenTypes = {
+    TokenType.INT: LssType.INT,
+    TokenType.FLOAT: LssType.FLOAT,
+    TokenType.BOOL: LssType.BOOL,
+    TokenType.STR: LssType.STR
+    }
+
+def type_of_token(tokenType: TokenType) -> LssType:
+    """
+    Returns the type of a constant with the given token type.
+    """
+    return _tokenTypes.get(tokenType, LssType.ANY)
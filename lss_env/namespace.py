@@ -16,24 +16,38 @@ class NameSpace():
         1. An environment
         2. List of children namespaces
         3. Backpointer to parent namespace
+        4. For the global namespace, the symbols that the program
+           defines more than once
     """
     
-    def __init__(self, header, env, children, parent):
+    def __init__(self, header, env, children, parent, redefined=None):
         self.header = header
         self.env = env
         self.children = children
         self.parent = parent
+        self.redefined = set() if redefined is None else redefined
         
     def add_child(self, child):
         self.children.append(child)
         child.parent = self
         
     def query(self, sym):
-        if sym in self.env:
-            return self.env[sym]
-        else:
-            if self.parent:
-                return self.parent.query(sym)
-            else:
+        namespace = self
+        while namespace:
+            if sym in namespace.env:
+                return namespace.env[sym]
+            namespace = namespace.parent
+        return False
+
+    def is_redefined(self, sym):
+        """
+        Returns True if sym refers to a global that the program defines
+        more than once, so that a use of it may see any of its
+        definitions.
+        """
+        namespace = self
+        while namespace.parent:
+            if sym in namespace.env:
                 return False
-        
\ No newline at end of file
+            namespace = namespace.parent
+        return sym in namespace.redefined
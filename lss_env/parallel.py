@@ -0,0 +1,195 @@
+import atexit
+import marshal
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from itertools import repeat
+from types import FunctionType
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# The number of worker processes, and the smallest input that is worth
+# sending to them. Smaller inputs are processed serially.
+PARALLEL_WORKERS = os.cpu_count() or 1
+PARALLEL_MIN_ITEMS = 10000
+
+# Inputs are cut into this many chunks per worker, so that uneven
+# chunks do not leave workers idle
+CHUNKS_PER_WORKER = 4
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executorWorkers = 0
+
+# The functions unpacked so far in a worker process, by payload.
+# Workers run nested pmap and preduce calls serially.
+_unpacked: Dict[bytes, Callable] = {}
+_inWorker = False
+
+# What pickle raises for values it cannot serialize, such as compiled
+# functions, lazy sequences and deeply nested lists
+_UNPICKLABLE = (AttributeError, TypeError, ValueError, RecursionError,
+                pickle.PicklingError)
+
+def pmap(func: Callable, items: Iterable) -> List:
+    """
+    Applies func to every item, in a process pool if the input is large
+    enough. Returns the results in order.
+    """
+    items = list(items)
+    payload = _payload(func, len(items))
+    chunks = (None if payload is None
+              else _run_chunks(_map_chunk, payload, items))
+    if chunks is None:
+        return [func(item) for item in items]
+    return [result for chunk in chunks for result in chunk]
+
+def preduce(func: Callable, initial: Any, items: Iterable) -> Any:
+    """
+    Folds items into a value from the left, starting with initial. In
+    parallel mode every chunk is folded in a worker and the results of
+    the chunks are folded in order, so func must be associative.
+    """
+    items = list(items)
+    payload = _payload(func, len(items))
+    chunks = (None if payload is None
+              else _run_chunks(_reduce_chunk, payload, items))
+    if chunks is None:
+        return reduce(func, items, initial)
+    return reduce(func, chunks, initial)
+
+def pack_function(func: Callable, builtins: Dict[int, str]) -> bytes:
+    """
+    Serializes a function compiled from LSS, together with what it
+    refers to, so that it can be rebuilt in another process.
+
+    Compiled functions cannot be pickled by reference, since they are
+    not importable. Instead the code objects of the function and of
+    every compiled function it calls are marshaled, builtins are sent
+    by their LSS symbol, and other globals, such as the values of def
+    forms, are pickled.
+
+    Args:
+        func (Callable): A compiled function or a builtin value.
+        builtins (Dict[int, str]): The LSS symbol of every builtin, by
+            the id of its value.
+
+    Returns:
+        The payload, as bytes for unpack_function.
+    """
+    if id(func) in builtins:
+        return pickle.dumps(("builtin", builtins[id(func)]))
+    env = func.__globals__
+    codes = {}
+    names = {}
+    values = {}
+    pending = [func.__name__]
+    while pending:
+        name = pending.pop()
+        if name in codes or name in names or name in values:
+            continue
+        value = env[name]
+        if isinstance(value, FunctionType) and value.__globals__ is env:
+            codes[name] = marshal.dumps(value.__code__)
+            pending.extend(ref for ref in value.__code__.co_names
+                           if ref in env)
+        elif id(value) in builtins:
+            names[name] = builtins[id(value)]
+        else:
+            values[name] = value
+    return pickle.dumps(("compiled", func.__name__, codes, names, values))
+
+def unpack_function(payload: bytes, globalEnv: Dict) -> Callable:
+    """
+    Rebuilds a function from the output of pack_function.
+    """
+    packed = pickle.loads(payload)
+    if packed[0] == "builtin":
+        return globalEnv[packed[1]].value
+    _, funcName, codes, names, values = packed
+    env = {"__builtins__": __builtins__}
+    for name, sym in names.items():
+        env[name] = globalEnv[sym].value
+    env.update(values)
+    for name, code in codes.items():
+        env[name] = FunctionType(marshal.loads(code), env, name)
+    return env[funcName]
+
+def _payload(func: Callable, numItems: int) -> Optional[bytes]:
+    """
+    Returns the payload to send func to the workers with, or None if
+    the input should be processed serially.
+    """
+    if (numItems < PARALLEL_MIN_ITEMS or PARALLEL_WORKERS < 2
+            or _inWorker):
+        return None
+    # Imported here since comp_obj defines its builtins with this module
+    from lss_env.comp_obj import globalEnv
+    builtins = {id(compObj.value): sym for sym, compObj in globalEnv.items()}
+    try:
+        return pack_function(func, builtins)
+    except _UNPICKLABLE:
+        # Whatever cannot be shipped still runs, in this process
+        return None
+
+def _run_chunks(function: Callable, payload: bytes,
+                items: List) -> Optional[List]:
+    """
+    Runs function on every chunk of items in the process pool, and
+    returns the result of each chunk. Chunks and their results travel
+    pickled, so that values pickle cannot handle are found here rather
+    than in the pool. If there are any, returns None and the caller
+    processes the whole input serially, which is safe since the
+    functions sent to workers are pure.
+    """
+    chunks = [_dumps(chunk) for chunk in _chunks(items)]
+    if None in chunks:
+        return None
+    outputs = list(_executor_for().map(function, repeat(payload), chunks))
+    if None in outputs:
+        return None
+    return [pickle.loads(output) for output in outputs]
+
+def _dumps(value: Any) -> Optional[bytes]:
+    try:
+        return pickle.dumps(value)
+    except _UNPICKLABLE:
+        return None
+
+def _chunks(items: List) -> List[List]:
+    numChunks = min(len(items), PARALLEL_WORKERS * CHUNKS_PER_WORKER)
+    return [items[i * len(items) // numChunks:
+                  (i + 1) * len(items) // numChunks]
+            for i in range(numChunks)]
+
+def _executor_for() -> ProcessPoolExecutor:
+    """
+    Returns the shared process pool, started on first use and again if
+    the number of workers was changed.
+    """
+    global _executor, _executorWorkers
+    if _executor is None or _executorWorkers != PARALLEL_WORKERS:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = ProcessPoolExecutor(max_workers=PARALLEL_WORKERS)
+        _executorWorkers = PARALLEL_WORKERS
+    return _executor
+
+@atexit.register
+def _shutdown():
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+
+def _worker_function(payload: bytes) -> Callable:
+    global _inWorker
+    _inWorker = True
+    if payload not in _unpacked:
+        from lss_env.comp_obj import globalEnv
+        _unpacked[payload] = unpack_function(payload, globalEnv)
+    return _unpacked[payload]
+
+def _map_chunk(payload: bytes, chunk: bytes) -> Optional[bytes]:
+    func = _worker_function(payload)
+    return _dumps([func(item) for item in pickle.loads(chunk)])
+
+def _reduce_chunk(payload: bytes, chunk: bytes) -> Optional[bytes]:
+    return _dumps(reduce(_worker_function(payload), pickle.loads(chunk)))
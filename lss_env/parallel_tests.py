@@ -0,0 +1,158 @@
+import unittest as ut
+from io import StringIO
+from unittest import mock
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_analyzer.lss_analyzer import analyze
+from lss_compiler.lss_compiler import (compile_program, make_env, run,
+                                       ContractError)
+from lss_env import parallel
+from lss_env.comp_obj import globalEnv
+
+def _run(code):
+    ast = parse(lex(StringIO(code))[0])[0]
+    types = {}
+    namespace, errors = analyze(ast, types)
+    assert errors == [], errors
+    env = make_env()
+    return (run(compile_program(ast, types), env, namespace), env)
+
+PRELUDE = ("(def k 3)\n"
+           + "(defun scale (x) (require true) (* x k) (ensure true))\n"
+           + "(defun poly (x) (require (> x -1)) (+ (scale x) 1)"
+           + " (ensure (> result x)))\n"
+           + "(defun add (x y) (require true) (+ x y) (ensure true))\n")
+
+@mock.patch.object(parallel, "PARALLEL_WORKERS", 2)
+@mock.patch.object(parallel, "PARALLEL_MIN_ITEMS", 100)
+class TestParallel(ut.TestCase):
+    def test_pmap(self):
+        results = _run(PRELUDE + "(pmap poly (range 0 1000))"
+                       + " (pmap poly (range 0 10))")[0]
+        self.assertListEqual(list(results[0]),
+                             [3 * x + 1 for x in range(1000)])
+        self.assertListEqual(list(results[1]), [3 * x + 1 for x in range(10)])
+
+    def test_preduce(self):
+        results = _run(PRELUDE + "(preduce add 5 (range 0 1000))"
+                       + " (preduce + 0 (vec (range 0 1000)))"
+                       + " (preduce add 5 nil)")[0]
+        self.assertListEqual(results, [sum(range(1000)) + 5,
+                                       sum(range(1000)), 5])
+
+    def test_builtin(self):
+        results = _run("(pmap length (map vec (take 200"
+                       + " (zip (range 0 1000) (range 0 1000)))))")[0]
+        self.assertListEqual(list(results[0]), [2] * 200)
+
+    def test_contract_error(self):
+        with self.assertRaises(ContractError):
+            _run(PRELUDE + "(pmap poly (range -1 500))")
+
+    def test_unshippable_runs_serially(self):
+        code = ("(def xs (range 0 3))\n"
+                + "(defun count (x) (require true)"
+                + " (+ x (length (vec xs))) (ensure true))\n"
+                + "(pmap count (range 0 500))")
+        results = _run(code)[0]
+        self.assertListEqual(list(results[0]), [x + 3 for x in range(500)])
+
+    def test_unpicklable_items(self):
+        results = _run(PRELUDE
+                       + "(defun upto (x) (require true) (range 0 x)"
+                       + " (ensure true))\n"
+                       + "(pmap vec (map upto (range 0 300)))")[0]
+        self.assertListEqual(list(results[0][299]), list(range(299)))
+
+    def test_unpicklable_results(self):
+        with mock.patch.object(parallel, "_executor_for",
+                               wraps=parallel._executor_for) as executor:
+            results = _run(PRELUDE
+                           + "(defun box (x) (require true) (cons scale nil)"
+                           + " (ensure true))\n"
+                           + "(pmap box (range 0 300))")[0]
+            executor.assert_called_once()
+        self.assertEqual(len(results[0]), 300)
+        self.assertEqual(results[0][299].first()(2), 6)
+
+    def test_deep_lists(self):
+        code = ("(defun grow (xs x) (require true) (cons x xs)"
+                + " (ensure true))\n"
+                + "(def long (reduce grow nil (range 0 100000)))\n"
+                + "(defun size (x) (require true) (+ x (length long))"
+                + " (ensure true))\n"
+                + "(defun pick (x) (require true) long (ensure true))\n"
+                + "(pmap size (range 0 300))"
+                + " (pmap length (map pick (range 0 300)))")
+        results = _run(code)[0]
+        self.assertEqual(results[-2][299], 100299)
+        self.assertListEqual(list(results[-1]), [100000] * 300)
+
+    def test_pack_function(self):
+        env = _run(PRELUDE)[1]
+        builtins = {id(compObj.value): sym
+                    for sym, compObj in globalEnv.items()}
+        payload = parallel.pack_function(env["v_poly"], builtins)
+        poly = parallel.unpack_function(payload, globalEnv)
+        self.assertIsNot(poly, env["v_poly"])
+        self.assertEqual(poly(2), 7)
+
+class TestSerial(ut.TestCase):
+    @mock.patch.object(parallel, "PARALLEL_WORKERS", 1)
+    def test_one_worker(self):
+        with mock.patch.object(parallel, "_executor_for") as executor:
+            results = _run(PRELUDE + "(pmap poly (range 0 20000))")[0]
+            executor.assert_not_called()
+        self.assertEqual(len(results[0]), 20000)
+
+class TestPurity(ut.TestCase):
+    def _errors(self, code):
+        ast = parse(lex(StringIO(code))[0])[0]
+        return analyze(ast)[1]
+
+    def test_pure(self):
+        self.assertListEqual(self._errors(
+            PRELUDE + "(defun twice (x) (require true) (poly (poly x))"
+            + " (ensure true)) (pmap twice nil)"
+            + " (defun sum (xs) (require true) (preduce add 0 xs)"
+            + " (ensure true)) (pmap sum nil) (pmap first nil)"), [])
+
+    def test_impure(self):
+        errors = self._errors(
+            "(defun loud (x) (require true) (print x) (ensure true))\n"
+            + "(defun call (f x) (require true) (f x) (ensure true))\n"
+            + "(defun pass (xs) (require true) (map print xs)"
+            + " (ensure true))\n"
+            + "(defun indirect (x) (require true) (loud x) (ensure true))\n"
+            + "(pmap loud nil) (pmap call nil) (pmap pass nil)"
+            + " (pmap indirect nil) (preduce print 0 nil)")
+        self.assertEqual(len(errors), 5)
+        self.assertEqual(str(errors[0]),
+                         "SemanticError: Function: \n"
+                         + "\t pmap \n"
+                         + "on line 5 column 5 needs argument 1 to be a "
+                         + "function without side effects")
+
+    def test_redefined_callee(self):
+        errors = self._errors(
+            "(defun h (x) (require true) (+ x 1) (ensure true))\n"
+            + "(defun g (x) (require true) (h x) (ensure true))\n"
+            + "(defun h (x) (require true) (print x) (ensure true))\n"
+            + "(pmap g (range 0 12)) (pmap h (range 0 12))")
+        self.assertEqual(len(errors), 2)
+        self.assertIn("line 4 column 5", str(errors[0]))
+
+    def test_function_arguments(self):
+        errors = self._errors(
+            "(defun noisy (x) (require true) (print x) (ensure true))\n"
+            + "(defun ap (h) (require true) (reduce (first h) 0 (cons 7 nil))"
+            + " (ensure true))\n"
+            + "(defun pass (f xs) (require true) (map f xs) (ensure true))\n"
+            + "(pmap ap (cons (cons noisy nil) nil)) (pmap pass nil)")
+        self.assertEqual(len(errors), 2)
+        self.assertListEqual(self._errors(
+            PRELUDE + "(defun sums (xs) (require true) (reduce add 0 xs)"
+            + " (ensure true)) (pmap sums nil)"), [])
+
+if __name__ == "__main__":
+    ut.main()
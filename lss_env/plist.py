@@ -0,0 +1,272 @@
+from typing import Any, Iterable, Iterator, Union
+
+class Nil():
+    """
+    The Nil class is the type of the empty list, NIL. It is kept as its
+    own class so that the empty list is a single shared object.
+    """
+
+    __slots__ = ()
+
+    length = 0
+
+    def isEmpty(self) -> bool:
+        return True
+
+    def first(self):
+        raise IndexError("first of empty list")
+
+    def rest(self):
+        raise IndexError("rest of empty list")
+
+    def append(self, other: "ConsList") -> "ConsList":
+        return other
+
+    def nth(self, index: int):
+        raise IndexError("list index out of range")
+
+    def __len__(self):
+        return 0
+
+    def __iter__(self):
+        return iter(())
+
+    def __eq__(self, other):
+        return isinstance(other, Nil)
+
+    def __hash__(self):
+        return hash(())
+
+    def __repr__(self):
+        return "()"
+
+NIL = Nil()
+
+class Cons():
+    """
+    The Cons class is a persistent singly linked list cell. Cells are
+    never modified after construction, so cons and rest are O(1) and
+    share the tail with the list they came from.
+
+    Attributes:
+        head: The first element of the list.
+        tail (ConsList): The rest of the list.
+        length (int): The number of elements in the list, cached so that
+            length does not have to walk the list.
+    """
+
+    __slots__ = ("head", "tail", "length")
+
+    def __init__(self, head: Any, tail: "ConsList" = NIL):
+        self.head = head
+        self.tail = tail
+        self.length = tail.length + 1
+
+    @classmethod
+    def fromIter(cls, items: Iterable) -> "ConsList":
+        """
+        Builds a list holding items in order.
+        """
+        result = NIL
+        for item in reversed(list(items)):
+            result = cls(item, result)
+        return result
+
+    def isEmpty(self) -> bool:
+        return False
+
+    def first(self):
+        return self.head
+
+    def rest(self) -> "ConsList":
+        return self.tail
+
+    def append(self, other: "ConsList") -> "ConsList":
+        """
+        Returns this list followed by other. Only the cells of this list
+        are copied, other becomes the shared tail of the result.
+        """
+        if other.isEmpty():
+            return self
+        result = other
+        for item in reversed(list(self)):
+            result = Cons(item, result)
+        return result
+
+    def nth(self, index: int):
+        if index < 0 or index >= self.length:
+            raise IndexError("list index out of range")
+        node = self
+        for _ in range(index):
+            node = node.tail
+        return node.head
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self) -> Iterator:
+        node = self
+        while node.length:
+            yield node.head
+            node = node.tail
+
+    def __eq__(self, other):
+        if not isinstance(other, (Cons, Nil)):
+            return NotImplemented
+        return (self.length == other.length
+                and all(x == y for x, y in zip(self, other)))
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return "(" + " ".join(repr(item) for item in self) + ")"
+
+ConsList = Union[Cons, Nil]
+
+# Persistent vector layout: a trie of 32-way tuples plus a tail buffer
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+
+class PVector():
+    """
+    The PVector class is a persistent vector for indexed access, laid
+    out as a 32-way trie of tuples with the last partial block kept in a
+    separate tail. Indexing and update are O(log32 n) and push is
+    amortized O(1). Every operation returns a new vector that shares all
+    untouched trie nodes with the old one.
+
+    Attributes:
+        length (int): The number of elements in the vector.
+    """
+
+    __slots__ = ("length", "_shift", "_root", "_tail")
+
+    def __init__(self):
+        self.length = 0
+        self._shift = _BITS
+        self._root = ()
+        self._tail = ()
+
+    @classmethod
+    def fromIter(cls, items: Iterable) -> "PVector":
+        """
+        Builds a vector holding items in order.
+        """
+        return cls().append(items)
+
+    @classmethod
+    def _make(cls, length, shift, root, tail) -> "PVector":
+        vec = cls.__new__(cls)
+        vec.length = length
+        vec._shift = shift
+        vec._root = root
+        vec._tail = tail
+        return vec
+
+    def _tailOffset(self) -> int:
+        if self.length < _WIDTH:
+            return 0
+        return ((self.length - 1) >> _BITS) << _BITS
+
+    def _leafFor(self, index: int) -> tuple:
+        if index >= self._tailOffset():
+            return self._tail
+        node = self._root
+        level = self._shift
+        while level > 0:
+            node = node[(index >> level) & _MASK]
+            level -= _BITS
+        return node
+
+    def nth(self, index: int):
+        if index < 0:
+            index += self.length
+        if index < 0 or index >= self.length:
+            raise IndexError("vector index out of range")
+        return self._leafFor(index)[index & _MASK]
+
+    def push(self, item: Any) -> "PVector":
+        """
+        Returns a new vector with item added at the end.
+        """
+        if self.length - self._tailOffset() < _WIDTH:
+            return PVector._make(self.length + 1, self._shift, self._root,
+                                 self._tail + (item,))
+        # The tail is full, move it into the trie
+        shift = self._shift
+        if (self.length >> _BITS) > (1 << shift):
+            root = (self._root, _newPath(shift, self._tail))
+            shift += _BITS
+        else:
+            root = self._pushTail(shift, self._root, self._tail)
+        return PVector._make(self.length + 1, shift, root, (item,))
+
+    def _pushTail(self, level: int, parent: tuple, tail: tuple) -> tuple:
+        subIndex = ((self.length - 1) >> level) & _MASK
+        if level == _BITS:
+            child = tail
+        elif subIndex < len(parent):
+            child = self._pushTail(level - _BITS, parent[subIndex], tail)
+        else:
+            child = _newPath(level - _BITS, tail)
+        return parent[:subIndex] + (child,) + parent[subIndex + 1:]
+
+    def assoc(self, index: int, item: Any) -> "PVector":
+        """
+        Returns a new vector with the element at index replaced by item.
+        """
+        if index < 0 or index >= self.length:
+            raise IndexError("vector index out of range")
+        if index >= self._tailOffset():
+            pos = index & _MASK
+            tail = self._tail[:pos] + (item,) + self._tail[pos + 1:]
+            return PVector._make(self.length, self._shift, self._root, tail)
+        root = _assoc(self._shift, self._root, index, item)
+        return PVector._make(self.length, self._shift, root, self._tail)
+
+    def append(self, other: Iterable) -> "PVector":
+        """
+        Returns this vector followed by the elements of other. The trie
+        of this vector is shared, the elements of other are pushed.
+        """
+        result = self
+        for item in other:
+            result = result.push(item)
+        return result
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index: int):
+        return self.nth(index)
+
+    def __iter__(self) -> Iterator:
+        for start in range(0, self.length, _WIDTH):
+            yield from self._leafFor(start)
+
+    def __eq__(self, other):
+        if not isinstance(other, PVector):
+            return NotImplemented
+        return (self.length == other.length
+                and all(x == y for x, y in zip(self, other)))
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return "[" + " ".join(repr(item) for item in self) + "]"
+
+def _newPath(level: int, node: tuple) -> tuple:
+    while level > 0:
+        node = (node,)
+        level -= _BITS
+    return node
+
+def _assoc(level: int, node: tuple, index: int, item: Any) -> tuple:
+    pos = (index >> level) & _MASK
+    if level == 0:
+        return node[:pos] + (item,) + node[pos + 1:]
+    child = _assoc(level - _BITS, node[pos], index, item)
+    return node[:pos] + (child,) + node[pos + 1:]
@@ -0,0 +1,68 @@
+import unittest as ut
+from lss_env.plist import NIL, Cons, PVector
+
+class TestCons(ut.TestCase):
+    def test_empty(self):
+        self.assertEqual(len(NIL), 0)
+        self.assertEqual(list(NIL), [])
+        with self.assertRaises(IndexError):
+            NIL.first()
+
+    def test_from_iter(self):
+        xs = Cons.fromIter([1, 2, 3])
+        self.assertEqual(list(xs), [1, 2, 3])
+        self.assertEqual(len(xs), 3)
+        self.assertEqual(xs.nth(2), 3)
+
+    def test_rest_shares(self):
+        xs = Cons.fromIter([1, 2, 3])
+        ys = Cons(0, xs)
+        self.assertIs(ys.rest(), xs)
+        self.assertIs(ys.rest().rest(), xs.tail)
+
+    def test_append_shares_right(self):
+        xs = Cons.fromIter([1, 2])
+        ys = Cons.fromIter([3, 4])
+        zs = xs.append(ys)
+        self.assertEqual(list(zs), [1, 2, 3, 4])
+        self.assertIs(zs.rest().rest(), ys)
+        self.assertEqual(list(xs), [1, 2])
+
+    def test_append_empty(self):
+        xs = Cons.fromIter([1])
+        self.assertIs(xs.append(NIL), xs)
+        self.assertIs(NIL.append(xs), xs)
+
+    def test_equality(self):
+        self.assertEqual(Cons.fromIter([1, 2]), Cons(1, Cons(2)))
+        self.assertNotEqual(Cons.fromIter([1, 2]), Cons.fromIter([1]))
+
+class TestPVector(ut.TestCase):
+    def test_push_and_nth(self):
+        vec = PVector()
+        for i in range(5000):
+            vec = vec.push(i)
+        self.assertEqual(len(vec), 5000)
+        self.assertEqual(list(vec), list(range(5000)))
+        for i in range(0, 5000, 37):
+            self.assertEqual(vec.nth(i), i)
+        self.assertEqual(vec[-1], 4999)
+
+    def test_versions_are_independent(self):
+        small = PVector.fromIter(range(100))
+        large = small.push(100)
+        self.assertEqual(len(small), 100)
+        self.assertEqual(len(large), 101)
+        with self.assertRaises(IndexError):
+            small.nth(100)
+
+    def test_assoc(self):
+        vec = PVector.fromIter(range(2000))
+        for i in (0, 31, 32, 1023, 1024, 1999):
+            updated = vec.assoc(i, "x")
+            self.assertEqual(updated.nth(i), "x")
+            self.assertEqual(vec.nth(i), i)
+
+    def test_append(self):
+        vec = PVector.fromIter(range(40)).append(Cons.fromIter([40, 41]))
+        self.assertEqual(list(vec), list(range(42)))
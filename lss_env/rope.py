@@ -0,0 +1,216 @@
+from typing import Iterator, Tuple, Union
+
+# Leaves shorter than this are merged on concatenation, so that
+# accumulating many tiny pieces does not produce one node per piece.
+LEAF_MAX = 256
+
+class Rope():
+    """
+    The Rope class is the runtime representation of LSS strings. A rope
+    is an immutable, height balanced binary tree whose leaves hold Python
+    str chunks. Concatenation, indexing and substring all run in
+    O(log n) and share structure with their operands instead of copying.
+
+    The rope is only flattened into a single str when it is needed as
+    one, which is when it is written out (str) or used as a hash key
+    (hash and ==). The flattened value is cached.
+
+    Attributes:
+        length (int): The number of characters in the rope.
+        height (int): The height of the tree. Leaves have height 0.
+    """
+
+    __slots__ = ("_leaf", "_left", "_right", "length", "height", "_flat")
+
+    def __init__(self, text: str = ""):
+        self._leaf = text
+        self._left = None
+        self._right = None
+        self.length = len(text)
+        self.height = 0
+        self._flat = text
+
+    @classmethod
+    def of(cls, value: Union["Rope", str]) -> "Rope":
+        """
+        Returns value as a rope, wrapping it if it is a Python str.
+        """
+        if isinstance(value, Rope):
+            return value
+        if isinstance(value, str):
+            return cls(value)
+        raise TypeError("Expected a string, got {}".format(
+                            type(value).__name__))
+
+    @classmethod
+    def _branch(cls, left: "Rope", right: "Rope") -> "Rope":
+        node = cls.__new__(cls)
+        node._leaf = None
+        node._left = left
+        node._right = right
+        node.length = left.length + right.length
+        node.height = max(left.height, right.height) + 1
+        node._flat = None
+        return node
+
+    def isLeaf(self) -> bool:
+        return self._leaf is not None
+
+    def concat(self, other: Union["Rope", str]) -> "Rope":
+        """
+        Returns the concatenation of this rope and other in O(log n).
+        Neither operand is modified.
+        """
+        return _join(self, Rope.of(other))
+
+    def __add__(self, other):
+        if not isinstance(other, (Rope, str)):
+            return NotImplemented
+        return self.concat(other)
+
+    def __radd__(self, other):
+        if not isinstance(other, str):
+            return NotImplemented
+        return _join(Rope(other), self)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.length)
+            if step != 1:
+                return Rope(str(self)[key])
+            return self.substring(start, stop)
+        if key < 0:
+            key += self.length
+        if key < 0 or key >= self.length:
+            raise IndexError("rope index out of range")
+        node = self
+        while not node.isLeaf():
+            if key < node._left.length:
+                node = node._left
+            else:
+                key -= node._left.length
+                node = node._right
+        return node._leaf[key]
+
+    def substring(self, start: int, stop: int) -> "Rope":
+        """
+        Returns the characters in [start, stop) as a rope in O(log n).
+        """
+        start = max(0, start)
+        stop = min(self.length, stop)
+        if start >= stop:
+            return Rope()
+        if start == 0 and stop == self.length:
+            return self
+        rest = _split(self, stop)[0]
+        return _split(rest, start)[1]
+
+    def chunks(self) -> Iterator[str]:
+        """
+        Yields the leaf chunks of the rope from left to right without
+        flattening it.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.isLeaf():
+                if node._leaf:
+                    yield node._leaf
+            else:
+                stack.append(node._right)
+                stack.append(node._left)
+
+    def __str__(self):
+        if self._flat is None:
+            self._flat = "".join(self.chunks())
+        return self._flat
+
+    def __repr__(self):
+        return "Rope({!r})".format(str(self))
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __eq__(self, other):
+        if isinstance(other, (Rope, str)):
+            return (len(self) == len(other)
+                    and str(self) == str(other))
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+def _rotate_left(node: Rope) -> Rope:
+    right = node._right
+    return Rope._branch(Rope._branch(node._left, right._left),
+                        right._right)
+
+def _rotate_right(node: Rope) -> Rope:
+    left = node._left
+    return Rope._branch(left._left,
+                        Rope._branch(left._right, node._right))
+
+def _balance(node: Rope) -> Rope:
+    """
+    Restores the AVL invariant at node, assuming both of its children
+    are balanced and their heights differ by at most two.
+    """
+    if node.isLeaf():
+        return node
+    left, right = node._left, node._right
+    if left.height > right.height + 1:
+        if left._left.height < left._right.height:
+            node = Rope._branch(_rotate_left(left), right)
+        return _rotate_right(node)
+    if right.height > left.height + 1:
+        if right._right.height < right._left.height:
+            node = Rope._branch(left, _rotate_right(right))
+        return _rotate_left(node)
+    return node
+
+def _join(left: Rope, right: Rope) -> Rope:
+    """
+    Concatenates two balanced ropes. The taller rope is descended along
+    its inner spine until the heights match, so the cost is
+    proportional to the difference in heights.
+    """
+    if left.length == 0:
+        return right
+    if right.length == 0:
+        return left
+    if (left.isLeaf() and right.isLeaf()
+            and left.length + right.length <= LEAF_MAX):
+        return Rope(left._leaf + right._leaf)
+    if left.height > right.height + 1:
+        return _balance(Rope._branch(left._left,
+                                     _join(left._right, right)))
+    if right.height > left.height + 1:
+        return _balance(Rope._branch(_join(left, right._left),
+                                     right._right))
+    # Merge neighbouring small leaves across the seam before linking
+    if (right.isLeaf() and not left.isLeaf() and left._right.isLeaf()
+            and left._right.length + right.length <= LEAF_MAX):
+        return _join(left._left,
+                     Rope(left._right._leaf + right._leaf))
+    return Rope._branch(left, right)
+
+def _split(node: Rope, index: int) -> Tuple[Rope, Rope]:
+    """
+    Splits a rope into the characters before and after index.
+    """
+    if node.isLeaf():
+        return (Rope(node._leaf[:index]), Rope(node._leaf[index:]))
+    leftLen = node._left.length
+    if index == leftLen:
+        return (node._left, node._right)
+    if index < leftLen:
+        before, after = _split(node._left, index)
+        return (before, _join(after, node._right))
+    before, after = _split(node._right, index - leftLen)
+    return (_join(node._left, before), after)
@@ -0,0 +1,73 @@
+import unittest as ut
+from lss_env.rope import Rope, LEAF_MAX
+
+class TestConcat(ut.TestCase):
+    def test_empty(self):
+        rope = Rope() + Rope()
+        self.assertEqual(str(rope), "")
+        self.assertEqual(len(rope), 0)
+
+    def test_str_operands(self):
+        rope = "ab" + Rope("cd") + "ef"
+        self.assertEqual(str(rope), "abcdef")
+
+    def test_operands_unchanged(self):
+        left = Rope("a" * LEAF_MAX)
+        right = Rope("b" * LEAF_MAX)
+        both = left + right
+        self.assertEqual(str(left), "a" * LEAF_MAX)
+        self.assertEqual(str(right), "b" * LEAF_MAX)
+        self.assertEqual(str(both), "a" * LEAF_MAX + "b" * LEAF_MAX)
+
+    def test_accumulation_is_balanced(self):
+        rope = Rope()
+        expected = []
+        for i in range(5000):
+            piece = str(i) * 60
+            rope = rope + piece
+            expected.append(piece)
+        self.assertEqual(str(rope), "".join(expected))
+        # An AVL tree over n leaves has height below 1.45 log2(n + 2)
+        self.assertLess(rope.height, 30)
+
+    def test_prepend_accumulation(self):
+        rope = Rope()
+        for i in range(1000):
+            rope = Rope(str(i) * 100) + rope
+        self.assertEqual(str(rope),
+                         "".join(str(i) * 100 for i in reversed(range(1000))))
+
+    def test_non_string(self):
+        with self.assertRaises(TypeError):
+            Rope("a").concat(4)
+
+class TestAccess(ut.TestCase):
+    def setUp(self):
+        self.text = "".join(str(i) * 50 for i in range(500))
+        self.rope = Rope()
+        for i in range(500):
+            self.rope = self.rope + str(i) * 50
+
+    def test_index(self):
+        for i in range(0, len(self.text), 97):
+            self.assertEqual(self.rope[i], self.text[i])
+        self.assertEqual(self.rope[-1], self.text[-1])
+
+    def test_index_out_of_range(self):
+        with self.assertRaises(IndexError):
+            self.rope[len(self.text)]
+
+    def test_substring(self):
+        for start in range(0, len(self.text), 1013):
+            for stop in range(start, len(self.text), 2029):
+                self.assertEqual(str(self.rope.substring(start, stop)),
+                                 self.text[start:stop])
+
+    def test_slice(self):
+        self.assertEqual(str(self.rope[10:-10]), self.text[10:-10])
+        self.assertEqual(str(self.rope[::3]), self.text[::3])
+
+    def test_hash_key(self):
+        table = {self.rope: 1}
+        self.assertEqual(table[self.text], 1)
+        self.assertEqual(self.rope, self.text)
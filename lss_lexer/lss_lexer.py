@@ -1,5 +1,10 @@
-from typing import List, Tuple, TextIO, NewType, TypeVar
-from lss_lexer.lss_token import Token, TokenType
+import gc
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterator, List, TextIO, Tuple, NewType, TypeVar
+from lss_lexer.lss_token import Token, TokenType, LineTable
 
 # Type Aliases
 Symbol = NewType("Symbol", str)
@@ -8,33 +13,144 @@ Number = TypeVar("Number", int, float)
 Boolean = NewType("Boolean", bool)
 Atom = TypeVar("Atom", Symbol, String, Number, Boolean)
 
-def lex(stream: TextIO) -> List[Token]:
+# In parallel mode, files are only split into chunks of at least this
+# many characters, smaller chunks are not worth sending to a process
+PARALLEL_CHUNK_SIZE = 1 << 20
+
+def lex(stream: TextIO, processes: int = 1) -> List[Token]:
     """ 
     Lexes a text character stream into a list of tokens.
     
     Args:
         stream (io.TextIOBase): The text stream to read from.
+        processes (int): The number of processes to lex with. If more
+            than one, large sources are cut into chunks that are lexed
+            in a process pool. The result is the same either way.
         
     Returns:
         A tuple (tokes, errors) where tokens is a list of tokens
         representing the tokenized program, and errors is a list of
         syntax errors that were found during the lexing phase.
     """
-    tokens = []
-    errors = []
-    
-    codeDump = _dump_stream(stream)
+    code = stream.read()
     
     # In case of empty program, there are no tokens or errors
-    if (not codeDump):
+    if (not code):
         return ([],[])
+
+    # Tokens only record their offset. Line and column numbers are
+    # looked up in this table when they are needed.
+    lines = LineTable.fromText(code)
     
     # The end of the program is padded with a newline, which
     # acts as a terminator for the programs
-    lastChar = codeDump[len(codeDump) - 1]
-    codeDump.append(("\n", lastChar[1], lastChar[2] + 1))
+    code = code + "\n"
+
+    if processes > 1 and len(code) >= 2 * PARALLEL_CHUNK_SIZE:
+        return _lex_parallel(code, lines, processes)
+    return _lex_chunk(code, 0, lines)
+
+def lex_stream(stream: TextIO) -> Iterator[Tuple[List[Token],
+                                                 List[SyntaxError]]]:
+    """
+    Lexes a text character stream one line at a time, reading each
+    line only when the tokens of the previous one have been consumed.
+
+    Every line is lexed on its own, which is always safe since a
+    newline ends whatever the lexer is in the middle of. The tokens of
+    a line share a line table holding just that line, so nothing is
+    kept for lines whose tokens are no longer referenced.
+
+    Returns:
+        An iterator of tuples (tokens, errors), one for each line,
+        equal to the part of the output of lex for that line.
+    """
+    offset = 0
+    for lineNum, line in enumerate(stream, 1):
+        if not line.endswith("\n"):
+            # The last line is padded, as lex pads the program
+            line += "\n"
+        yield _lex_chunk(line, offset, LineTable([offset], lineNum))
+        offset += len(line)
+
+def _lex_parallel(code: str, lines: LineTable, processes: int):
+    """
+    Lexes padded code by cutting it into chunks that are lexed in a
+    process pool, and merges the results in order.
+
+    Chunks are cut at line starts. That is always safe, since whatever
+    state the lexer is in, a newline ends it: atoms end at whitespace,
+    and strings cannot span lines. Offsets are global, so the tokens of
+    every chunk only need to be pointed at the shared line table.
+    """
+    numChunks = min(processes * 4, len(code) // PARALLEL_CHUNK_SIZE)
+    cuts = [0]
+    for i in range(1, numChunks):
+        cut = code.find("\n", i * len(code) // numChunks) + 1
+        if cut > cuts[-1]:
+            cuts.append(cut)
+    cuts.append(len(code))
+
+    jobs = []
+    for start, end in zip(cuts, cuts[1:]):
+        firstLine = bisect_right(lines.starts, start)
+        lastLine = bisect_left(lines.starts, end)
+        jobs.append((code[start:end], start,
+                     lines.starts[firstLine - 1:lastLine], firstLine))
+
+    tokens = []
+    errors = []
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for columns, chunkErrors in executor.map(_lex_job, jobs):
+            # Rebuild the tokens around the shared line table. Calling
+            # tuple.__new__ directly keeps the loop out of Python code.
+            with _gc_paused():
+                tokens.extend(map(tuple.__new__, repeat(Token),
+                                  zip(*columns, repeat(lines))))
+            errors.extend(chunkErrors)
+    return (tokens, errors)
+
+def _lex_job(job):
+    """
+    Lexes one chunk in a worker process. The chunk gets a line table
+    holding only its own lines, enough to format its errors. The tokens
+    are sent back without it, as one tuple per field, which pickles far
+    smaller than one tuple per token.
+    """
+    chunk, start, starts, firstLine = job
+    with _gc_paused():
+        tokens, errors = _lex_chunk(chunk, start,
+                                    LineTable(starts, firstLine))
+    columns = tuple(zip(*tokens))[:4] if tokens else ((), (), (), ())
+    return (columns, errors)
+
+@contextmanager
+def _gc_paused():
+    """
+    Pauses the cyclic garbage collector. Tokens cannot form cycles, but
+    creating millions of them would otherwise trigger a collection
+    pass over everything allocated so far, over and over.
+    """
+    wasEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if wasEnabled:
+            gc.enable()
+
+def _lex_chunk(code: str, base: int, lines: LineTable):
+    """
+    Runs the lexer state machine over code, which starts at offset base
+    of the source and must end in a newline. Offsets within code are
+    shifted by base when they are stored in tokens.
+    """
+    tokens = []
+    errors = []
     
-    currTokenStr = ""
+    # The current atom is sliced out of the code once it ends, from
+    # the offset where it started
+    atomStart = 0
     inAtom = False
     inStrAtom = False
     
@@ -42,36 +158,36 @@ def lex(stream: TextIO) -> List[Token]:
     # character by character, that
     # adds tokens and errors as side effects. The transition details
     # of the state machine are given by the if-elif-else chains.
-    # The state is described by currTokenStr, inAtom, and inStrAtom.
-    for char, lineNum, colNum in codeDump:
+    # The state is described by atomStart, inAtom, and inStrAtom.
+    for offset, char in enumerate(code):
         if (not inAtom):
             if char == "(":
                 # Seen (, add its token
                 tokens.append(Token("(", "(", TokenType.LPAREN,
-                                           lineNum, colNum))
+                                           base+offset, lines))
             elif char == ")":
                 # Seen ), add its token
                 tokens.append(Token(")", ")", TokenType.RPAREN,
-                                           lineNum, colNum))
+                                           base+offset, lines))
             elif char.isspace():
                 # Ignore whitespace
                 pass
             elif char == "\"":
                 # See quote, starting string atom
+                atomStart = offset + 1
                 inAtom = True
                 inStrAtom = True
             else:
                 # Anything else, starting non-string atom
-                currTokenStr = currTokenStr + char
+                atomStart = offset
                 inAtom = True
         elif inStrAtom:
             if char == "\"":
                 # See closing quote, ending string atom
+                currTokenStr = code[atomStart:offset]
                 tokens.append(Token("\"" + currTokenStr + "\"", 
                               _fix_escapes(currTokenStr), 
-                              TokenType.STR, lineNum,
-                              colNum))
-                currTokenStr = ""
+                              TokenType.STR, base+offset, lines))
                 inAtom = False
                 inStrAtom = False
             elif char == "\n":
@@ -79,43 +195,40 @@ def lex(stream: TextIO) -> List[Token]:
                 # quote
                 errors.append(SyntaxError(
                     "Syntax Error: Expected closing quotation mark after \n"
-                    + "\t {} \n".format("\"" + currTokenStr + "\"")
-                    + "on line {} and column {}".format(lineNum, colNum)))
-                currTokenStr = ""
+                    + "\t {} \n".format("\"" + code[atomStart:offset] + "\"")
+                    + "on line {} and column {}".format(
+                            *lines.position(base+offset))))
                 inAtom = False
                 inStrAtom = False
             else:
                 # Anything else, character is part of string
-                currTokenStr = currTokenStr + char
+                pass
         else:
             if char.isspace():
                 # See whitespace, finished atom with whitespace
-                tokens.append(_tokenize_atom(currTokenStr, lineNum,
-                                              colNum-1))
-                currTokenStr = ""
+                tokens.append(_tokenize_atom(code[atomStart:offset],
+                                             base+offset-1, lines))
                 inAtom = False
             elif char == "(":
                 # See (, finished atom with (
                 tokens.append(Token("(", "(", TokenType.LPAREN,
-                                           lineNum, colNum))
-                tokens.append(_tokenize_atom(currTokenStr, lineNum,
-                                              colNum-1))
-                currTokenStr = ""
+                                           base+offset, lines))
+                tokens.append(_tokenize_atom(code[atomStart:offset],
+                                             base+offset-1, lines))
                 inAtom = False
             elif char == ")":
                 # See ), finished atom with )
-                tokens.append(_tokenize_atom(currTokenStr, lineNum,
-                                              colNum-1))
+                tokens.append(_tokenize_atom(code[atomStart:offset],
+                                             base+offset-1, lines))
                 tokens.append(Token(")", ")", TokenType.RPAREN,
-                                           lineNum, colNum))
-                currTokenStr = ""
+                                           base+offset, lines))
                 inAtom = False
             else:
                 # Anything else, char is part of atom
-                currTokenStr = currTokenStr + char
+                pass
     return (tokens,errors)
 
-def _tokenize_atom(tokenStr:str, lineNum:int, colNum:int) -> Token:
+def _tokenize_atom(tokenStr:str, offset:int, lines:LineTable) -> Token:
     """
     Given a string of code representing a token, return
     the corresponding Token object.
@@ -123,16 +236,16 @@ def _tokenize_atom(tokenStr:str, lineNum:int, colNum:int) -> Token:
     if _isBool(tokenStr):
         boolValue = True if tokenStr == "true" else False
         return Token(tokenStr, boolValue, TokenType.BOOL, 
-                     lineNum, colNum)
+                     offset, lines)
     elif _isInt(tokenStr):
         return Token(tokenStr, int(tokenStr), TokenType.INT, 
-                     lineNum, colNum)
+                     offset, lines)
     elif _isFloat(tokenStr):
         return Token(tokenStr, float(tokenStr), TokenType.FLOAT, 
-                     lineNum, colNum)
+                     offset, lines)
     else:
         return Token(tokenStr, tokenStr, TokenType.SYM, 
-                     lineNum, colNum)
+                     offset, lines)
         
 def _isBool(tokenStr:str) -> bool:
     return tokenStr == "true" or tokenStr == "false"
@@ -162,16 +275,3 @@ def _fix_escapes(astr:str) -> str:
     into escaped characters.
     """
     return bytes(astr, "utf-8").decode("unicode_escape")
-
-def _dump_stream(stream: TextIO) -> List[Tuple[str, int, int]]:
-    """
-    Gets every character from a text stream and dumps it into a list
-    of tuples (char, lineNum, colNum) holding the characters and
-    location metadata.
-    """
-    dump = []
-    lines = stream.readlines()
-    for lineNum, line in enumerate(lines):
-        for colNum, char in enumerate(line):
-            dump.append((char, lineNum+1, colNum+1))
-    return dump
\ No newline at end of file
@@ -1,7 +1,9 @@
 import unittest as ut
 from io import StringIO
-from lexer.lisp_lexer import lex
-from lexer.lisp_token import Token, TokenType
+from unittest import mock
+from lss_lexer import lss_lexer
+from lss_lexer.lss_lexer import lex
+from lss_lexer.lss_token import Token, TokenType
 
 class TestParen(ut.TestCase):
     def setUp(self):
@@ -14,7 +16,7 @@ class TestParen(ut.TestCase):
         self.prog.write("(")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        lParenToken = Token("(", "(", TokenType.LPAREN,
+        lParenToken = Token.at("(", "(", TokenType.LPAREN,
                                    1, 1)
         self.assertListEqual(tokens, [lParenToken])
         
@@ -22,7 +24,7 @@ class TestParen(ut.TestCase):
         self.prog.write(")")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        rParenToken = Token(")", ")", TokenType.RPAREN,
+        rParenToken = Token.at(")", ")", TokenType.RPAREN,
                                    1, 1)
         self.assertEqual(tokens, [rParenToken])
         
@@ -30,17 +32,17 @@ class TestParen(ut.TestCase):
         self.prog.write("((()))")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        lParenToken1 = Token("(", "(", TokenType.LPAREN,
+        lParenToken1 = Token.at("(", "(", TokenType.LPAREN,
                                    1, 1)
-        lParenToken2 = Token("(", "(", TokenType.LPAREN,
+        lParenToken2 = Token.at("(", "(", TokenType.LPAREN,
                                    1, 2)
-        lParenToken3 = Token("(", "(", TokenType.LPAREN,
+        lParenToken3 = Token.at("(", "(", TokenType.LPAREN,
                                    1, 3)
-        rParenToken1 = Token(")", ")", TokenType.RPAREN,
+        rParenToken1 = Token.at(")", ")", TokenType.RPAREN,
                                    1, 4)
-        rParenToken2 = Token(")", ")", TokenType.RPAREN,
+        rParenToken2 = Token.at(")", ")", TokenType.RPAREN,
                                    1, 5)
-        rParenToken3 = Token(")", ")", TokenType.RPAREN,
+        rParenToken3 = Token.at(")", ")", TokenType.RPAREN,
                                    1, 6)
         expTokens = [lParenToken1, lParenToken2, lParenToken3,
                           rParenToken1, rParenToken2, rParenToken3]
@@ -50,17 +52,17 @@ class TestParen(ut.TestCase):
         self.prog.write("((( \n )) \n )")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        lParenToken1 = Token("(", "(", TokenType.LPAREN,
+        lParenToken1 = Token.at("(", "(", TokenType.LPAREN,
                                    1, 1)
-        lParenToken2 = Token("(", "(", TokenType.LPAREN,
+        lParenToken2 = Token.at("(", "(", TokenType.LPAREN,
                                    1, 2)
-        lParenToken3 = Token("(", "(", TokenType.LPAREN,
+        lParenToken3 = Token.at("(", "(", TokenType.LPAREN,
                                    1, 3)
-        rParenToken1 = Token(")", ")", TokenType.RPAREN,
+        rParenToken1 = Token.at(")", ")", TokenType.RPAREN,
                                    2, 2)
-        rParenToken2 = Token(")", ")", TokenType.RPAREN,
+        rParenToken2 = Token.at(")", ")", TokenType.RPAREN,
                                    2, 3)
-        rParenToken3 = Token(")", ")", TokenType.RPAREN,
+        rParenToken3 = Token.at(")", ")", TokenType.RPAREN,
                                    3, 2)
         expTokens = [lParenToken1, lParenToken2, lParenToken3,
                           rParenToken1, rParenToken2, rParenToken3]
@@ -70,17 +72,17 @@ class TestParen(ut.TestCase):
         self.prog.write("() () ()")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        lParenToken1 = Token("(", "(", TokenType.LPAREN,
+        lParenToken1 = Token.at("(", "(", TokenType.LPAREN,
                                    1, 1)
-        rParenToken1 = Token(")", ")", TokenType.RPAREN,
+        rParenToken1 = Token.at(")", ")", TokenType.RPAREN,
                                    1, 2)
-        lParenToken2 = Token("(", "(", TokenType.LPAREN,
+        lParenToken2 = Token.at("(", "(", TokenType.LPAREN,
                                    1, 4)
-        rParenToken2 = Token(")", ")", TokenType.RPAREN,
+        rParenToken2 = Token.at(")", ")", TokenType.RPAREN,
                                    1, 5)
-        lParenToken3 = Token("(", "(", TokenType.LPAREN,
+        lParenToken3 = Token.at("(", "(", TokenType.LPAREN,
                                    1, 7)
-        rParenToken3 = Token(")", ")", TokenType.RPAREN,
+        rParenToken3 = Token.at(")", ")", TokenType.RPAREN,
                                    1, 8)
         expTokens = [lParenToken1, rParenToken1, lParenToken2,
                           rParenToken2, lParenToken3, rParenToken3]
@@ -90,17 +92,17 @@ class TestParen(ut.TestCase):
         self.prog.write("()  \n ( \n ) ()")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        lParenToken1 = Token("(", "(", TokenType.LPAREN,
+        lParenToken1 = Token.at("(", "(", TokenType.LPAREN,
                                    1, 1)
-        rParenToken1 = Token(")", ")", TokenType.RPAREN,
+        rParenToken1 = Token.at(")", ")", TokenType.RPAREN,
                                    1, 2)
-        lParenToken2 = Token("(", "(", TokenType.LPAREN,
+        lParenToken2 = Token.at("(", "(", TokenType.LPAREN,
                                    2, 2)
-        rParenToken2 = Token(")", ")", TokenType.RPAREN,
+        rParenToken2 = Token.at(")", ")", TokenType.RPAREN,
                                    3, 2)
-        lParenToken3 = Token("(", "(", TokenType.LPAREN,
+        lParenToken3 = Token.at("(", "(", TokenType.LPAREN,
                                    3, 4)
-        rParenToken3 = Token(")", ")", TokenType.RPAREN,
+        rParenToken3 = Token.at(")", ")", TokenType.RPAREN,
                                    3, 5)
         expTokens = [lParenToken1, rParenToken1, lParenToken2,
                           rParenToken2, lParenToken3, rParenToken3]
@@ -117,9 +119,9 @@ class TestNewLineEdgeCases(ut.TestCase):
         self.prog.write(" \n ()")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        lParenToken1 = Token("(", "(", TokenType.LPAREN,
+        lParenToken1 = Token.at("(", "(", TokenType.LPAREN,
                                    2, 2)
-        rParenToken1 = Token(")", ")", TokenType.RPAREN,
+        rParenToken1 = Token.at(")", ")", TokenType.RPAREN,
                                    2, 3)
         expTokens = [lParenToken1, rParenToken1]
         self.assertListEqual(tokens, expTokens)
@@ -128,9 +130,9 @@ class TestNewLineEdgeCases(ut.TestCase):
         self.prog.write(" \n \n ()")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        lParenToken1 = Token("(", "(", TokenType.LPAREN,
+        lParenToken1 = Token.at("(", "(", TokenType.LPAREN,
                                    3, 2)
-        rParenToken1 = Token(")", ")", TokenType.RPAREN,
+        rParenToken1 = Token.at(")", ")", TokenType.RPAREN,
                                    3, 3)
         expTokens = [lParenToken1, rParenToken1]
         self.assertListEqual(tokens, expTokens)
@@ -139,9 +141,9 @@ class TestNewLineEdgeCases(ut.TestCase):
         self.prog.write("( \n \n \n )")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        lParenToken1 = Token("(", "(", TokenType.LPAREN,
+        lParenToken1 = Token.at("(", "(", TokenType.LPAREN,
                                    1, 1)
-        rParenToken1 = Token(")", ")", TokenType.RPAREN,
+        rParenToken1 = Token.at(")", ")", TokenType.RPAREN,
                                    4, 2)
         expTokens = [lParenToken1, rParenToken1]
         self.assertListEqual(tokens, expTokens)
@@ -150,9 +152,9 @@ class TestNewLineEdgeCases(ut.TestCase):
         self.prog.write("() \n \n")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        lParenToken1 = Token("(", "(", TokenType.LPAREN,
+        lParenToken1 = Token.at("(", "(", TokenType.LPAREN,
                                    1, 1)
-        rParenToken1 = Token(")", ")", TokenType.RPAREN,
+        rParenToken1 = Token.at(")", ")", TokenType.RPAREN,
                                    1, 2)
         expTokens = [lParenToken1, rParenToken1]
         self.assertListEqual(tokens, expTokens)
@@ -168,7 +170,7 @@ class TestInt(ut.TestCase):
         self.prog.write("2")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        intToken = Token("2", 2, TokenType.INT,
+        intToken = Token.at("2", 2, TokenType.INT,
                                1, 1)
         self.assertListEqual(tokens, [intToken])
     
@@ -176,7 +178,7 @@ class TestInt(ut.TestCase):
         self.prog.write("2123")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        intToken = Token("2123", 2123, TokenType.INT,
+        intToken = Token.at("2123", 2123, TokenType.INT,
                                1, 4)
         self.assertListEqual(tokens, [intToken])
     
@@ -184,7 +186,7 @@ class TestInt(ut.TestCase):
         self.prog.write("11223344556678899101011111212131314141515")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        intToken = Token("11223344556678899101011111212131314141515", 
+        intToken = Token.at("11223344556678899101011111212131314141515", 
                                11223344556678899101011111212131314141515, 
                                TokenType.INT, 1, 41)
         self.assertListEqual(tokens, [intToken])
@@ -193,7 +195,7 @@ class TestInt(ut.TestCase):
         self.prog.write("-24")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        intToken = Token("-24", -24, 
+        intToken = Token.at("-24", -24, 
                                TokenType.INT, 1, 3)
         self.assertListEqual(tokens, [intToken])
     
@@ -201,8 +203,8 @@ class TestInt(ut.TestCase):
         self.prog.write("- 24")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        minusToken = Token("-", "-", TokenType.SYM, 1, 1)
-        intToken = Token("24", 24, 
+        minusToken = Token.at("-", "-", TokenType.SYM, 1, 1)
+        intToken = Token.at("24", 24, 
                                TokenType.INT, 1, 4)
         self.assertListEqual(tokens, [minusToken, intToken])
     
@@ -210,9 +212,9 @@ class TestInt(ut.TestCase):
         self.prog.write("24 \n 25")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        intToken = Token("24", 24, 
+        intToken = Token.at("24", 24, 
                                TokenType.INT, 1, 2)
-        intToken2 = Token("25", 25, 
+        intToken2 = Token.at("25", 25, 
                                TokenType.INT, 2, 3)
         self.assertListEqual(tokens, [intToken, intToken2])
         
@@ -220,7 +222,7 @@ class TestInt(ut.TestCase):
         self.prog.write("0024")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        intToken = Token("0024", 24, 
+        intToken = Token.at("0024", 24, 
                                TokenType.INT, 1, 4)
         self.assertListEqual(tokens, [intToken])
     
@@ -228,7 +230,7 @@ class TestInt(ut.TestCase):
         self.prog.write("2400")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        intToken = Token("2400", 2400, 
+        intToken = Token.at("2400", 2400, 
                                TokenType.INT, 1, 4)
         self.assertListEqual(tokens, [intToken])
         
@@ -236,7 +238,7 @@ class TestInt(ut.TestCase):
         self.prog.write("002400")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        intToken = Token("002400", 2400, 
+        intToken = Token.at("002400", 2400, 
                                TokenType.INT, 1, 6)
         self.assertListEqual(tokens, [intToken])
 
@@ -251,7 +253,7 @@ class TestFloat(ut.TestCase):
         self.prog.write("1.1")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        floatToken = Token("1.1", 1.1, TokenType.FLOAT,
+        floatToken = Token.at("1.1", 1.1, TokenType.FLOAT,
                                1, 3)
         self.assertListEqual(tokens, [floatToken])
     
@@ -259,7 +261,7 @@ class TestFloat(ut.TestCase):
         self.prog.write("112233445566.112233445566")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        floatToken = Token("112233445566.112233445566", 
+        floatToken = Token.at("112233445566.112233445566", 
                                  112233445566.112233445566, 
                                  TokenType.FLOAT, 1, 25)
         self.assertListEqual(tokens, [floatToken])
@@ -268,7 +270,7 @@ class TestFloat(ut.TestCase):
         self.prog.write("-2.45")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        floatToken = Token("-2.45", 
+        floatToken = Token.at("-2.45", 
                                  -2.45, 
                                  TokenType.FLOAT, 1, 5)
         self.assertListEqual(tokens, [floatToken])
@@ -277,8 +279,8 @@ class TestFloat(ut.TestCase):
         self.prog.write("- 1.02")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        minusToken = Token("-", "-", TokenType.SYM, 1, 1)
-        floatToken = Token("1.02", 1.02, 
+        minusToken = Token.at("-", "-", TokenType.SYM, 1, 1)
+        floatToken = Token.at("1.02", 1.02, 
                                TokenType.FLOAT, 1, 6)
         self.assertListEqual(tokens, [minusToken, floatToken])
     
@@ -286,9 +288,9 @@ class TestFloat(ut.TestCase):
         self.prog.write("2.45 \n 2.46")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        floatToken1 = Token("2.45", 2.45, 
+        floatToken1 = Token.at("2.45", 2.45, 
                                  TokenType.FLOAT, 1, 4)
-        floatToken2 = Token("2.46", 2.46, 
+        floatToken2 = Token.at("2.46", 2.46, 
                                  TokenType.FLOAT, 2, 5)
         self.assertListEqual(tokens, [floatToken1, floatToken2])
         
@@ -296,7 +298,7 @@ class TestFloat(ut.TestCase):
         self.prog.write("0002.45")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        floatToken = Token("0002.45", 
+        floatToken = Token.at("0002.45", 
                                  2.45, 
                                  TokenType.FLOAT, 1, 7)
         self.assertListEqual(tokens, [floatToken])
@@ -305,7 +307,7 @@ class TestFloat(ut.TestCase):
         self.prog.write("2.45000")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        floatToken = Token("2.45000", 
+        floatToken = Token.at("2.45000", 
                                  2.45, 
                                  TokenType.FLOAT, 1, 7)
         self.assertListEqual(tokens, [floatToken])
@@ -314,7 +316,7 @@ class TestFloat(ut.TestCase):
         self.prog.write("0002.45000")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        floatToken = Token("0002.45000", 
+        floatToken = Token.at("0002.45000", 
                                  2.45, 
                                  TokenType.FLOAT, 1, 10)
         self.assertListEqual(tokens, [floatToken])
@@ -323,7 +325,7 @@ class TestFloat(ut.TestCase):
         self.prog.write(".45")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        floatToken = Token(".45", 
+        floatToken = Token.at(".45", 
                                  0.45, 
                                  TokenType.FLOAT, 1, 3)
         self.assertListEqual(tokens, [floatToken])
@@ -332,7 +334,7 @@ class TestFloat(ut.TestCase):
         self.prog.write("1.")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        floatToken = Token("1.", 
+        floatToken = Token.at("1.", 
                                  1.0, 
                                  TokenType.FLOAT, 1, 2)
         self.assertListEqual(tokens, [floatToken])
@@ -348,14 +350,14 @@ class TestString(ut.TestCase):
         self.prog.write("\"\"")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        strToken = Token("\"\"", "", TokenType.STR, 1, 2)
+        strToken = Token.at("\"\"", "", TokenType.STR, 1, 2)
         self.assertListEqual(tokens, [strToken])
         
     def test_empty_with_ws(self):
         self.prog.write("\"  \"")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        strToken = Token("\"  \"", "  ", 
+        strToken = Token.at("\"  \"", "  ", 
                                TokenType.STR, 1, 4)
         self.assertListEqual(tokens, [strToken])
         
@@ -363,7 +365,7 @@ class TestString(ut.TestCase):
         self.prog.write("\"\\n\"")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        strToken = Token("\"\\n\"", "\n", 
+        strToken = Token.at("\"\\n\"", "\n", 
                                TokenType.STR, 1, 4)
         self.assertListEqual(tokens, [strToken])
         
@@ -371,7 +373,7 @@ class TestString(ut.TestCase):
         self.prog.write("\"a\"")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        strToken = Token("\"a\"", "a", 
+        strToken = Token.at("\"a\"", "a", 
                                TokenType.STR, 1, 3)
         self.assertListEqual(tokens, [strToken])
         
@@ -379,7 +381,7 @@ class TestString(ut.TestCase):
         self.prog.write("\"hello\"")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        strToken = Token("\"hello\"", "hello", 
+        strToken = Token.at("\"hello\"", "hello", 
                                TokenType.STR, 1, 7)
         self.assertListEqual(tokens, [strToken])
         
@@ -387,7 +389,7 @@ class TestString(ut.TestCase):
         self.prog.write("\"a b\"")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        strToken = Token("\"a b\"", "a b", 
+        strToken = Token.at("\"a b\"", "a b", 
                                TokenType.STR, 1, 5)
         self.assertListEqual(tokens, [strToken])
         
@@ -395,7 +397,7 @@ class TestString(ut.TestCase):
         self.prog.write("\"hello world\"")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        strToken = Token("\"hello world\"", "hello world", 
+        strToken = Token.at("\"hello world\"", "hello world", 
                                TokenType.STR, 1, 13)
         self.assertListEqual(tokens, [strToken])
         
@@ -403,7 +405,7 @@ class TestString(ut.TestCase):
         self.prog.write("\"hello \\n world\"")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        strToken = Token("\"hello \\n world\"", 
+        strToken = Token.at("\"hello \\n world\"", 
                                "hello \n world",
                                TokenType.STR, 1, 16)
         self.assertListEqual(tokens, [strToken])
@@ -412,7 +414,7 @@ class TestString(ut.TestCase):
         self.prog.write("\"    a\"")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        strToken = Token("\"    a\"", "    a", 
+        strToken = Token.at("\"    a\"", "    a", 
                                TokenType.STR, 1, 7)
         self.assertListEqual(tokens, [strToken])
         
@@ -420,7 +422,7 @@ class TestString(ut.TestCase):
         self.prog.write("\"a    \"")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        strToken = Token("\"a    \"", "a    ", 
+        strToken = Token.at("\"a    \"", "a    ", 
                                TokenType.STR, 1, 7)
         self.assertListEqual(tokens, [strToken])
         
@@ -428,7 +430,7 @@ class TestString(ut.TestCase):
         self.prog.write("\"    a    \"")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        strToken = Token("\"    a    \"", "    a    ", 
+        strToken = Token.at("\"    a    \"", "    a    ", 
                                TokenType.STR, 1, 11)
         self.assertListEqual(tokens, [strToken])
 
@@ -450,14 +452,14 @@ class TestSym(ut.TestCase):
         self.prog.write("+")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        symToken = Token("+", "+", TokenType.SYM, 1, 1)
+        symToken = Token.at("+", "+", TokenType.SYM, 1, 1)
         self.assertListEqual(tokens, [symToken])
         
     def test_word_sym(self):
         self.prog.write("append")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        symToken = Token("append", "append", 
+        symToken = Token.at("append", "append", 
                                TokenType.SYM, 1, 6)
         self.assertListEqual(tokens, [symToken])
         
@@ -465,11 +467,11 @@ class TestSym(ut.TestCase):
         self.prog.write("append world hello")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        symToken1 = Token("append", "append", 
+        symToken1 = Token.at("append", "append", 
                                TokenType.SYM, 1, 6)
-        symToken2 = Token("world", "world", 
+        symToken2 = Token.at("world", "world", 
                                TokenType.SYM, 1, 12)
-        symToken3 = Token("hello", "hello", 
+        symToken3 = Token.at("hello", "hello", 
                                TokenType.SYM, 1, 18)
         self.assertListEqual(tokens, [symToken1, symToken2, symToken3])
         
@@ -477,7 +479,7 @@ class TestSym(ut.TestCase):
         self.prog.write("..123")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        symToken = Token("..123", "..123", 
+        symToken = Token.at("..123", "..123", 
                                TokenType.SYM, 1, 5)
         self.assertListEqual(tokens, [symToken])
         
@@ -485,7 +487,7 @@ class TestSym(ut.TestCase):
         self.prog.write("1.2.3")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        symToken = Token("1.2.3", "1.2.3", 
+        symToken = Token.at("1.2.3", "1.2.3", 
                                TokenType.SYM, 1, 5)
         self.assertListEqual(tokens, [symToken])
         
@@ -493,7 +495,7 @@ class TestSym(ut.TestCase):
         self.prog.write("-_-")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        symToken = Token("-_-", "-_-", 
+        symToken = Token.at("-_-", "-_-", 
                                TokenType.SYM, 1, 3)
         self.assertListEqual(tokens, [symToken])
         
@@ -501,7 +503,7 @@ class TestSym(ut.TestCase):
         self.prog.write("#%$")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        symToken = Token("#%$", "#%$", 
+        symToken = Token.at("#%$", "#%$", 
                                TokenType.SYM, 1, 3)
         self.assertListEqual(tokens, [symToken])
         
@@ -516,7 +518,7 @@ class TestBool(ut.TestCase):
         self.prog.write("true")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        symToken = Token("true", True, 
+        symToken = Token.at("true", True, 
                                TokenType.BOOL, 1, 4)
         self.assertListEqual(tokens, [symToken])
         
@@ -524,6 +526,55 @@ class TestBool(ut.TestCase):
         self.prog.write("false")
         self.prog.seek(0)
         tokens = lex(self.prog)[0]
-        symToken = Token("false", False, 
+        symToken = Token.at("false", False, 
                                TokenType.BOOL, 1, 5)
         self.assertListEqual(tokens, [symToken])
+
+class TestParallel(ut.TestCase):
+    def setUp(self):
+        # Use tiny chunks so that small programs are split many times
+        self.patcher = mock.patch.object(lss_lexer, "PARALLEL_CHUNK_SIZE", 16)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def assertSameAsSerial(self, code):
+        tokens, errors = lex(StringIO(code))
+        parTokens, parErrors = lex(StringIO(code), processes=2)
+        self.assertListEqual(parTokens, tokens)
+        self.assertListEqual([str(error) for error in parErrors],
+                             [str(error) for error in errors])
+        self.assertListEqual([(token.lineNum, token.colNum)
+                              for token in parTokens],
+                             [(token.lineNum, token.colNum)
+                              for token in tokens])
+
+    def test_forms(self):
+        self.assertSameAsSerial("(+ (* 9 (+ 2.56 3)) (- 10 5))\n" * 40)
+
+    def test_atoms_across_lines(self):
+        self.assertSameAsSerial("abc\n(def x 1)\n  -2.5 true\n\"s\"" * 30)
+
+    def test_unterminated_strings(self):
+        self.assertSameAsSerial("(append \"abc \n def\") \"x\n" * 30)
+
+    def test_no_newlines(self):
+        self.assertSameAsSerial("(+ 1 2) " * 100)
+
+class TestStream(ut.TestCase):
+    def assertSameAsLex(self, code):
+        tokens, errors = lex(StringIO(code))
+        lines = list(lss_lexer.lex_stream(StringIO(code)))
+        self.assertEqual(len(lines), len(code.splitlines()))
+        self.assertListEqual([token for lineTokens, _ in lines
+                              for token in lineTokens], tokens)
+        self.assertListEqual([str(error) for _, lineErrors in lines
+                              for error in lineErrors],
+                             [str(error) for error in errors])
+
+    def test_lines(self):
+        self.assertSameAsLex("abc\n(def x 1)\n  -2.5 true\n\"s\"\n\n(+ 1 2)")
+
+    def test_unterminated_strings(self):
+        self.assertSameAsLex("(append \"abc \n def\") \"x\n" * 3)
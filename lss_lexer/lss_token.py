@@ -1,5 +1,6 @@
+from bisect import bisect_right
 from enum import Enum
-from typing import NewType, TypeVar, NamedTuple
+from typing import List, NewType, TypeVar, NamedTuple, Tuple
 
 # Type Aliases
 Symbol = NewType("Symbol", str)
@@ -39,6 +40,56 @@ class TokenType(Enum):
     def __str__(self):
         return self.name
 
+class LineTable():
+    """
+    The LineTable class maps character offsets in a source file to line
+    and column numbers. It holds the offset at which every line starts,
+    is built once per file, and answers queries by binary search, so
+    that positions only cost anything when they are actually needed.
+
+    Attributes:
+        starts (List[int]): The offset of the first character of every
+            line, in increasing order.
+        firstLine (int): The line number of the line starting at
+            starts[0]. This is 1 unless the table only covers part of
+            a file.
+    """
+
+    __slots__ = ("starts", "firstLine")
+
+    def __init__(self, starts: List[int], firstLine: int = 1):
+        self.starts = starts
+        self.firstLine = firstLine
+
+    @classmethod
+    def fromText(cls, text: str) -> "LineTable":
+        starts = [0]
+        index = text.find("\n")
+        while index != -1:
+            starts.append(index + 1)
+            index = text.find("\n", index + 1)
+        return cls(starts)
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """
+        Returns the (lineNum, colNum) of the character at offset. Both
+        begin from 1.
+        """
+        line = bisect_right(self.starts, offset)
+        return (self.firstLine + line - 1,
+                offset - self.starts[line - 1] + 1)
+
+class _FixedPosition(NamedTuple):
+    """
+    Stands in for a LineTable for tokens that were not lexed from a
+    file, and always reports the same position.
+    """
+    lineNum: int
+    colNum: int
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        return (self.lineNum, self.colNum)
+
 class Token(NamedTuple):
     """
     The Token class represents a token object, which contains
@@ -52,16 +103,55 @@ class Token(NamedTuple):
             integer, float, and string respectively. Symbols are represented
             as str as well.
         tokenType (TokenType): The type of the token.
-        lineNum (int): An integer representing the line number
-            the token was found. Note that this begins from 1.
-        colNum (int): An integer representing the column of the last
-            character in this token.
+        offset (int): The offset in the source of the last character in
+            this token.
+        lines (LineTable): The line table of the source, shared by all
+            tokens lexed from it.
+
+    The lineNum and colNum properties give the line number and the
+    column of the last character in this token, and are computed from
+    offset when they are asked for. Tokens compare equal when they are
+    at the same position, whichever line table they refer to.
     """
     tokenStr: str
     tokenVal: Atom
     tokenType: TokenType
-    lineNum: int
-    colNum: int
+    offset: int
+    lines: LineTable
+
+    @classmethod
+    def at(cls, tokenStr: str, tokenVal: Atom, tokenType: TokenType,
+           lineNum: int, colNum: int) -> "Token":
+        """
+        Makes a token with a fixed position, for tokens that do not come
+        from lexing a source file.
+        """
+        return cls(tokenStr, tokenVal, tokenType, 0,
+                   _FixedPosition(lineNum, colNum))
+
+    @property
+    def lineNum(self) -> int:
+        return self[4].position(self[3])[0]
+
+    @property
+    def colNum(self) -> int:
+        return self[4].position(self[3])[1]
+
+    def _key(self):
+        return self[:3] + self[4].position(self[3])
+
+    def __eq__(self, other):
+        if not isinstance(other, Token):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __ne__(self, other):
+        if not isinstance(other, Token):
+            return NotImplemented
+        return self._key() != other._key()
+
+    def __hash__(self):
+        return hash(self._key())
     
     def __str__(self):
         return "<{}, {}, {}, {}>".format(
@@ -69,4 +159,4 @@ class Token(NamedTuple):
                              self.lineNum, self.colNum)
         
     def isSym(self) -> bool:
-        return self[2] == TokenType.SYM
\ No newline at end of file
+        return self[2] == TokenType.SYM
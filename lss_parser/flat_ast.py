@@ -0,0 +1,207 @@
+from array import array
+from typing import Iterator, List, Optional, Sequence
+from lss_lexer.lss_token import Token, TokenType
+
+# Typecode of the node arrays: signed 64 bit integers
+_TYPECODE = "q"
+_ITEMSIZE = array(_TYPECODE).itemsize
+
+class FlatAst():
+    """
+    The FlatAst class is an alternative encoding of the output of the
+    parser. Instead of nested Python lists of tokens, the nodes of all
+    forms are laid out in preorder in two integer arrays that point into
+    the token buffer:
+
+        refs[i] is the index in tokens of the token of node i. For a
+            list that is its "(" token.
+        ends[i] is the index of the first node after the subtree of
+            node i, so a node is an atom if ends[i] == i + 1 and the
+            root of the list's first child is at i + 1.
+
+    Nodes are referred to by their index. Every method that walks the
+    tree does so with loops over these indexes, so no recursion is
+    involved however deeply a program is nested.
+
+    Attributes:
+        tokens (List[Token]): The token buffer, as output by the lexer.
+        refs (Sequence[int]): The token index of every node.
+        ends (Sequence[int]): The end of the subtree of every node.
+    """
+
+    __slots__ = ("tokens", "refs", "ends")
+
+    def __init__(self, tokens: List[Token], refs: Sequence[int],
+                 ends: Sequence[int]):
+        self.tokens = tokens
+        self.refs = refs
+        self.ends = ends
+
+    def __len__(self):
+        return len(self.refs)
+
+    def roots(self) -> Iterator[int]:
+        """
+        Yields the nodes of the top level forms, in order.
+        """
+        node = 0
+        while node < len(self.refs):
+            yield node
+            node = self.ends[node]
+
+    def token(self, node: int) -> Optional[Token]:
+        """
+        Returns the token of an atom, or None if node is a list.
+        """
+        token = self.tokens[self.refs[node]]
+        return None if token[2] == TokenType.LPAREN else token
+
+    def children(self, node: int) -> List[int]:
+        """
+        Returns the nodes of the elements of a list.
+        """
+        result = []
+        child = node + 1
+        end = self.ends[node]
+        while child < end:
+            result.append(child)
+            child = self.ends[child]
+        return result
+
+    def key(self, node: int) -> int:
+        return node
+
+    def expr(self, node: int):
+        """
+        Builds the nested list representation of a node, the same as
+        lss_parser.parse returns for it.
+        """
+        token = self.token(node)
+        if token is not None:
+            return token
+        root = []
+        openLists = [(root, self.ends[node])]
+        child = node + 1
+        while openLists:
+            current, end = openLists[-1]
+            if child == end:
+                openLists.pop()
+                continue
+            token = self.token(child)
+            if token is not None:
+                current.append(token)
+            else:
+                nested = []
+                current.append(nested)
+                openLists.append((nested, self.ends[child]))
+            child += 1
+        return root
+
+    def buffers(self):
+        """
+        Returns zero-copy memoryviews of the node arrays, which can be
+        written straight to a file or socket.
+        """
+        return (memoryview(self.refs).cast("B"),
+                memoryview(self.ends).cast("B"))
+
+    def to_bytes(self) -> bytes:
+        """
+        Encodes the node arrays, in the native byte order, as their
+        length followed by the raw contents of refs and ends. The token
+        buffer is not included.
+        """
+        header = array(_TYPECODE, [len(self.refs)]).tobytes()
+        return b"".join((header,) + self.buffers())
+
+    @classmethod
+    def from_bytes(cls, data, tokens: List[Token]) -> "FlatAst":
+        """
+        Decodes the output of to_bytes over the given token buffer.
+        The node arrays are memoryviews into data and are not copied.
+        """
+        view = memoryview(data).cast("B")
+        size = view[:_ITEMSIZE].cast(_TYPECODE)[0]
+        refsEnd = _ITEMSIZE * (1 + size)
+        refs = view[_ITEMSIZE:refsEnd].cast(_TYPECODE)
+        ends = view[refsEnd:refsEnd + _ITEMSIZE * size].cast(_TYPECODE)
+        return cls(tokens, refs, ends)
+
+    def __reduce__(self):
+        return (FlatAst.from_bytes, (self.to_bytes(), self.tokens))
+
+class NestedView():
+    """
+    Gives the nested list output of lss_parser.parse the node interface
+    of FlatAst, so that the analyzer can walk either one. A node is the
+    list or token itself.
+    """
+
+    __slots__ = ()
+
+    def token(self, node) -> Optional[Token]:
+        return node if isinstance(node, Token) else None
+
+    def children(self, node):
+        return node
+
+    def key(self, node) -> int:
+        return id(node)
+
+    def expr(self, node):
+        return node
+
+NESTED = NestedView()
+
+def parse_flat(tokens: List[Token]):
+    """
+    Parses the output of the lexer into a FlatAst. The tree and the
+    errors are the same as those of lss_parser.parse, but the token list
+    is left unchanged since it becomes the token buffer of the result.
+
+    Args:
+        tokens (List[Token]): The list of tokens to parse.
+
+    Returns:
+        A tuple (ast, errors) where ast is a FlatAst and errors is a
+        list of syntax errors that were found during the parsing phase.
+    """
+    refs = array(_TYPECODE)
+    ends = array(_TYPECODE)
+    errors = []
+    openNodes = []
+    for index, token in enumerate(tokens):
+        if token[2] == TokenType.LPAREN:
+            openNodes.append(len(refs))
+            refs.append(index)
+            ends.append(0)
+        elif token[2] == TokenType.RPAREN:
+            if not openNodes:
+                errors.append(SyntaxError(
+                    "SyntaxError: Unmatched \")\""
+                    + " at line {} column {}".format(token.lineNum,
+                                                     token.colNum)))
+                continue
+            node = openNodes.pop()
+            ends[node] = len(refs)
+            _drop_empty_top_level(refs, ends, openNodes, node)
+        else:
+            refs.append(index)
+            ends.append(len(refs))
+
+    # Ran out of tokens, close every open list, innermost first
+    while openNodes:
+        node = openNodes.pop()
+        ends[node] = len(refs)
+        errors.append(SyntaxError("SyntaxError: Missing one or more \")\""))
+        _drop_empty_top_level(refs, ends, openNodes, node)
+    return (FlatAst(tokens, refs, ends), errors)
+
+def _drop_empty_top_level(refs, ends, openNodes, node):
+    """
+    The parser leaves empty top level lists out of the program, so a
+    list that was just closed is removed again if it is one.
+    """
+    if not openNodes and node == len(refs) - 1:
+        refs.pop()
+        ends.pop()
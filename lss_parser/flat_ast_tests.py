@@ -0,0 +1,117 @@
+import pickle
+import unittest as ut
+from io import StringIO
+from lss_lexer.lss_lexer import lex
+from lss_parser.lss_parser import parse
+from lss_parser.flat_ast import FlatAst, parse_flat
+from lss_analyzer.lss_analyzer import analyze
+
+def _parse_both(code):
+    tokens = lex(StringIO(code))[0]
+    nested, nestedErrors = parse(list(tokens))
+    flat, flatErrors = parse_flat(tokens)
+    return (nested, nestedErrors, flat, flatErrors)
+
+def _messages(errors):
+    return [str(error) for error in errors]
+
+class TestParseFlat(ut.TestCase):
+    def assertSameParse(self, code):
+        nested, nestedErrors, flat, flatErrors = _parse_both(code)
+        self.assertEqual(repr([flat.expr(root) for root in flat.roots()]),
+                         repr(nested))
+        self.assertListEqual(_messages(flatErrors), _messages(nestedErrors))
+        return flat
+
+    def test_layout(self):
+        flat = self.assertSameParse("(+ 1 (- 2 3)) x")
+        self.assertListEqual(list(flat.refs), [0, 1, 2, 3, 4, 5, 6, 9])
+        self.assertListEqual(list(flat.ends), [7, 2, 3, 7, 5, 6, 7, 8])
+        self.assertListEqual(list(flat.roots()), [0, 7])
+        self.assertListEqual(flat.children(0), [1, 2, 3])
+        self.assertIsNone(flat.token(0))
+        self.assertEqual(flat.token(7)[1], "x")
+
+    def test_empty(self):
+        flat = self.assertSameParse("")
+        self.assertEqual(len(flat), 0)
+
+    def test_empty_lists(self):
+        self.assertSameParse("() (()) (() 1) ((")
+
+    def test_unmatched(self):
+        self.assertSameParse(") (+ 1 2)) )")
+
+    def test_missing(self):
+        self.assertSameParse("(+ 1 (- 2 (* 3")
+
+    def test_deep_nesting(self):
+        depth = 100000
+        flat = _parse_both("(" * depth + "1" + ")" * depth)[2]
+        self.assertEqual(flat.ends[0], depth + 1)
+        self.assertListEqual(flat.children(depth - 1), [depth])
+
+    def test_tokens_unchanged(self):
+        tokens = lex(StringIO("(+ 1 2)"))[0]
+        copy = list(tokens)
+        flat = parse_flat(tokens)[0]
+        self.assertListEqual(tokens, copy)
+        self.assertIs(flat.tokens, tokens)
+
+class TestBytes(ut.TestCase):
+    CODE = "(def x 1) (+ x (* 2 3)) \"s\""
+
+    def test_round_trip(self):
+        flat = parse_flat(lex(StringIO(self.CODE))[0])[0]
+        data = flat.to_bytes()
+        copy = FlatAst.from_bytes(data, flat.tokens)
+        self.assertListEqual(list(copy.refs), list(flat.refs))
+        self.assertListEqual(list(copy.ends), list(flat.ends))
+
+    def test_zero_copy(self):
+        flat = parse_flat(lex(StringIO(self.CODE))[0])[0]
+        data = bytearray(flat.to_bytes())
+        copy = FlatAst.from_bytes(data, flat.tokens)
+        # The decoded arrays are views of data, not copies of it
+        data[-8:] = bytes(8)
+        self.assertEqual(copy.ends[-1], 0)
+
+    def test_pickle(self):
+        flat = parse_flat(lex(StringIO(self.CODE))[0])[0]
+        copy = pickle.loads(pickle.dumps(flat))
+        self.assertListEqual([copy.expr(root) for root in copy.roots()],
+                             [flat.expr(root) for root in flat.roots()])
+
+class TestAnalyzeFlat(ut.TestCase):
+    def assertSameAnalysis(self, code):
+        nested, _, flat, _ = _parse_both(code)
+        nestedTypes = {}
+        flatTypes = {}
+        nestedErrors = analyze(nested, nestedTypes)[1]
+        flatErrors = analyze(flat, flatTypes)[1]
+        self.assertListEqual(_messages(flatErrors), _messages(nestedErrors))
+        return (flat, flatTypes, flatErrors)
+
+    def test_types(self):
+        flat, types, errors = self.assertSameAnalysis("(+ 1 (* 2 3))")
+        self.assertListEqual(errors, [])
+        self.assertEqual(str(types[0]), "int")
+
+    def test_definitions(self):
+        flat, types, errors = self.assertSameAnalysis(
+            "(def one 1)\n"
+            + "(defun inc (x) (require true) (+ x one) (ensure true))\n"
+            + "(inc one)")
+        self.assertListEqual(errors, [])
+
+    def test_errors(self):
+        flat, types, errors = self.assertSameAnalysis(
+            "(y 1) (1 2) (+ 1 \"a\") (def) (+ (def x 1)) (() 1)")
+        self.assertEqual(len(errors), 7)
+
+    def test_deep_nesting(self):
+        depth = 100000
+        self.assertSameAnalysis("(+ 1 " * depth + "1" + ")" * depth)
+
+if __name__ == "__main__":
+    ut.main()
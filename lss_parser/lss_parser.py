@@ -1,5 +1,6 @@
-from typing import List, Tuple, NewType, TypeVar
+from typing import Iterable, Iterator, List, Optional, Tuple, NewType, TypeVar
 from lss_lexer.lss_token import Token, TokenType
+from lss_parser.shared_ast import SharedAst
 
 # Type Aliases
 Symbol = NewType("Symbol", str)
@@ -9,7 +10,8 @@ Boolean = NewType("Boolean", bool)
 Atom = TypeVar("Atom", Symbol, String, Number, Boolean)
 Expr = TypeVar("Expr", Atom, List["Expr"])
 
-def parse(tokens: List[Token]) -> Tuple[List[Expr], List[SyntaxError]]:
+def parse(tokens: List[Token],
+          hashCons: bool = False) -> Tuple[List[Expr], List[SyntaxError]]:
     """
     Parses the output of the lexer into an AST and provides a list of 
     errors.
@@ -17,71 +19,105 @@ def parse(tokens: List[Token]) -> Tuple[List[Expr], List[SyntaxError]]:
     Args:
         tokens (List[Token]): The list of tokens to parse. This should
             be output from lisp_lexer.lex
+        hashCons (bool): If true, structurally identical subtrees are
+            shared: every atom with the same text, and every list with
+            the same elements, is one object wherever it appears. The
+            ast is then a SharedAst, which keeps the position of every
+            occurrence.
         
     Returns:
         A tuple (ast, errors) where ast is a list of expression
         representing the abstract syntax tree, and errors is a list of
         syntax errors that were found during the parsing phase.
     """
-    # Reverse tokens since the tokens list is used as a stack.
-    # Appending and removing from end of list in Python is faster.
-    tokens.reverse()
     nodes = []
     errors = []
-    
-    # parse_helper only parses one complete expression. We do
-    # repeated calls to handle more than one complete expression
-    # such as "(+ 1 2) (- 2 1)"
-    while len(tokens) != 0:
-        innerNodes, innerErrors = _parse_helper(tokens)
-        if innerNodes != []:
-            nodes.append(innerNodes)
-        if innerErrors != []:
-            errors.extend(innerErrors)
-    
+    for node, nodeErrors in parse_stream(tokens, hashCons):
+        if node is not None:
+            nodes.append(node)
+        errors.extend(nodeErrors)
+    if hashCons:
+        atoms = [token for token in tokens
+                 if token[2] != TokenType.LPAREN
+                 and token[2] != TokenType.RPAREN]
+        return (SharedAst(nodes, atoms), errors)
     return (nodes, errors)
 
-def _parse_helper(tokens: List[Token]):
-    """ 
-    Parses a single complete expression that lies on the stack
-    given by tokens. Note that this function realies
-    on the fact that the token list is mutable.
+def parse_stream(tokens: Iterable[Token], hashCons: bool = False
+                 ) -> Iterator[Tuple[Optional[Expr], List[SyntaxError]]]:
+    """
+    Parses tokens one top level expression at a time. Each expression
+    is yielded as soon as the token that completes it is read, so only
+    the expression being parsed is held in memory, and tokens may come
+    from a generator that is still lexing.
+
+    Args:
+        tokens (Iterable[Token]): The tokens to parse, in order.
+        hashCons (bool): As for parse, except that expressions are
+            plain shared nodes, whose tokens have the positions of
+            their first occurrence. Shared subtrees are kept across
+            expressions, so memory is then no longer bounded by the
+            largest expression.
+
+    Returns:
+        An iterator of tuples (expr, errors), one for each top level
+        expression, where errors are the syntax errors found since the
+        previous one. Expr is None when errors come after the last
+        expression, or when the expression is an empty list, which
+        parse leaves out of the AST.
     """
+    interned = {} if hashCons else None
     errors = []
-    node = []
 
-    # If there are no more tokens, then there is nothing
-    # to parse
-    if (not tokens):
-        return ([], [])
+    # Nested lists are built with an explicit stack of the lists that
+    # are still open, rather than by recursion, so that the nesting
+    # depth of a program is not limited by Python's recursion limit.
+    openNodes = []
+    for token in tokens:
+        if token[2] == TokenType.LPAREN:
+            openNodes.append([])
+            continue
+        if token[2] == TokenType.RPAREN:
+            if not openNodes:
+                # Skip any unmatched ), the expression is whatever
+                # follows them
+                errors.append(SyntaxError(
+                    "SyntaxError: Unmatched \")\""
+                    + " at line {} column {}".format(token.lineNum,
+                                                     token.colNum)))
+                continue
+            node = _intern(interned, openNodes.pop())
+        else:
+            node = _intern(interned, token)
+        if openNodes:
+            openNodes[-1].append(node)
+            continue
+        yield (node if node != [] else None, errors)
+        errors = []
 
-    token = tokens.pop()
-    
-    if token[2] == TokenType.RPAREN:
-        # See ), then there is no matching ( before
-        errors.append(SyntaxError("SyntaxError: Unmatched \")\""
-                      + " at line {} column {}".format(token[3], token[4])))
-        # Attempt to parse the rest of the tokens    
-        innerNode, innerErrors = _parse_helper(tokens)
-        node = innerNode
-        errors.extend(innerErrors)
-        return (node, errors)
-    elif token[2] == TokenType.LPAREN:
-        # See (, then keep parsing until we see the matching )
-        while tokens and tokens[-1][2] != TokenType.RPAREN:
-            innerNodes, innerErrors = _parse_helper(tokens)
-            node.append(innerNodes)
-            errors.extend(innerErrors)
-        # Pop off the matching ) if it exists
-        if  tokens:
-            tokens.pop()
+    # Ran out of tokens, close every open list, innermost first
+    while openNodes:
+        node = _intern(interned, openNodes.pop())
+        errors.append(SyntaxError("SyntaxError: Missing one or more \")\""))
+        if openNodes:
+            openNodes[-1].append(node)
         else:
-            errors.append(SyntaxError(
-                    "SyntaxError: Missing one or more \")\""))
-        return (node, errors)
+            yield (node if node != [] else None, errors)
+            errors = []
+    if errors:
+        yield (None, errors)
+
+def _intern(interned, node):
+    """
+    Returns the shared node structurally identical to node, which
+    becomes the shared one if there is none yet. The elements of a list
+    are interned before the list itself, so lists are identified by the
+    ids of their elements.
+    """
+    if interned is None:
+        return node
+    if isinstance(node, Token):
+        key = (node[2], node[0])
     else:
-        # Otherwise, we have an atom, return its token.
-        return (token, errors)
-    
-    return (node, errors)
-    
+        key = tuple(map(id, node))
+    return interned.setdefault(key, node)
@@ -0,0 +1,129 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+from lss_lexer.lss_token import Token
+
+# A node of a SharedAst: a shared node, and the index in atoms of the
+# first atom of this occurrence of it
+Occurrence = Tuple[object, int]
+
+class SharedAst():
+    """
+    The SharedAst class is the output of lss_parser.parse with
+    hashCons. Structurally identical subtrees of its forms are one
+    object, so a shared node has no single position in the source.
+    Positions are kept aside instead, as the atom tokens of the program
+    in source order, which is also the preorder of the atoms in the
+    forms.
+
+    The node interface of FlatAst is implemented over occurrences: a
+    node is a pair (shared, index) of a shared node and the index in
+    atoms of its first atom. The tokens it returns are those of the
+    occurrence, so errors are reported where they are, while keys are
+    those of the shared nodes, so types and memoized analyses are
+    shared between occurrences.
+
+    Attributes:
+        forms (List[Expr]): The top level forms, made of shared nodes.
+            Their tokens have the positions of the first occurrence of
+            the atom.
+        atoms (List[Token]): The atom tokens, in source order.
+        sizes (Dict[int, int]): The number of atoms in every shared
+            list, by its id.
+    """
+
+    __slots__ = ("forms", "atoms", "sizes")
+
+    def __init__(self, forms: List, atoms: List[Token]):
+        self.forms = forms
+        self.atoms = atoms
+        self.sizes: Dict[int, int] = {}
+        # Count bottom up, visiting every shared list once
+        stack = [(form, False) for form in forms
+                 if not isinstance(form, Token)]
+        while stack:
+            node, visited = stack.pop()
+            if id(node) in self.sizes:
+                continue
+            if not visited:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node
+                             if not isinstance(child, Token))
+                continue
+            self.sizes[id(node)] = sum(map(self._size, node))
+
+    def _size(self, node) -> int:
+        return 1 if isinstance(node, Token) else self.sizes[id(node)]
+
+    def roots(self) -> Iterator[Occurrence]:
+        """
+        Yields the nodes of the top level forms, in order.
+        """
+        index = 0
+        for form in self.forms:
+            yield (form, index)
+            index += self._size(form)
+
+    def token(self, node: Occurrence) -> Optional[Token]:
+        """
+        Returns the token of an atom, at the position of this
+        occurrence, or None if node is a list.
+        """
+        shared, index = node
+        return self.atoms[index] if isinstance(shared, Token) else None
+
+    def children(self, node: Occurrence) -> List[Occurrence]:
+        """
+        Returns the nodes of the elements of a list.
+        """
+        result = []
+        index = node[1]
+        for child in node[0]:
+            result.append((child, index))
+            index += self._size(child)
+        return result
+
+    def key(self, node: Occurrence) -> int:
+        return id(node[0])
+
+    def expr(self, node: Occurrence, types: Optional[Dict] = None):
+        """
+        Builds the nested list representation of a node, the same as
+        lss_parser.parse without hashCons returns for it: nothing is
+        shared and every token is at its position.
+
+        If types is given, the type that analyze recorded for every
+        shared node is also recorded for its copy.
+        """
+        token = self.token(node)
+        if token is not None:
+            _copy_type(types, node[0], token)
+            return token
+        root = []
+        _copy_type(types, node[0], root)
+        openLists = [(root, iter(self.children(node)))]
+        while openLists:
+            current, children = openLists[-1]
+            child = next(children, None)
+            if child is None:
+                openLists.pop()
+                continue
+            token = self.token(child)
+            if token is not None:
+                _copy_type(types, child[0], token)
+                current.append(token)
+            else:
+                nested = []
+                _copy_type(types, child[0], nested)
+                current.append(nested)
+                openLists.append((nested, iter(self.children(child))))
+        return root
+
+    def unshare(self, types: Optional[Dict] = None) -> List:
+        """
+        Builds the nested list representation of every form, as expr
+        does for one.
+        """
+        return [self.expr(root, types) for root in self.roots()]
+
+def _copy_type(types, shared, copy):
+    if types is not None and id(shared) in types:
+        types[id(copy)] = types[id(shared)]